@@ -3,12 +3,14 @@ import sys
 
 from dynpy import logger
 from dynpy.service.convert import ConvertService
-from dynpy.ui.app import DynPyAppView
 
 log = logging.getLogger(__name__)
 
 
 def show_app(service: ConvertService):
+    # tkinter and the views are loaded once the window is shown
+    from dynpy.ui.app import DynPyAppView
+
     app_view = DynPyAppView(service)
     app_view.center_on_screen()
     app_view.mainloop()
@@ -19,6 +21,7 @@ def close_app(service: ConvertService):
         log.info('Saving config')
         service.config_save()
     log.info('Closing app')
+    service.shutdown()
 
 
 def main():
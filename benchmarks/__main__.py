@@ -0,0 +1,117 @@
+import argparse
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+from benchmarks import corpus
+from benchmarks.scenarios import SCENARIOS, BenchContext, measure
+from dynpy.core import reader, summary
+
+
+def _parse_argument() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--graphs", type=int, default=50)
+    parser.add_argument("--nodes", type=int, default=10)
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--scenario",
+        nargs="+",
+        default=None,
+        choices=[scenario.name for scenario in SCENARIOS],
+        help="Run only the given scenarios",
+    )
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        default=None,
+        help="Directory of the corpus, a temporary directory by default",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write the results as JSON to the given path",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        default=None,
+        help="Compare the results with the JSON results of an earlier run",
+    )
+    return parser.parse_args()
+
+
+def _meta(spec: corpus.CorpusSpec, repeat: int) -> Dict[str, Any]:
+    return {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "corpus": spec.to_dict(),
+    }
+
+
+def run(
+    directory: Path,
+    spec: corpus.CorpusSpec,
+    repeat: int,
+    names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    corpus.generate_corpus(directory / "dyn", spec)
+    context = BenchContext(root=directory)
+    # Scenarios parse the graphs unless they bring their own extracts
+    summary.graph_cache().extracts = None
+    results = {}
+    for scenario in SCENARIOS:
+        if names is not None and scenario.name not in names:
+            continue
+        results[scenario.name] = measure(scenario, context, repeat)
+    return {"meta": _meta(spec, repeat), "scenarios": results}
+
+
+def _print_results(
+    results: Mapping[str, Any], baseline: Optional[Mapping[str, Any]]
+) -> None:
+    header = f"{'Scenario':<18} {'min s':>9} {'median s':>9} {'peak MiB':>9}"
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header)
+    for name, result in results["scenarios"].items():
+        peak = result["peak_bytes"] / (1024 * 1024)
+        line = f"{name:<18} {result['min']:>9.3f} {result['median']:>9.3f}"
+        line += f" {peak:>9.1f}"
+        base = None if baseline is None else baseline["scenarios"].get(name)
+        if base is not None:
+            line += f" {result['min'] / base['min']:>7.2f}x"
+        print(line)
+
+
+def main():
+    args = _parse_argument()
+    spec = corpus.CorpusSpec(
+        graphs=args.graphs, nodes=args.nodes, lines=args.lines, seed=args.seed
+    )
+    directory = args.directory
+    if directory is None:
+        directory = Path(tempfile.mkdtemp(prefix="dynpy-bench-"))
+    try:
+        results = run(directory, spec, args.repeat, args.scenario)
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+    baseline = None
+    if args.compare is not None:
+        baseline = reader.read_config(args.compare)
+    _print_results(results, baseline)
+    if args.output is not None:
+        reader.write_config(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import random
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+from dynpy.core import reader
+from dynpy.core.models import PythonEngine
+
+_HEADER = [
+    "# Load the Python Standard and DesignScript Libraries",
+    "import sys",
+    "import clr",
+    "clr.AddReference('ProtoGeometry')",
+    "from Autodesk.DesignScript.Geometry import *",
+    "",
+    "# The inputs to this node will be stored as a list in the IN variables.",
+    "dataEnteringNode = IN",
+    "",
+    "# Place your code below this line",
+]
+_FOOTER = [
+    "",
+    "# Assign your output to the OUT variable.",
+    "OUT = result",
+]
+_STATEMENTS = [
+    "elements = UnwrapElement(IN[{idx}])",
+    "from System import Guid",
+    "clr.ImportExtensions(Revit.Elements)",
+    "TransactionManager.Instance.EnsureInTransaction(doc)",
+    "TransactionManager.Instance.TransactionTaskDone()",
+    "if isinstance(value_{idx}, basestring):",
+    "    value_{idx} = str(value_{idx})",
+    "result = [elem.Name for elem in elements if elem is not None]",
+    "for idx_{idx}, item in enumerate(elements):",
+    "    item.SetParameterByName('Mark', str(idx_{idx}))",
+    "lookup_{idx} = dict(zip(range({idx}), range({idx}, 2 * {idx})))",
+    "# Comment {idx} to explain the following lines",
+    "",
+]
+_OTHER_NODES = [
+    "CodeBlockNodeModel",
+    "FunctionNode",
+    "ExtensionNode",
+    "InputNode",
+]
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Size of a synthetic corpus of Dynamo graphs.
+
+    ``graphs`` files with ``nodes`` Python nodes of ``lines`` code lines
+    each. Every graph also gets ``other_nodes`` per Python node and one
+    line of embedded data per ``data_every`` code lines."""
+
+    graphs: int = 50
+    nodes: int = 10
+    lines: int = 100
+    other_nodes: int = 3
+    data_every: int = 50
+    data_width: int = 2000
+    seed: int = 42
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "graphs": self.graphs,
+            "nodes": self.nodes,
+            "lines": self.lines,
+            "other_nodes": self.other_nodes,
+            "data_every": self.data_every,
+            "data_width": self.data_width,
+            "seed": self.seed,
+        }
+
+
+class CorpusGenerator:
+    def __init__(self, spec: CorpusSpec):
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+
+    def _uuid(self) -> str:
+        return f"{self.random.getrandbits(128):032x}"
+
+    def _data_line(self, idx: int) -> str:
+        values = []
+        width = 0
+        while width < self.spec.data_width:
+            value = f"{self.random.random():.6f}"
+            values.append(value)
+            width += len(value) + 2
+        return f"TABLE_{idx} = [{', '.join(values)}]"
+
+    def code(self) -> str:
+        lines = list(_HEADER)
+        for idx in range(self.spec.lines):
+            if self.spec.data_every > 0 and idx % self.spec.data_every == 0:
+                lines.append(self._data_line(idx))
+                continue
+            statement = self.random.choice(_STATEMENTS)
+            lines.append(statement.format(idx=idx))
+        lines.extend(_FOOTER)
+        return "\n".join(lines)
+
+    def _python_node(self, node_id: str) -> Dict[str, Any]:
+        engine = self.random.choice(list(PythonEngine))
+        return OrderedDict(
+            ConcreteType="PythonNodeModels.PythonNode, PythonNodeModels",
+            Code=self.code(),
+            Engine=engine.value,
+            EngineName=engine.value,
+            VariableInputPorts=True,
+            Id=node_id,
+            NodeType="PythonScriptNode",
+            Inputs=[self._port("IN[0]")],
+            Outputs=[self._port("OUT")],
+            Replication="Disabled",
+            Description="Runs an embedded Python script.",
+        )
+
+    def _port(self, name: str) -> Dict[str, Any]:
+        return OrderedDict(
+            Id=self._uuid(),
+            Name=name,
+            Description=name,
+            UsingDefaultValue=False,
+            Level=2,
+            UseLevels=False,
+            KeepListStructure=False,
+        )
+
+    def _other_node(self, node_id: str) -> Dict[str, Any]:
+        return OrderedDict(
+            ConcreteType="Dynamo.Graph.Nodes.CodeBlockNodeModel, DynamoCore",
+            NodeType=self.random.choice(_OTHER_NODES),
+            Code=f"a = {self.random.randint(0, 1000)};",
+            Id=node_id,
+            Inputs=[],
+            Outputs=[self._port("a")],
+            Replication="Disabled",
+            Description="Allows for DesignScript code to be authored directly",
+        )
+
+    def _node_view(self, node_id: str, name: str) -> Dict[str, Any]:
+        return OrderedDict(
+            Id=node_id,
+            Name=name,
+            IsSetAsInput=False,
+            IsSetAsOutput=False,
+            Excluded=False,
+            ShowGeometry=True,
+            X=self.random.uniform(-5000, 5000),
+            Y=self.random.uniform(-5000, 5000),
+        )
+
+    def _annotation(self, node_ids: List[str]) -> Dict[str, Any]:
+        return OrderedDict(
+            Id=self._uuid(),
+            Title="Group",
+            DescriptionText="Generated group of nodes",
+            Nodes=node_ids,
+            Left=self.random.uniform(-5000, 5000),
+            Top=self.random.uniform(-5000, 5000),
+            Width=self.random.uniform(100, 1000),
+            Height=self.random.uniform(100, 1000),
+            Background="#FFC1D676",
+        )
+
+    def graph(self, idx: int) -> OrderedDict:
+        python_ids = [self._uuid() for _ in range(self.spec.nodes)]
+        other_count = self.spec.nodes * self.spec.other_nodes
+        other_ids = [self._uuid() for _ in range(other_count)]
+        nodes = [self._python_node(node_id) for node_id in python_ids]
+        nodes.extend(self._other_node(node_id) for node_id in other_ids)
+        self.random.shuffle(nodes)
+        node_ids = python_ids + other_ids
+        views = [
+            self._node_view(node_id, f"Node {pos} of graph {idx}")
+            for pos, node_id in enumerate(node_ids)
+        ]
+        connectors = [
+            OrderedDict(Start=self._uuid(), End=self._uuid(), Id=self._uuid())
+            for _ in range(len(node_ids))
+        ]
+        return OrderedDict(
+            Uuid=self._uuid(),
+            IsCustomNode=False,
+            Name=f"graph_{idx}",
+            Nodes=nodes,
+            Connectors=connectors,
+            NodeLibraryDependencies=[],
+            View=OrderedDict(
+                Dynamo=OrderedDict(ScaleFactor=1.0, RunType="Manual"),
+                NodeViews=views,
+                Annotations=[
+                    self._annotation(node_ids[pos : pos + 5])
+                    for pos in range(0, len(node_ids), 5)
+                ],
+                X=0.0,
+                Y=0.0,
+                Zoom=0.5,
+            ),
+        )
+
+    def write(self, directory: Path) -> List[Path]:
+        paths = []
+        for idx in range(self.spec.graphs):
+            sub_dir = directory / f"group_{idx % 5}"
+            sub_dir.mkdir(parents=True, exist_ok=True)
+            path = sub_dir / f"graph_{idx}.dyn"
+            reader.write_json(path, self.graph(idx))
+            paths.append(path)
+        return paths
+
+
+def generate_corpus(directory: Path, spec: CorpusSpec) -> List[Path]:
+    """Write the Dynamo graphs of the corpus, the same spec always
+    writes the same graphs."""
+    return CorpusGenerator(spec).write(directory)
@@ -0,0 +1,255 @@
+import difflib
+import gc
+import logging
+import logging.handlers
+import random
+import shutil
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import CorpusGenerator, CorpusSpec
+from dynpy import logger
+from dynpy.core import factory, summary
+from dynpy.core.extract import ExtractCache
+from dynpy.core.handler import ConvertJob, Direction, create_job
+from dynpy.core.models import ConvertConfig, SourceConfig
+from dynpy.service import batch, python
+from dynpy.service import diff as dif
+from dynpy.service.convert import ConvertService
+from dynpy.ui.convert.models import (
+    AFileViewModel,
+    ExportDirModel,
+    SourceFileModel,
+    connect_models,
+)
+
+
+@dataclass(frozen=True)
+class BenchContext:
+    root: Path
+
+    @property
+    def config(self) -> ConvertConfig:
+        return factory.layout_config(self.root, [("benchmark", "")])
+
+    @property
+    def source(self) -> SourceConfig:
+        return self.config.sources[0]
+
+    def job(self, direction: Direction) -> ConvertJob:
+        config = self.config
+        return create_job(config, config.sources[0], direction)
+
+
+Setup = Callable[[BenchContext], Any]
+Run = Callable[[BenchContext, Any], Any]
+Teardown = Callable[[BenchContext, Any], None]
+
+
+def _no_setup(context: BenchContext) -> None:
+    return None
+
+
+def _no_teardown(context: BenchContext, state: Any) -> None:
+    pass
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    run: Run
+    setup: Setup = _no_setup
+    teardown: Teardown = _no_teardown
+
+
+def _remove_export(context: BenchContext) -> None:
+    shutil.rmtree(context.source.export_path, ignore_errors=True)
+
+
+def _export(context: BenchContext, _: Any) -> None:
+    batch.run([context.job(Direction.TO_PYTHON)])
+
+
+def _ensure_export(context: BenchContext) -> None:
+    if not context.source.export_path.exists():
+        _export(context, None)
+
+
+def _debug_logging(context: BenchContext) -> logging.handlers.QueueListener:
+    _remove_export(context)
+    handler = logger.log_file(logging.DEBUG, context.root / "debug.log")
+    return logger.start_queue_logging(logging.DEBUG, [handler])
+
+
+def _stop_logging(
+    context: BenchContext, listener: logging.handlers.QueueListener
+) -> None:
+    logger.stop_queue_logging(listener)
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _import(context: BenchContext, _: Any) -> None:
+    batch.run([context.job(Direction.TO_DYNAMO)])
+
+
+def source_models(context: BenchContext) -> List[AFileViewModel]:
+    source = context.source
+    models = []
+    for path in source.source_files():
+        model = SourceFileModel(path, source.source_path)
+        model.update_code(func=factory.dynamo_to_python_code)
+        models.append(model)
+    return sorted(models)
+
+
+def export_models(context: BenchContext) -> List[AFileViewModel]:
+    job = context.job(Direction.UNKNOWN)
+    groups = python.python_file_group(job)
+    models = [
+        ExportDirModel(path, job.source.export_path, children)
+        for path, children in groups.items()
+    ]
+    return sorted(models)
+
+
+def _ui_models(context: BenchContext, _: Any) -> None:
+    connect_models(source_models(context), export_models(context))
+
+
+def _read_extracts(context: BenchContext) -> Optional[ExtractCache]:
+    """Make every graph read its extract, written here if missing."""
+    _ensure_export(context)
+    cache = summary.graph_cache()
+    extracts = cache.extracts
+    cache.extracts = ExtractCache(context.root / "extracts")
+    source_models(context)
+    cache.clear()
+    return extracts
+
+
+def _restore_extracts(
+    context: BenchContext, extracts: Optional[ExtractCache]
+) -> None:
+    cache = summary.graph_cache()
+    cache.extracts = extracts
+    cache.clear()
+
+
+def _node_pairs(context: BenchContext) -> List[Tuple[Any, Any]]:
+    _ensure_export(context)
+    sources = source_models(context)
+    connect_models(sources, export_models(context))
+    return [
+        (child.file_and_code, child.other_node.file_and_code)
+        for source in sources
+        for child in source.children
+        if child.other_node is not None
+    ]
+
+
+def _diff(context: BenchContext, pairs: List[Tuple[Any, Any]]) -> None:
+    service = ConvertService()
+    for source, other in pairs:
+        list(service.code_diff(source=source, other=other))
+
+
+# Python nodes with embedded lookup tables and a few edits each
+LARGE_NODE = CorpusSpec(lines=20_000, data_every=2, data_width=80, seed=7)
+LARGE_NODE_EDITS = 200
+
+CodePair = Tuple[List[str], List[str]]
+
+
+def _large_pairs(context: BenchContext) -> List[CodePair]:
+    generator = CorpusGenerator(LARGE_NODE)
+    edits = random.Random(LARGE_NODE.seed)
+    pairs = []
+    for _ in range(3):
+        other = generator.code().splitlines(keepends=True)
+        source = list(other)
+        for number in range(LARGE_NODE_EDITS):
+            pos = edits.randrange(len(source))
+            if number % 4 == 0:
+                del source[pos]
+            else:
+                source[pos] = f"edited_{number} = {pos}\n"
+        pairs.append((source, other))
+    return pairs
+
+
+def _diff_large(context: BenchContext, pairs: List[CodePair]) -> None:
+    for source, other in pairs:
+        list(dif.unified_diff(other, source, "other", "source"))
+
+
+def _diff_large_difflib(context: BenchContext, pairs: List[CodePair]) -> None:
+    for source, other in pairs:
+        list(difflib.unified_diff(other, source, "other", "source"))
+
+
+SCENARIOS = [
+    Scenario("export", _export, setup=_remove_export),
+    Scenario("export_noop", _export, setup=_ensure_export),
+    Scenario(
+        "export_debug_log",
+        _export,
+        setup=_debug_logging,
+        teardown=_stop_logging,
+    ),
+    Scenario("ui_models", _ui_models, setup=_ensure_export),
+    Scenario(
+        "ui_models_extracts",
+        _ui_models,
+        setup=_read_extracts,
+        teardown=_restore_extracts,
+    ),
+    Scenario("diff", _diff, setup=_node_pairs),
+    Scenario("diff_large", _diff_large, setup=_large_pairs),
+    Scenario("diff_large_difflib", _diff_large_difflib, setup=_large_pairs),
+    # Import rewrites the graphs, so it runs after the export scenarios
+    Scenario("import", _import, setup=_ensure_export),
+]
+
+
+def _timed(scenario: Scenario, context: BenchContext) -> float:
+    summary.graph_cache().clear()
+    state = scenario.setup(context)
+    gc.collect()
+    start = time.perf_counter()
+    scenario.run(context, state)
+    seconds = time.perf_counter() - start
+    scenario.teardown(context, state)
+    return seconds
+
+
+def _peak_memory(scenario: Scenario, context: BenchContext) -> int:
+    summary.graph_cache().clear()
+    state = scenario.setup(context)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        scenario.run(context, state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        scenario.teardown(context, state)
+    return peak
+
+
+def measure(
+    scenario: Scenario, context: BenchContext, repeat: int
+) -> Dict[str, Any]:
+    """Time the scenario ``repeat`` times and capture its peak memory in
+    an extra run, tracing allocations would distort the timings. Every
+    run starts without graphs in memory."""
+    times = [_timed(scenario, context) for _ in range(repeat)]
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "peak_bytes": _peak_memory(scenario, context),
+    }
@@ -1,23 +1,48 @@
 import argparse
+import logging
+import sys
+from contextlib import ExitStack
 from pathlib import Path
+from typing import TYPE_CHECKING, List
 
 from dynpy.core import handler as cvt
-from dynpy.core.handler import Direction
-from dynpy.service import dynamo, python
+from dynpy.core import lock
+from dynpy.core.rules import RuleProfile
+
+if TYPE_CHECKING:
+    from dynpy.service import batch, report as rpt
+
+log = logging.getLogger(__name__)
+
+# The conversion modules are imported by the commands that use them, so
+# --help and a bad argument return without loading them
+
+
+def _shard(value: str) -> "batch.Shard":
+    from dynpy.service import batch
+
+    try:
+        return batch.Shard.parse(value)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(str(ex))
 
 
 def _parse_argument() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--config",
-        required=True,
+        required=False,
         type=Path,
         help="ath to the configuration file",
     )
     parser.add_argument(
         "--source",
-        required=True,
-        help="Source name in the configuration file",
+        required=False,
+        nargs="+",
+        help=(
+            "Source names in the configuration file "
+            f"or '{cvt.ALL_SOURCES}' for every source"
+        ),
     )
     parser.add_argument(
         "--do-import",
@@ -33,27 +58,152 @@ def _parse_argument() -> argparse.Namespace:
         default=False,
         help="Create Python code from the Dynamo files",
     )
+    parser.add_argument(
+        "--workers",
+        required=False,
+        type=int,
+        default=None,
+        help="Number of files converted at the same time",
+    )
+    parser.add_argument(
+        "--lock-timeout",
+        required=False,
+        type=float,
+        default=lock.DEFAULT_TIMEOUT,
+        help="Seconds to wait for a file locked by another process",
+    )
+    parser.add_argument(
+        "--shard",
+        required=False,
+        type=_shard,
+        default=None,
+        help="Convert only shard i of N shards, e.g. 2/4",
+    )
+    parser.add_argument(
+        "--report",
+        required=False,
+        type=Path,
+        default=None,
+        help="Write the run report as JSON to the given path",
+    )
+    parser.add_argument(
+        "--merge-reports",
+        required=False,
+        nargs="+",
+        type=Path,
+        default=None,
+        help="Combine the reports of several shards into one report",
+    )
+    parser.add_argument(
+        "--events",
+        required=False,
+        choices=["ndjson"],
+        default=None,
+        help="Stream the conversion events in the given format",
+    )
+    parser.add_argument(
+        "--events-fd",
+        required=False,
+        type=int,
+        default=1,
+        help="File descriptor of the event stream, stdout by default",
+    )
+    parser.add_argument(
+        "--profile",
+        required=False,
+        type=Path,
+        default=None,
+        help=(
+            "Profile every phase of a single worker run "
+            "and write the results to the given directory"
+        ),
+    )
+    parser.add_argument(
+        "--profile-rules",
+        required=False,
+        action="store_true",
+        default=False,
+        help="Count the lines, hits and time of every action rule",
+    )
+    parser.add_argument(
+        "--incremental",
+        required=False,
+        action="store_true",
+        default=False,
+        help=(
+            "Export only the nodes whose code, python file or matching "
+            "rules changed since the last incremental export"
+        ),
+    )
     parser.add_argument(
         "--create-config",
         required=False,
         type=Path,
         help="Create a new configuration file in given path",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.create_config is None and args.merge_reports is None:
+        if args.config is None or args.source is None:
+            parser.error("--config and --source are required to convert")
+    return args
+
+
+def _finish(report: "rpt.RunReport", report_path: Path | None) -> None:
+    for line in report.summary():
+        log.info(line)
+    if report_path is not None:
+        report.save(report_path)
+    if report.has_failed:
+        sys.exit(1)
+
+
+def _run(
+    args: argparse.Namespace, jobs: List[cvt.ConvertJob]
+) -> "rpt.RunReport":
+    from dynpy.service import batch, events as evt
+
+    events = evt.NO_EVENTS
+    if args.events is not None:
+        events = evt.ndjson_events(args.events_fd)
+    workers = args.workers
+    with ExitStack() as stack:
+        if args.profile is not None:
+            # cProfile and tracemalloc are only loaded for a profiled run
+            from dynpy.service.profile import ProfileEvents
+
+            profiler = ProfileEvents(args.profile)
+            events = evt.EventGroup([events, stack.enter_context(profiler)])
+            workers = 1
+        return batch.run(
+            jobs,
+            workers=workers,
+            shard=args.shard,
+            events=events,
+            incremental=args.incremental,
+        )
 
 
 def main():
     args = _parse_argument()
     if args.create_config is not None:
         return cvt.create_config(args.create_config)
-    handler = cvt.create_handler(
-        args.config, args.source, args.do_import, args.do_export
+    if args.merge_reports is not None:
+        from dynpy.service import report as rpt
+
+        report = rpt.merge_reports(args.merge_reports)
+        if report is None:
+            return
+        return _finish(report, args.report)
+    lock.set_timeout(args.lock_timeout)
+    rule_profile = RuleProfile() if args.profile_rules else None
+    jobs = cvt.create_jobs(
+        args.config, args.source, args.do_import, args.do_export, rule_profile
     )
-    if handler.direction == Direction.TO_PYTHON:
-        dynamo.to_python(handler)
-    else:
-        python.to_dynamo(handler)
+    _finish(_run(args, jobs), args.report)
 
 
 if __name__ == "__main__":
+    from dynpy import logger
+
+    logger.config_logger(logging.INFO)
     main()
@@ -1,13 +1,85 @@
 import logging
 import re
+import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pathlib import PurePath
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dynpy.core.regex_guard import budget_match
+from dynpy.core.rules import RULE_CONTAINS, RULE_REGEX
 
 log = logging.getLogger(__name__)
 
+RuleRecorder = Callable[[str, str, bool, float], None]
+# Called with the kind and pattern of the rule that matched a line
+HitRecorder = Callable[[str, str], None]
+
+
+class BudgetMode(str, Enum):
+    SKIP = "skip"
+    FAIL = "fail"
+
+
+class RegexBudgetError(Exception):
+    pass
+
+
+def _contains(
+    line: str, values: Iterable[str], record: RuleRecorder
+) -> bool:
+    for value in values:
+        start = time.perf_counter()
+        hit = value in line
+        record(RULE_CONTAINS, value, hit, time.perf_counter() - start)
+        if hit:
+            return True
+    return False
+
 
 class AConvertAction(ABC):
+    def __init__(
+        self,
+        engines: Optional[List[str]] = None,
+        paths: Optional[List[str]] = None,
+    ) -> None:
+        # Empty filters match every node
+        self.engines = list(engines or [])
+        self.paths = list(paths or [])
+
+    @property
+    def is_scoped(self) -> bool:
+        return len(self.engines) > 0 or len(self.paths) > 0
+
+    def applies_to(
+        self, engine: Optional[str], path: Optional[PurePath]
+    ) -> bool:
+        if len(self.engines) > 0 and engine not in self.engines:
+            return False
+        if len(self.paths) == 0:
+            return True
+        if path is None:
+            return False
+        return any(path.match(pattern) for pattern in self.paths)
+
+    def rules(self) -> List[Tuple[str, str]]:
+        return [(RULE_CONTAINS, value) for value in self.contains]
+
+    def settings(self) -> Dict[str, Any]:
+        """Return the configuration of the action without its rules."""
+        content = self.to_dict()
+        content.pop(RULE_CONTAINS, None)
+        content.pop(RULE_REGEX, None)
+        return content
+
+    def _scope_dict(self) -> Dict[str, Any]:
+        content: Dict[str, Any] = {}
+        if len(self.engines) > 0:
+            content["engines"] = self.engines
+        if len(self.paths) > 0:
+            content["paths"] = self.paths
+        return content
+
     @abstractmethod
     def apply_to(self, line: str) -> Optional[str]:
         pass
@@ -16,6 +88,27 @@ class AConvertAction(ABC):
         applied = [self.apply_to(line) for line in lines]
         return [line for line in applied if line is not None]
 
+    def profiled_apply_to(
+        self, line: str, record: RuleRecorder
+    ) -> Optional[str]:
+        return self.apply_to(line)
+
+    def apply_profiled(
+        self, lines: Iterable[str], record: RuleRecorder
+    ) -> List[str]:
+        applied = [self.profiled_apply_to(line, record) for line in lines]
+        return [line for line in applied if line is not None]
+
+    def traced_apply_to(self, line: str, hit: HitRecorder) -> Optional[str]:
+        return self.apply_to(line)
+
+    def apply_traced(
+        self, lines: Iterable[str], hit: HitRecorder
+    ) -> List[str]:
+        """Apply the action, passing the rule matching a line to ``hit``."""
+        applied = [self.traced_apply_to(line, hit) for line in lines]
+        return [line for line in applied if line is not None]
+
     @abstractmethod
     def restore_in(self, line: str) -> str:
         pass
@@ -23,13 +116,22 @@ class AConvertAction(ABC):
     def restore(self, lines: Iterable[str]) -> List[str]:
         return [self.restore_in(line) for line in lines]
 
+    def compile(self) -> None:
+        pass
+
     @abstractmethod
     def to_dict(self) -> Dict[str, Any]:
         pass
 
 
 class RemoveConvertAction(AConvertAction):
-    def __init__(self, contains: List[str]) -> None:
+    def __init__(
+        self,
+        contains: List[str],
+        engines: Optional[List[str]] = None,
+        paths: Optional[List[str]] = None,
+    ) -> None:
+        super().__init__(engines=engines, paths=paths)
         self.contains = contains
 
     def apply_to(self, line: str) -> Optional[str]:
@@ -37,24 +139,49 @@ class RemoveConvertAction(AConvertAction):
             return None
         return line
 
+    def profiled_apply_to(
+        self, line: str, record: RuleRecorder
+    ) -> Optional[str]:
+        if _contains(line, self.contains, record):
+            return None
+        return line
+
+    def traced_apply_to(self, line: str, hit: HitRecorder) -> Optional[str]:
+        for value in self.contains:
+            if value in line:
+                hit(RULE_CONTAINS, value)
+                return None
+        return line
+
     def restore_in(self, line: str) -> str:
         return line
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "contains": self.contains,
+            **self._scope_dict(),
         }
 
 
 class ReplaceConvertAction(AConvertAction):
     def __init__(
-        self, value: str, contains: List[str], regex: List[str]
+        self,
+        value: str,
+        contains: List[str],
+        regex: List[str],
+        line_budget: Optional[float] = None,
+        on_budget: str = BudgetMode.SKIP,
+        engines: Optional[List[str]] = None,
+        paths: Optional[List[str]] = None,
     ) -> None:
-        super().__init__()
+        super().__init__(engines=engines, paths=paths)
         self.value = value
         self._value_wo_spaces = self._wo_spaces(value)
         self.contains = contains
         self.regex = regex
+        # Seconds a regex may take per line, None for no limit
+        self.line_budget = line_budget
+        self.on_budget = BudgetMode(on_budget)
         self._pattern = []
 
     def _wo_spaces(self, value: str) -> str:
@@ -65,6 +192,9 @@ class ReplaceConvertAction(AConvertAction):
             self._pattern = [re.compile(reg) for reg in self.regex]
         return self._pattern
 
+    def compile(self) -> None:
+        self._get_pattern()
+
     def _contains_value(self, line: str) -> bool:
         wo_spaces = self._wo_spaces(line)
         return self._value_wo_spaces in wo_spaces
@@ -79,13 +209,52 @@ class ReplaceConvertAction(AConvertAction):
             return False, line
         return True, self._append_value(line)
 
-    def _any_match(self, line: str) -> bool:
+    def _budget_exceeded(
+        self, pattern: re.Pattern, line: str, seconds: float
+    ) -> None:
+        log.warning(
+            "Regex '%s' took over %.3f s for a line of %d characters",
+            pattern.pattern,
+            seconds,
+            len(line),
+        )
+        if self.on_budget == BudgetMode.FAIL:
+            raise RegexBudgetError(
+                f"Regex '{pattern.pattern}' exceeded the line budget "
+                f"of {self.line_budget} s"
+            )
+
+    def _timed_match(
+        self, pattern: re.Pattern, line: str
+    ) -> Tuple[bool, float]:
+        """Match the line, within the line budget if one is set.
+
+        A match over the budget is stopped and counts as no match, or
+        fails with RegexBudgetError if ``on_budget`` is fail."""
+        start = time.perf_counter()
+        if self.line_budget is None:
+            hit = pattern.match(line) is not None
+        else:
+            hit = budget_match(pattern, line, self.line_budget)
+        seconds = time.perf_counter() - start
+        if hit is None:
+            self._budget_exceeded(pattern, line, seconds)
+            return False, seconds
+        return hit, seconds
+
+    def _matching_pattern(self, line: str) -> Optional[re.Pattern]:
         for pattern in self._get_pattern():
-            if pattern.match(line) is None:
-                continue
-            log.debug(f"Pattern: {pattern.pattern} matches {line}")
-            return True
-        return False
+            if self.line_budget is None:
+                hit = pattern.match(line) is not None
+            else:
+                hit, _ = self._timed_match(pattern, line)
+            if hit:
+                log.debug("Pattern: %s matches %s", pattern.pattern, line)
+                return pattern
+        return None
+
+    def _any_match(self, line: str) -> bool:
+        return self._matching_pattern(line) is not None
 
     def apply_regex(self, line: str) -> Tuple[bool, str]:
         if not self._any_match(line):
@@ -99,17 +268,53 @@ class ReplaceConvertAction(AConvertAction):
         _, line = self.apply_regex(line)
         return line
 
+    def _profiled_match(self, line: str, record: RuleRecorder) -> bool:
+        for pattern in self._get_pattern():
+            hit, seconds = self._timed_match(pattern, line)
+            record(RULE_REGEX, pattern.pattern, hit, seconds)
+            if hit:
+                return True
+        return False
+
+    def profiled_apply_to(
+        self, line: str, record: RuleRecorder
+    ) -> Optional[str]:
+        if _contains(line, self.contains, record):
+            return self._append_value(line)
+        if self._profiled_match(line, record):
+            return self._append_value(line)
+        return line
+
+    def traced_apply_to(self, line: str, hit: HitRecorder) -> Optional[str]:
+        for value in self.contains:
+            if value in line:
+                hit(RULE_CONTAINS, value)
+                return self._append_value(line)
+        pattern = self._matching_pattern(line)
+        if pattern is None:
+            return line
+        hit(RULE_REGEX, pattern.pattern)
+        return self._append_value(line)
+
+    def rules(self) -> List[Tuple[str, str]]:
+        return super().rules() + [(RULE_REGEX, reg) for reg in self.regex]
+
     def restore_in(self, line: str) -> str:
         if self.value not in line:
             return line
         return line.replace(self.value, "").rstrip()
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        content: Dict[str, Any] = {
             "value": self.value,
             "contains": self.contains,
             "regex": self.regex,
         }
+        if self.line_budget is not None:
+            content["line_budget"] = self.line_budget
+            content["on_budget"] = self.on_budget.value
+        content.update(self._scope_dict())
+        return content
 
 
 class ActionType(str, Enum):
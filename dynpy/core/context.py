@@ -1,7 +1,16 @@
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Any, List, Mapping, MutableMapping, OrderedDict
-
-from dynpy.core import reader
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    OrderedDict,
+)
+
+from dynpy.core import lock, reader
 from dynpy.core.models import PythonEngine
 
 KEY_ID = "Id"
@@ -60,6 +69,8 @@ class DynamoFileContext:
         self.path = path
         self.save = save
         self.content: OrderedDict = OrderedDict()
+        self._lock = ExitStack()
+        self._node_index: Optional[Dict[str, int]] = None
 
     @property
     def nodes(self) -> List[MutableMapping[str, Any]]:
@@ -107,24 +118,36 @@ class DynamoFileContext:
     def connectors(self) -> List[Mapping[str, Any]]:
         return self.content.get(KEY_CONNECTORS, [])
 
-    def index_of(self, node_id: str) -> int:
+    def _create_node_index(self) -> Dict[str, int]:
+        index: Dict[str, int] = {}
         for idx, node in enumerate(self.nodes):
-            if node_uuid(node) != node_id:
-                continue
-            return idx
-        raise ValueError(f"Node with id {node_id} not found")
+            index.setdefault(node_uuid(node), idx)
+        return index
+
+    def index_of(self, node_id: str) -> int:
+        if self._node_index is None:
+            self._node_index = self._create_node_index()
+        if node_id not in self._node_index:
+            raise ValueError(f"Node with id {node_id} not found")
+        return self._node_index[node_id]
 
     def replace_code(self, node_id: str, code: str) -> None:
         idx = self.index_of(node_id)
         self.nodes[idx][KEY_CODE] = code
 
     def __enter__(self) -> "DynamoFileContext":
-        self.content = reader.read_json(self.path)
+        with ExitStack() as stack:
+            stack.enter_context(lock.file_lock(self.path, exclusive=self.save))
+            self.content = reader.read_json(self.path)
+            self._node_index = None
+            self._lock = stack.pop_all()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
-        if any(exc is not None for exc in (exc_type, exc_value, traceback)):
-            raise exc_value
-        if not self.save:
-            return
-        reader.write_json(self.path, self.content)
+        exceptions = (exc_type, exc_value, traceback)
+        with self._lock:
+            if any(exc is not None for exc in exceptions):
+                raise exc_value
+            if not self.save:
+                return
+            reader.write_json(self.path, self.content)
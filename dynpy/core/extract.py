@@ -0,0 +1,203 @@
+"""On-disk cache of the extracts of Dynamo graphs.
+
+Every graph gets one file named by the hash of its path. The file holds
+a header and a marshal payload of the extract together with the key it
+was written for, a graph that changed since is read from JSON again.
+Files of another version, a broken header or a wrong checksum count as
+missing and are removed."""
+
+import hashlib
+import logging
+import marshal
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from dynpy import resources as res
+
+log = logging.getLogger(__name__)
+
+EXTRACT_VERSION = 1
+EXTRACT_CACHE_BYTES = 256 * 1024 * 1024
+# A directory for the extracts, an empty value disables the cache
+EXTRACT_CACHE_ENV = "DYNPY_GRAPH_CACHE"
+EXTRACT_SUFFIX = ".extract"
+
+# Temporary files of writers that died are removed after this time
+_STALE_SECONDS = 3600
+# Only files of these names are touched by the cleanup, the directory
+# may be shared with other files
+_EXTRACT_NAME = re.compile(r"[0-9a-f]{40}\.extract")
+_TEMP_NAME = re.compile(r"[0-9a-f]{40}\.extract\.\d+\.\d+\.tmp")
+
+_MAGIC = b"DPYX"
+# magic, version, payload length, crc32 of the payload
+_HEADER = struct.Struct("<4sHIL")
+# marshal format of the payload, readable by every supported Python
+_MARSHAL_VERSION = 4
+
+# absolute path, mtime_ns, size
+ExtractKey = Tuple[str, int, int]
+
+
+def _file_name(key: ExtractKey) -> str:
+    digest = hashlib.sha1(key[0].encode("utf8")).hexdigest()
+    return f"{digest}{EXTRACT_SUFFIX}"
+
+
+def encode(key: ExtractKey, extract: Any) -> bytes:
+    payload = marshal.dumps((key, extract), _MARSHAL_VERSION)
+    header = _HEADER.pack(
+        _MAGIC, EXTRACT_VERSION, len(payload), zlib.crc32(payload)
+    )
+    return header + payload
+
+
+def decode(content: bytes) -> Tuple[ExtractKey, Any]:
+    """Return key and extract, raise ValueError for invalid content."""
+    if len(content) < _HEADER.size:
+        raise ValueError("Extract is truncated")
+    magic, version, length, checksum = _HEADER.unpack_from(content)
+    if magic != _MAGIC or version != EXTRACT_VERSION:
+        raise ValueError(f"Unknown extract format {magic!r} {version}")
+    payload = content[_HEADER.size :]
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        raise ValueError("Extract is corrupted")
+    key, extract = marshal.loads(payload)
+    return tuple(key), extract
+
+
+class ExtractCache:
+    """Extracts of graphs in a directory of at most ``max_bytes``.
+
+    Reading refreshes the mtime of a file, the cleanup removes the files
+    used longest ago. It runs on the first write of the process, which
+    also trims a directory left too large by a former process, and again
+    once the writes since the last cleanup could exceed the limit."""
+
+    def __init__(
+        self, directory: Path, max_bytes: int = EXTRACT_CACHE_BYTES
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._written = 0
+        self._cleaned = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_environment(cls) -> Optional["ExtractCache"]:
+        directory = os.environ.get(EXTRACT_CACHE_ENV)
+        if directory == "":
+            return None
+        if directory is not None:
+            return cls(Path(directory))
+        try:
+            return cls(res.app_data_path(res.DynPyResource.GRAPH_EXTRACTS))
+        except OSError as ex:
+            log.warning("Graph extracts are not cached: %s", ex)
+            return None
+
+    def path_of(self, key: ExtractKey) -> Path:
+        return self.directory / _file_name(key)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _remove(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def read(self, key: ExtractKey) -> Optional[Any]:
+        path = self.path_of(key)
+        try:
+            content = path.read_bytes()
+        except OSError:
+            self._count(False)
+            return None
+        try:
+            stored, extract = decode(content)
+        except (ValueError, EOFError, TypeError) as ex:
+            log.debug("Removing invalid extract %s: %s", path, ex)
+            self._remove(path)
+            self._count(False)
+            return None
+        if stored != key:
+            self._count(False)
+            return None
+        self._count(True)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return extract
+
+    def write(self, key: ExtractKey, extract: Any) -> None:
+        path = self.path_of(key)
+        content = encode(key, extract)
+        temp_path = path.with_name(
+            f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp_path.write_bytes(content)
+            os.replace(temp_path, path)
+        except OSError as ex:
+            log.debug("Failed to write extract %s: %s", path, ex)
+            self._remove(temp_path)
+            return
+        with self._lock:
+            self._written += len(content)
+            cleanup = (
+                not self._cleaned or self._written > self.max_bytes // 10
+            )
+            if cleanup:
+                self._cleaned = True
+                self._written = 0
+        if cleanup:
+            self.cleanup()
+
+    def _files(self) -> List[Tuple[float, int, Path]]:
+        files = []
+        for path in self.directory.iterdir():
+            if not (
+                _EXTRACT_NAME.fullmatch(path.name)
+                or _TEMP_NAME.fullmatch(path.name)
+            ):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def cleanup(self) -> None:
+        """Remove the least recently used extracts above ``max_bytes``
+        and the stale temporary files of the cache."""
+        try:
+            files = sorted(self._files(), reverse=True)
+        except OSError:
+            return
+        stale = time.time() - _STALE_SECONDS
+        total = 0
+        for mtime, size, path in files:
+            if _TEMP_NAME.fullmatch(path.name):
+                if mtime < stale:
+                    self._remove(path)
+                continue
+            total += size
+            if total > self.max_bytes:
+                self._remove(path)
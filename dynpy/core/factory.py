@@ -1,10 +1,22 @@
 import logging
+import re
 from functools import cache
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Type
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 
 from dynpy.core import context as ctx
-from dynpy.core import reader
+from dynpy.core import lock, reader
 from dynpy.core.actions import (
     ActionType,
     AConvertAction,
@@ -21,6 +33,7 @@ from dynpy.core.models import (
     PythonFile,
     SourceConfig,
 )
+from dynpy.core.regex_guard import regex_risks
 
 log = logging.getLogger(__name__)
 
@@ -61,12 +74,57 @@ def _create_actions(
     return actions
 
 
+def check_regex(
+    actions: Mapping[ActionType, List[AConvertAction]],
+) -> None:
+    """Reject the configuration if a regex is invalid, warn if risky."""
+    for action in actions.get(ActionType.REPLACE, []):
+        if not isinstance(action, ReplaceConvertAction):
+            continue
+        for regex in action.regex:
+            try:
+                re.compile(regex)
+            except re.error as ex:
+                raise ValueError(f"Invalid regex '{regex}' in config: {ex}")
+            risks = regex_risks(regex)
+            if len(risks) > 0:
+                log.warning("Risky regex '%s': %s", regex, "; ".join(risks))
+
+
+def check_engines(
+    actions: Mapping[ActionType, List[AConvertAction]],
+) -> None:
+    """Reject the configuration if a scope names an unknown engine."""
+    known = {engine.value for engine in PythonEngine}
+    unknown = {
+        engine
+        for type_actions in actions.values()
+        for action in type_actions
+        for engine in action.engines
+        if engine not in known
+    }
+    if len(unknown) > 0:
+        raise ValueError(
+            f"Unknown engines in config: {', '.join(sorted(unknown))}, "
+            f"expected one of {', '.join(sorted(known))}"
+        )
+
+
+def check_actions(
+    actions: Mapping[ActionType, List[AConvertAction]],
+) -> None:
+    check_regex(actions)
+    check_engines(actions)
+
+
 def convert_config(path: Path) -> ConvertConfig:
     content = reader.read_json(path.resolve())
+    actions = _create_actions(content["actions"])
+    check_actions(actions)
     return ConvertConfig(
         file_path=path,
         sources=_create_sources(content["configs"]),
-        actions=_create_actions(content["actions"]),
+        actions=actions,
     )
 
 
@@ -125,6 +183,31 @@ def default_convert_config() -> ConvertConfig:
     return config
 
 
+def layout_config(
+    root: Path,
+    sources: Sequence[Tuple[str, str]] = (("graphs", ""),),
+    actions: Optional[Dict[ActionType, List[AConvertAction]]] = None,
+) -> ConvertConfig:
+    """Config of named sources, the default actions if none are given.
+
+    A source converts the graphs in ``root/dyn/<sub path>`` to python
+    files in ``root/py/<sub path>``."""
+    if actions is None:
+        actions = default_convert_config().actions
+    return ConvertConfig(
+        file_path=None,
+        sources=[
+            SourceConfig(
+                name=name,
+                source=str(root / "dyn" / sub_path),
+                export=str(root / "py" / sub_path),
+            )
+            for name, sub_path in sources
+        ],
+        actions=actions,
+    )
+
+
 def code_node(node: Mapping[str, Any]) -> CodeNode:
     return CodeNode(
         node_id=ctx.node_uuid(node),
@@ -237,6 +320,7 @@ def dynamo_to_python_code(code: str) -> List[str]:
 
 
 ActionFunc = Callable[[List[str]], List[str]]
+InfoActionFunc = Callable[[Optional[NodeInfo]], ActionFunc]
 
 
 def code_to_python(node: ContentNode, action_func: ActionFunc) -> List[str]:
@@ -248,15 +332,17 @@ def code_to_python(node: ContentNode, action_func: ActionFunc) -> List[str]:
 
 
 def clean_beginning_empty_lines(lines: List[str]) -> List[str]:
-    while len(lines[0].strip()) == 0:
-        lines.pop(0)
-    return lines
+    start = 0
+    while start < len(lines) and len(lines[start].strip()) == 0:
+        start += 1
+    return lines[start:]
 
 
 def clean_ending_empty_lines(lines: List[str]) -> List[str]:
-    while len(lines[-1].strip()) == 0:
-        lines.pop()
-    return lines
+    end = len(lines)
+    while end > 0 and len(lines[end - 1].strip()) == 0:
+        end -= 1
+    return lines[:end]
 
 
 def clean_empty_lines(lines: List[str]) -> List[str]:
@@ -271,8 +357,9 @@ def python_to_dynamo_code(
     return code_lines
 
 
-def python_file(path: Path, action_func: ActionFunc) -> PythonFile:
-    code_lines = reader.read_python(path)
+def python_file(path: Path, action_for: InfoActionFunc) -> PythonFile:
+    with lock.file_lock(path, exclusive=False):
+        code_lines = reader.read_python(path)
     code_lines = clean_beginning_empty_lines(code_lines)
     if len(code_lines) < 2:
         message = f"Python file {path} has no info line or code"
@@ -280,5 +367,5 @@ def python_file(path: Path, action_func: ActionFunc) -> PythonFile:
     info = node_info(code_lines[0])
     if info is not None:
         code_lines = code_lines[1:]
-    code_lines = python_to_dynamo_code(code_lines, action_func)
+    code_lines = python_to_dynamo_code(code_lines, action_for(info))
     return PythonFile(path=path, info=info, code_lines=code_lines)
@@ -1,11 +1,37 @@
-from dataclasses import dataclass
+import copy
+import json
+from dataclasses import dataclass, field
 from enum import Enum
-from pathlib import Path
-from typing import Callable, List, Optional
+from functools import partial
+from pathlib import Path, PurePath
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from dynpy.core import factory
-from dynpy.core.actions import ActionType
-from dynpy.core.models import ConvertConfig, SourceConfig
+from dynpy.core.actions import (
+    AConvertAction,
+    ActionType,
+    HitRecorder,
+    RuleRecorder,
+)
+from dynpy.core.models import (
+    ConvertConfig,
+    NodeInfo,
+    PythonEngine,
+    SourceConfig,
+)
+from dynpy.core.rules import RuleCounts, RuleProfile
+
+
+ALL_SOURCES = "all"
 
 
 class Direction(str, Enum):
@@ -26,34 +52,233 @@ class ConvertHandler:
             raise ValueError("No source name provided")
         return self.convert.source_by(self.source_name)
 
-    def _apply_func(
-        self, action_type: ActionType, lines: List[str]
+    def job(self) -> "ConvertJob":
+        return create_job(self.convert, self.source, self.direction)
+
+
+CompiledActions = Tuple[AConvertAction, ...]
+ScopedActions = Tuple[Tuple[ActionType, CompiledActions], ...]
+
+
+def _action_id(action_type: ActionType, action: AConvertAction) -> List[Any]:
+    return [action_type.value, action.settings()]
+
+
+def rule_id(action_id: List[Any], kind: str, pattern: str) -> str:
+    """Identify a rule by its pattern and the settings of its action.
+
+    A changed value or scope of an action changes the ids of all its
+    rules, the position of the action in the configuration does not."""
+    return json.dumps([*action_id, kind, pattern], sort_keys=True)
+
+
+# kind and pattern of a rule -> its id
+RuleIds = Mapping[Tuple[str, str], str]
+
+
+@dataclass(frozen=True)
+class ActionRules:
+    """Profile label and rule ids of an action, computed once per job."""
+
+    label: str
+    ids: RuleIds
+
+
+def _tracing(
+    record: RuleRecorder, ids: RuleIds, hits: Set[str]
+) -> RuleRecorder:
+    def trace(kind: str, pattern: str, hit: bool, seconds: float) -> None:
+        record(kind, pattern, hit, seconds)
+        if hit:
+            hits.add(ids[(kind, pattern)])
+
+    return trace
+
+
+def _hit_recorder(ids: RuleIds, hits: Set[str]) -> HitRecorder:
+    def hit(kind: str, pattern: str) -> None:
+        hits.add(ids[(kind, pattern)])
+
+    return hit
+
+
+@dataclass(frozen=True)
+class ConvertJob:
+    """Immutable snapshot of everything a single conversion needs.
+
+    The configuration and actions are copied, so later changes of the
+    configuration do not affect a running conversion and several jobs
+    can be converted on different threads at the same time."""
+
+    config: ConvertConfig
+    source: SourceConfig
+    direction: Direction
+    actions: ScopedActions
+    rule_profile: Optional[RuleProfile] = None
+    # id of an action -> its profile label and rule ids
+    rules: Mapping[int, ActionRules] = field(default_factory=dict)
+
+    def _apply_actions(
+        self, actions: ScopedActions, lines: List[str]
     ) -> List[str]:
-        for action in self.convert.actions_by(action_type):
-            lines = action.apply(lines)
+        for _, type_actions in actions:
+            for action in type_actions:
+                lines = action.apply(lines)
         return lines
 
-    def restore_func(
-        self, action_type: ActionType, lines: List[str]
+    def _apply_profiled(
+        self,
+        actions: ScopedActions,
+        lines: List[str],
+        hits: Optional[Set[str]] = None,
     ) -> List[str]:
-        for action in self.convert.actions_by(action_type):
-            lines = action.restore(lines)
+        for action_type, type_actions in actions:
+            for action in type_actions:
+                rules = self.rules[id(action)]
+                counts = RuleCounts()
+                record = counts.record
+                if hits is not None:
+                    record = _tracing(record, rules.ids, hits)
+                lines = action.apply_profiled(lines, record)
+                if self.rule_profile is not None:
+                    self.rule_profile.add(rules.label, counts)
         return lines
 
-    @property
-    def action_func(self) -> Callable[[ActionType, List[str]], List[str]]:
-        if self.direction == Direction.UNKNOWN:
-            raise ValueError("Unknown direction")
+    def _apply_traced(
+        self, actions: ScopedActions, lines: List[str], hits: Set[str]
+    ) -> List[str]:
+        for _, type_actions in actions:
+            for action in type_actions:
+                hit = _hit_recorder(self.rules[id(action)].ids, hits)
+                lines = action.apply_traced(lines, hit)
+        return lines
+
+    def _restore_actions(
+        self, actions: ScopedActions, lines: List[str]
+    ) -> List[str]:
+        for _, type_actions in actions:
+            for action in type_actions:
+                lines = action.restore(lines)
+        return lines
+
+    def _run_actions(
+        self,
+        actions: ScopedActions,
+        lines: List[str],
+        hits: Optional[Set[str]] = None,
+    ) -> List[str]:
         if self.direction == Direction.TO_PYTHON:
-            return self._apply_func
-        return self.restore_func
+            if self.rule_profile is not None:
+                return self._apply_profiled(actions, lines, hits)
+            if hits is not None:
+                return self._apply_traced(actions, lines, hits)
+            return self._apply_actions(actions, lines)
+        if self.direction == Direction.TO_DYNAMO:
+            return self._restore_actions(actions, lines)
+        return lines
 
     def apply_action(self, lines: List[str]) -> List[str]:
-        if self.direction == Direction.UNKNOWN:
-            return lines
-        for action_type in ActionType:
-            lines = self.action_func(action_type, lines)
-        return lines
+        return self._run_actions(self.actions, lines)
+
+    def rule_ids(self) -> List[str]:
+        return [
+            rule
+            for action_rules in self.rules.values()
+            for rule in action_rules.ids.values()
+        ]
+
+    @property
+    def is_scoped(self) -> bool:
+        return any(
+            action.is_scoped
+            for _, type_actions in self.actions
+            for action in type_actions
+        )
+
+    def scoped_action(
+        self,
+        engine: Optional[PythonEngine],
+        path: Optional[PurePath],
+        hits: Optional[Set[str]] = None,
+    ) -> Callable[[List[str]], List[str]]:
+        """Return the actions for the nodes of an engine and Dynamo file.
+
+        The applicable actions are picked once, the returned function
+        only runs those on the lines of the node. With a ``hits`` set the
+        ids of all rules matching a line are added to it."""
+        if not self.is_scoped:
+            if hits is None:
+                return self.apply_action
+            return partial(self._run_actions, self.actions, hits=hits)
+        engine_value = None if engine is None else engine.value
+        actions = tuple(
+            (
+                action_type,
+                tuple(
+                    action
+                    for action in type_actions
+                    if action.applies_to(engine_value, path)
+                ),
+            )
+            for action_type, type_actions in self.actions
+        )
+        return partial(self._run_actions, actions, hits=hits)
+
+    def info_action(
+        self, info: Optional[NodeInfo]
+    ) -> Callable[[List[str]], List[str]]:
+        if info is None:
+            return self.scoped_action(None, None)
+        return self.scoped_action(info.engine, PurePath(info.path))
+
+
+def _compiled_actions(config: ConvertConfig, action_type: ActionType):
+    actions = tuple(config.actions_by(action_type))
+    for action in actions:
+        action.compile()
+    return actions
+
+
+def _action_rules(
+    action_type: ActionType, index: int, action: AConvertAction
+) -> ActionRules:
+    action_id = _action_id(action_type, action)
+    return ActionRules(
+        label=f"{action_type.value} {index}",
+        ids={
+            (kind, pattern): rule_id(action_id, kind, pattern)
+            for kind, pattern in action.rules()
+        },
+    )
+
+
+def _rules(actions: ScopedActions) -> Dict[int, ActionRules]:
+    return {
+        id(action): _action_rules(action_type, index, action)
+        for action_type, type_actions in actions
+        for index, action in enumerate(type_actions)
+    }
+
+
+def create_job(
+    config: ConvertConfig,
+    source: SourceConfig,
+    direction: Direction,
+    rule_profile: Optional[RuleProfile] = None,
+) -> ConvertJob:
+    config = copy.deepcopy(config)
+    actions = tuple(
+        (action_type, _compiled_actions(config, action_type))
+        for action_type in ActionType
+    )
+    return ConvertJob(
+        config=config,
+        source=config.source_by(source.name),
+        direction=direction,
+        actions=actions,
+        rule_profile=rule_profile,
+        rules=_rules(actions),
+    )
 
 
 def get_config_path(dir_path: Optional[Path]) -> Path:
@@ -102,3 +327,25 @@ def create_handler(
         source_name=name,
         direction=direction,
     )
+
+
+def source_names(config: ConvertConfig, names: List[str]) -> List[str]:
+    if ALL_SOURCES in names:
+        return [source.name for source in config.sources]
+    names = list(dict.fromkeys(names))
+    return [config.source_by(name).name for name in names]
+
+
+def create_jobs(
+    path: Path,
+    names: List[str],
+    do_import: bool,
+    do_export: bool,
+    rule_profile: Optional[RuleProfile] = None,
+) -> List[ConvertJob]:
+    direction = get_direction(do_import=do_import, do_export=do_export)
+    config = read_config(path)
+    return [
+        create_job(config, config.source_by(name), direction, rule_profile)
+        for name in source_names(config, names)
+    ]
@@ -0,0 +1,109 @@
+"""Advisory file locks to let several sync processes run side by side.
+
+Locks are always taken in the same order to avoid deadlocks:
+
+1. the run locks of all export roots, sorted by their resolved path
+2. the lock of a single Dynamo or Python file, one file at a time
+
+A conversion holds its run locks shared, so independent graphs are
+synced in parallel; saving the export index of a directory takes its
+run lock exclusive.
+"""
+
+import logging
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+RUN_LOCK_NAME = ".dynpy.lock"
+DEFAULT_TIMEOUT = 30.0
+_RETRY_INTERVAL = 0.01
+_MAX_RETRY_INTERVAL = 0.5
+
+_timeout = DEFAULT_TIMEOUT
+
+
+class LockTimeoutError(TimeoutError):
+    pass
+
+
+def set_timeout(seconds: float) -> None:
+    global _timeout
+    if seconds < 0:
+        raise ValueError(f"Lock timeout must not be negative: {seconds}")
+    _timeout = seconds
+
+
+def _try_lock(fd: int, exclusive: bool) -> bool:
+    operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    try:
+        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _acquire(fd: int, path: Path, exclusive: bool, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    interval = _RETRY_INTERVAL
+    while not _try_lock(fd, exclusive):
+        if time.monotonic() >= deadline:
+            raise LockTimeoutError(f"Could not lock {path} in {timeout}s")
+        time.sleep(interval)
+        interval = min(interval * 2, _MAX_RETRY_INTERVAL)
+
+
+@contextmanager
+def file_lock(
+    path: Path,
+    exclusive: bool = True,
+    timeout: Optional[float] = None,
+    create: Optional[bool] = None,
+) -> Iterator[None]:
+    """Hold an advisory lock on the given file.
+
+    A missing file is created for an exclusive lock unless ``create``
+    says otherwise, a shared lock raises FileNotFoundError for it like
+    reading the file would."""
+    if fcntl is None:
+        log.debug("No advisory locks on this platform, %s not locked", path)
+        yield
+        return
+    if create is None:
+        create = exclusive
+    flags = os.O_RDONLY | os.O_CREAT if create else os.O_RDONLY
+    fd = os.open(path, flags, 0o644)
+    try:
+        _acquire(fd, path, exclusive, _timeout if timeout is None else timeout)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+def run_lock_path(directory: Path) -> Path:
+    return directory / RUN_LOCK_NAME
+
+
+@contextmanager
+def run_locks(
+    directories: Iterable[Path], exclusive: bool = False
+) -> Iterator[None]:
+    """Hold the run locks of all directories in a fixed order."""
+    paths = sorted({run_lock_path(path.resolve()) for path in directories})
+    with ExitStack() as stack:
+        for path in paths:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            stack.enter_context(
+                file_lock(path, exclusive=exclusive, create=True)
+            )
+        yield
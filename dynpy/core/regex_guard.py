@@ -0,0 +1,226 @@
+import re
+import threading
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse  # type: ignore
+
+NESTED_REPEAT = "nested quantifier, may backtrack exponentially"
+AMBIGUOUS_BRANCH = (
+    "ambiguous alternation in a repeat, may backtrack exponentially"
+)
+
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+_ZERO_WIDTH = (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+
+# The characters the overlap checks look at
+_ALPHABET = frozenset(map(chr, range(0x250)))
+# Characters a pattern may start with, None for any character
+Chars = Optional[FrozenSet[str]]
+
+_CATEGORIES: Dict[Any, Callable[[str], bool]] = {
+    sre_parse.CATEGORY_DIGIT: str.isdecimal,
+    sre_parse.CATEGORY_SPACE: str.isspace,
+    sre_parse.CATEGORY_WORD: lambda char: char.isalnum() or char == "_",
+}
+_NOT_CATEGORIES = {
+    sre_parse.CATEGORY_NOT_DIGIT: sre_parse.CATEGORY_DIGIT,
+    sre_parse.CATEGORY_NOT_SPACE: sre_parse.CATEGORY_SPACE,
+    sre_parse.CATEGORY_NOT_WORD: sre_parse.CATEGORY_WORD,
+}
+
+
+def _union(chars: Chars, other: Chars) -> Chars:
+    if chars is None or other is None:
+        return None
+    return chars | other
+
+
+def _overlap(chars: Chars, other: Chars) -> bool:
+    if chars is None:
+        return other is None or len(other) > 0
+    if other is None:
+        return len(chars) > 0
+    return not chars.isdisjoint(other)
+
+
+def _category(category: Any) -> FrozenSet[str]:
+    test = _CATEGORIES.get(_NOT_CATEGORIES.get(category, category))
+    if test is None:
+        return _ALPHABET
+    chars = frozenset(char for char in _ALPHABET if test(char))
+    return _ALPHABET - chars if category in _NOT_CATEGORIES else chars
+
+
+def _set_chars(items: List[Tuple[Any, Any]]) -> FrozenSet[str]:
+    chars: Set[str] = set()
+    negate = False
+    for op, av in items:
+        if op == sre_parse.NEGATE:
+            negate = True
+        elif op == sre_parse.LITERAL:
+            chars.add(chr(av))
+        elif op == sre_parse.RANGE:
+            low, high = av
+            chars.update(c for c in _ALPHABET if low <= ord(c) <= high)
+            chars.update((chr(low), chr(high)))
+        elif op == sre_parse.CATEGORY:
+            chars.update(_category(av))
+        else:
+            chars.update(_ALPHABET)
+    return _ALPHABET - chars if negate else frozenset(chars)
+
+
+def _first_of(op: Any, av: Any) -> Tuple[Chars, bool]:
+    if op == sre_parse.LITERAL:
+        return frozenset(chr(av)), False
+    if op == sre_parse.NOT_LITERAL:
+        return _ALPHABET - {chr(av)}, False
+    if op == sre_parse.IN:
+        return _set_chars(av), False
+    if op in _REPEATS:
+        chars, empty = _first(av[2])
+        return chars, empty or av[0] == 0
+    if op == sre_parse.SUBPATTERN:
+        return _first(av[3])
+    if op == sre_parse.BRANCH:
+        chars: Chars = frozenset()
+        empty = False
+        for branch in av[1]:
+            branch_chars, branch_empty = _first(branch)
+            chars = _union(chars, branch_chars)
+            empty = empty or branch_empty
+        return chars, empty
+    if op in _ZERO_WIDTH:
+        return frozenset(), True
+    return None, False
+
+
+def _first(items: Any) -> Tuple[Chars, bool]:
+    """The characters a sequence may start with and if it may be empty."""
+    chars: Chars = frozenset()
+    for op, av in items:
+        item_chars, empty = _first_of(op, av)
+        chars = _union(chars, item_chars)
+        if not empty:
+            return chars, False
+    return chars, True
+
+
+def _ambiguous(branches: List[Any]) -> bool:
+    firsts = [_first(branch) for branch in branches]
+    for idx, (chars, empty) in enumerate(firsts):
+        for other, other_empty in firsts[idx + 1 :]:
+            if (empty and other_empty) or _overlap(chars, other):
+                return True
+    return False
+
+
+def _find_risks(
+    items: Any, follow: Chars, in_repeat: bool, risks: Set[str]
+) -> None:
+    """Flag the repeats inside an unbounded repeat that can give up
+    characters to the part following them, so that a failing match
+    tries exponentially many splits of the line."""
+    items = list(items)
+    for idx, (op, av) in enumerate(items):
+        rest, rest_empty = _first(items[idx + 1 :])
+        item_follow = _union(rest, follow) if rest_empty else rest
+        if op in _REPEATS:
+            unbounded = av[1] == sre_parse.MAXREPEAT
+            body, _ = _first(av[2])
+            if unbounded and in_repeat and _overlap(body, item_follow):
+                risks.add(NESTED_REPEAT)
+            if av[1] > 1:
+                item_follow = _union(body, item_follow)
+            _find_risks(av[2], item_follow, in_repeat or unbounded, risks)
+        elif op == sre_parse.SUBPATTERN:
+            _find_risks(av[3], item_follow, in_repeat, risks)
+        elif op == sre_parse.BRANCH:
+            if in_repeat and _ambiguous(av[1]):
+                risks.add(AMBIGUOUS_BRANCH)
+            for branch in av[1]:
+                _find_risks(branch, item_follow, in_repeat, risks)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            _find_risks(av[1], frozenset(), in_repeat, risks)
+
+
+def regex_risks(regex: str) -> List[str]:
+    """Return the risky constructs of a regular expression.
+
+    Only unbounded repeats nested in an unbounded repeat whose
+    characters overlap with what may follow them, and alternatives
+    in a repeat that may match the same text, are flagged."""
+    try:
+        parsed = sre_parse.parse(regex)
+    except re.error as ex:
+        return [f"invalid pattern: {ex}"]
+    risks: Set[str] = set()
+    _find_risks(parsed, frozenset(), False, risks)
+    return sorted(risks)
+
+
+def _match_lines(conn: Any) -> None:
+    conn.send(True)
+    while True:
+        try:
+            pattern, flags, line = conn.recv()
+        except EOFError:
+            return
+        conn.send(re.compile(pattern, flags).match(line) is not None)
+
+
+class _MatchProcess:
+    """Matches in a child process, which is killed and replaced once a
+    match runs over its budget. A running ``re`` match cannot be stopped
+    in the process that runs it."""
+
+    def __init__(self) -> None:
+        self._process: Any = None
+        self._conn: Any = None
+
+    def _start(self) -> None:
+        import multiprocessing
+
+        context = multiprocessing.get_context("spawn")
+        self._conn, child = context.Pipe()
+        self._process = context.Process(
+            target=_match_lines, args=(child,), daemon=True
+        )
+        self._process.start()
+        child.close()
+        # Wait for the start, so it does not count against the budget
+        self._conn.recv()
+
+    def _kill(self) -> None:
+        self._process.kill()
+        self._process.join()
+        self._conn.close()
+        self._process = None
+
+    def match(
+        self, pattern: re.Pattern, line: str, budget: float
+    ) -> Optional[bool]:
+        if self._process is None:
+            self._start()
+        self._conn.send((pattern.pattern, pattern.flags, line))
+        if self._conn.poll(budget):
+            return self._conn.recv()
+        self._kill()
+        return None
+
+
+_processes = threading.local()
+
+
+def budget_match(
+    pattern: re.Pattern, line: str, budget: float
+) -> Optional[bool]:
+    """Match the line, None if the match took longer than ``budget``
+    seconds. Every thread matches in a child process of its own."""
+    process = getattr(_processes, "process", None)
+    if process is None:
+        process = _processes.process = _MatchProcess()
+    return process.match(pattern, line, budget)
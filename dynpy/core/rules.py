@@ -0,0 +1,111 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Tuple
+
+RULE_CONTAINS = "contains"
+RULE_REGEX = "regex"
+
+RuleKey = Tuple[str, str, str]
+
+
+@dataclass
+class RuleStats:
+    action: str
+    kind: str
+    pattern: str
+    examined: int = 0
+    hits: int = 0
+    seconds: float = 0.0
+
+    @property
+    def key(self) -> RuleKey:
+        return self.action, self.kind, self.pattern
+
+    @property
+    def is_dead(self) -> bool:
+        return self.examined > 0 and self.hits == 0
+
+    def add(self, examined: int, hits: int, seconds: float) -> None:
+        self.examined += examined
+        self.hits += hits
+        self.seconds += seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "action": self.action,
+            "kind": self.kind,
+            "pattern": self.pattern,
+            "examined": self.examined,
+            "hits": self.hits,
+            "seconds": self.seconds,
+        }
+
+    @classmethod
+    def from_dict(cls, content: Mapping[str, Any]) -> "RuleStats":
+        return cls(
+            action=content["action"],
+            kind=content["kind"],
+            pattern=content["pattern"],
+            examined=content["examined"],
+            hits=content["hits"],
+            seconds=content["seconds"],
+        )
+
+
+class RuleCounts:
+    """Counts of the rules of one action, collected without locking."""
+
+    def __init__(self) -> None:
+        self.counts: Dict[Tuple[str, str], List[float]] = {}
+
+    def record(self, kind: str, pattern: str, hit: bool, seconds: float):
+        counts = self.counts.get((kind, pattern))
+        if counts is None:
+            counts = self.counts[(kind, pattern)] = [0, 0, 0.0]
+        counts[0] += 1
+        counts[1] += hit
+        counts[2] += seconds
+
+
+class RuleProfile:
+    """Lines examined, hits and time of every rule of the actions.
+
+    A rule is a single ``contains`` value or ``regex`` of an action. A
+    line is examined by a rule only if no earlier rule of the same
+    action matched it."""
+
+    def __init__(self) -> None:
+        self._stats: Dict[RuleKey, RuleStats] = {}
+        self._lock = threading.Lock()
+
+    def add(self, action: str, counts: RuleCounts) -> None:
+        with self._lock:
+            for (kind, pattern), values in counts.counts.items():
+                key = (action, kind, pattern)
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = RuleStats(*key)
+                examined, hits, seconds = values
+                stats.add(int(examined), int(hits), seconds)
+
+    def stats(self) -> List[RuleStats]:
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=lambda rule: rule.seconds, reverse=True)
+
+    def dead_rules(self) -> List[RuleStats]:
+        return [rule for rule in self.stats() if rule.is_dead]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def merge_rule_stats(
+    stats: List[RuleStats], others: List[RuleStats]
+) -> List[RuleStats]:
+    merged = {rule.key: RuleStats(*rule.key) for rule in stats + others}
+    for rule in stats + others:
+        merged[rule.key].add(rule.examined, rule.hits, rule.seconds)
+    rules = list(merged.values())
+    return sorted(rules, key=lambda rule: rule.seconds, reverse=True)
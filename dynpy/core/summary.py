@@ -0,0 +1,242 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from dynpy.core import factory
+from dynpy.core.context import DynamoFileContext
+from dynpy.core.extract import ExtractCache
+from dynpy.core.models import CodeNode, ContentNode, NodeView, PythonEngine
+
+GRAPH_CACHE_BYTES = 64 * 1024 * 1024
+# Rough size of the objects around every node besides its strings
+_NODE_OVERHEAD = 600
+
+# absolute path, mtime_ns, size
+GraphKey = Tuple[str, int, int]
+
+
+@dataclass(frozen=True)
+class GraphSummary:
+    """What the converter and the UI need to know of a Dynamo graph."""
+
+    path: Path
+    nodes: Tuple[ContentNode, ...]
+    code_nodes: int
+    other_nodes: int
+    annotations: int
+    connectors: int
+    library_dependencies: int
+    package_dependencies: int
+    external_dependencies: int
+    # Bytes of the graph file the summary was read from
+    size: int = 0
+
+    @property
+    def nbytes(self) -> int:
+        size = sys.getsizeof(self) + _NODE_OVERHEAD
+        for node in self.nodes:
+            size += _NODE_OVERHEAD + len(node.code) + len(node.node_name)
+            size += 2 * len(node.node_id)
+        return size
+
+
+@dataclass(frozen=True)
+class GraphCacheStats:
+    hits: int
+    misses: int
+    size: int
+    nbytes: int
+
+
+def _get_code_nodes(context: DynamoFileContext) -> List[CodeNode]:
+    return [factory.code_node(node=node) for node in context.code_nodes]
+
+
+def content_nodes(context: DynamoFileContext) -> List[ContentNode]:
+    nodes = []
+    view_maps = context.views_mapping
+    for node in _get_code_nodes(context):
+        view = view_maps.get(node.node_id)
+        if view is None:
+            raise Exception(f"No view found for node {node.node_id}")
+        nodes.append(
+            factory.content_node(node=node, view=view, path=context.path)
+        )
+    return nodes
+
+
+def summarize(context: DynamoFileContext, size: int = 0) -> GraphSummary:
+    code_nodes = len(context.code_nodes)
+    return GraphSummary(
+        path=context.path,
+        nodes=tuple(content_nodes(context)),
+        code_nodes=code_nodes,
+        other_nodes=len(context.nodes) - code_nodes,
+        annotations=len(context.annotations),
+        connectors=len(context.connectors),
+        library_dependencies=len(context.library_dependencies),
+        package_dependencies=len(context.package_dependencies),
+        external_dependencies=len(context.external_dependencies),
+        size=size,
+    )
+
+
+def to_extract(summary: GraphSummary) -> Any:
+    """The summary as plain tuples for the extract cache."""
+    nodes = tuple(
+        (
+            node.node_id,
+            node.code,
+            node.code_engine.value,
+            node.view.node_id,
+            node.view.name,
+        )
+        for node in summary.nodes
+    )
+    counts = (
+        summary.code_nodes,
+        summary.other_nodes,
+        summary.annotations,
+        summary.connectors,
+        summary.library_dependencies,
+        summary.package_dependencies,
+        summary.external_dependencies,
+    )
+    return nodes, counts
+
+
+def from_extract(path: Path, extract: Any, size: int = 0) -> GraphSummary:
+    nodes, counts = extract
+    return GraphSummary(
+        path,
+        tuple(
+            ContentNode(
+                node=CodeNode(node_id, code, PythonEngine(engine)),
+                view=NodeView(view_id, name),
+                path=path,
+            )
+            for node_id, code, engine, view_id, name in nodes
+        ),
+        *counts,
+        size=size,
+    )
+
+
+def graph_key(path: Path) -> GraphKey:
+    stat = os.stat(path)
+    return str(path.absolute()), stat.st_mtime_ns, stat.st_size
+
+
+class GraphCache:
+    """Least recently used graph summaries, capped by their size.
+
+    A summary is valid as long as the mtime and size of its file stay
+    the same, so a changed graph is read again without invalidation.
+    Summaries missing in memory are looked up in the extract cache
+    before the JSON of the graph is parsed."""
+
+    def __init__(
+        self,
+        max_bytes: int = GRAPH_CACHE_BYTES,
+        extracts: Optional[ExtractCache] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.extracts = extracts
+        # key -> summary and its size in bytes
+        self._entries: OrderedDict[GraphKey, Tuple[GraphSummary, int]] = (
+            OrderedDict()
+        )
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: GraphKey) -> Optional[GraphSummary]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _put(self, key: GraphKey, summary: GraphSummary) -> None:
+        nbytes = summary.nbytes
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[1]
+            self._entries[key] = (summary, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+
+    def load(self, path: Path) -> Tuple[GraphSummary, bool]:
+        """The summary and whether it was parsed from the graph file."""
+        key = graph_key(path)
+        summary = self._get(key)
+        if summary is not None:
+            return summary, False
+        extract = None
+        if self.extracts is not None:
+            extract = self.extracts.read(key)
+        if extract is not None:
+            summary = from_extract(path, extract, key[2])
+            self._put(key, summary)
+            return summary, False
+        with DynamoFileContext(path, save=False) as context:
+            summary = summarize(context, key[2])
+        # A graph written while it was read is not kept
+        if graph_key(path) == key:
+            self._put(key, summary)
+            if self.extracts is not None:
+                self.extracts.write(key, to_extract(summary))
+        return summary, True
+
+    def summary(self, path: Path) -> GraphSummary:
+        return self.load(path)[0]
+
+    def stats(self) -> GraphCacheStats:
+        with self._lock:
+            return GraphCacheStats(
+                self.hits, self.misses, len(self._entries), self._nbytes
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+_cache: Optional[GraphCache] = None
+_cache_lock = threading.Lock()
+
+
+def graph_cache() -> GraphCache:
+    """The cache of the process, created on first use."""
+    global _cache
+    cache = _cache
+    if cache is not None:
+        return cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GraphCache(extracts=ExtractCache.from_environment())
+        return _cache
+
+
+def graph_summary(path: Path) -> GraphSummary:
+    """The summary of a Dynamo graph, parsed once per file version."""
+    return graph_cache().summary(path)
+
+
+def load_graph_summary(path: Path) -> Tuple[GraphSummary, bool]:
+    """The summary of a Dynamo graph and if its file was parsed for it."""
+    return graph_cache().load(path)
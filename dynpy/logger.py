@@ -1,6 +1,11 @@
+import atexit
 import logging
-import logging.config
-from typing import Iterable, Optional
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from dynpy.resources import DynPyResource, app_data_path
 
 
 def _format_message(ends_with: Optional[str] = None) -> str:
@@ -15,8 +20,8 @@ def _format_level(ends_with: Optional[str] = None) -> str:
     return "'%(levelname)-8s" + (ends_with or "")
 
 
-# def _format_time(ends_with: Optional[str] = None) -> str:
-#     return "%(asctime)-12s" + (ends_with or "")
+def _format_time(ends_with: Optional[str] = None) -> str:
+    return "%(asctime)-12s" + (ends_with or "")
 
 
 def _format_name(ends_with: Optional[str] = None) -> str:
@@ -43,27 +48,66 @@ def console(level) -> logging.Handler:
     return handler
 
 
-# def log_file(level) -> logging.Handler:
-#     log_file = PctResources.app_data(PctResource.PCT_LOG)
-#     ten_mega_bytes = 10 * 1024 * 1024
-#     handler = RotatingFileHandler(
-#         filename=log_file,
-#         mode='a',
-#         maxBytes=ten_mega_bytes,
-#         backupCount=3,
-#         encoding='utf-8',
-#     )
-#     handler.setLevel(level)
-#     formatter = logging.Formatter(
-#         '%(asctime)s - %(levelname)s - %(name)s - %(message)s', '%d-%b-%y %H:%M:%S'
-#     )
-#     handler.setFormatter(formatter)
-#     return handler
+def log_file(level, path: Optional[Path] = None) -> logging.Handler:
+    if path is None:
+        path = app_data_path(DynPyResource.LOGS)
+    ten_mega_bytes = 10 * 1024 * 1024
+    handler = RotatingFileHandler(
+        filename=path,
+        mode="a",
+        maxBytes=ten_mega_bytes,
+        backupCount=3,
+        encoding="utf-8",
+    )
+    handler.setLevel(level)
+    formatter = _log_format(
+        [
+            _format_time(ends_with=" -"),
+            _format_level(ends_with=" -"),
+            _format_name(ends_with=" -"),
+            _format_message(),
+        ]
+    )
+    handler.setFormatter(formatter)
+    return handler
+
+
+def start_queue_logging(
+    level: int, handlers: Iterable[logging.Handler]
+) -> QueueListener:
+    """Log through a queue, the handlers write on the listener thread.
+
+    The logging threads only put the records into the queue, so slow
+    handlers like the console do not block the conversion."""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    return listener
+
+
+def stop_queue_logging(listener: QueueListener) -> None:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            if handler.queue is listener.queue:
+                root.removeHandler(handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def _handlers(level: int) -> List[logging.Handler]:
+    handlers = [console(level)]
+    try:
+        handlers.append(log_file(logging.INFO))
+    except OSError as ex:
+        logging.getLogger(__name__).warning("No log file: %s", ex)
+    return handlers
 
 
 def config_logger(level: int) -> None:
-    handlers = [
-        console(level),
-        # log_file(logging.INFO),
-    ]
-    logging.basicConfig(handlers=handlers, level=level)
+    listener = start_queue_logging(level, _handlers(level))
+    atexit.register(stop_queue_logging, listener)
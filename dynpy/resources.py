@@ -6,6 +6,7 @@ class DynPyResource(str, Enum):
     """Resource enumeration for all resources of the application."""
 
     LOGS = "dynpy.log"
+    GRAPH_EXTRACTS = "graphs"
     ICON_APP = "favicon.png"
     ICON_LOAD = "load_config.png"
     ICON_CREATE = "create_config.png"
@@ -17,3 +18,12 @@ def icon_path(resource: DynPyResource) -> Path:
     if not resource.name.startswith("ICON_"):
         raise ValueError(f"Resource {resource} is not an icon")
     return Path.cwd() / "dynpy" / f"resources/{resource.value}"
+
+
+def app_data_path(resource: DynPyResource) -> Path:
+    """Return file path to a resource in the application data directory."""
+    if resource.name.startswith("ICON_"):
+        raise ValueError(f"Resource {resource} is an icon")
+    directory = Path.home() / ".dynpy"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / resource.value
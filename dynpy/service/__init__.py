@@ -1,9 +1,15 @@
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Iterable, List, Mapping, Protocol, Optional, Tuple
 
 from dynpy.core.actions import AConvertAction, ActionType
-from dynpy.core.handler import ConvertHandler, Direction
+from dynpy.core.handler import ConvertHandler, ConvertJob, Direction
 from dynpy.core.models import SourceConfig
+from dynpy.core.rules import RuleProfile
+from dynpy.service.diff import DiffCacheStats
+from dynpy.service.events import NO_EVENTS, ConvertEvents
+from dynpy.service.progress import CancelToken, ProgressCallback
+from dynpy.service.report import RunReport
 
 
 class IConvertService(Protocol):
@@ -104,8 +110,144 @@ class IConvertService(Protocol):
             Whether a conversion can be performed"""
         ...
 
-    def convert(self) -> None:
-        """Perform the conversion"""
+    def create_job(
+        self,
+        source_name: Optional[str] = None,
+        direction: Optional[Direction] = None,
+    ) -> ConvertJob:
+        """Return an immutable snapshot for a conversion.
+
+        The snapshot contains a copy of the configuration, the source,
+        the direction and the compiled actions. Later changes of the
+        service do not affect the returned job.
+
+        Parameters
+        ----------
+        source_name : Optional[str]
+            The source name, the current source name if None
+        direction : Optional[Direction]
+            The convert direction, the current direction if None
+
+        Returns
+        -------
+        ConvertJob
+            The conversion snapshot"""
+        ...
+
+    @property
+    def rule_profile(self) -> Optional[RuleProfile]:
+        """Return the rule profile of the conversions
+
+        Returns
+        -------
+        Optional[RuleProfile]
+            The lines examined, hits and time per rule, None if the
+            rules are not profiled"""
+        ...
+
+    def profile_rules(self, enabled: bool) -> None:
+        """Enable or disable the profile of the action rules
+
+        Jobs created while enabled share one profile, the profile
+        starts empty every time it is enabled.
+
+        Parameters
+        ----------
+        enabled : bool
+            Whether the following jobs profile their rules"""
+        ...
+
+    def convert(
+        self,
+        job: Optional[ConvertJob] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[CancelToken] = None,
+        events: ConvertEvents = NO_EVENTS,
+    ) -> RunReport:
+        """Perform the conversion
+
+        Several jobs can be converted at the same time on different
+        threads. The progress callback is called from the converting
+        thread, first with the planned total and then after every file.
+
+        Parameters
+        ----------
+        job : Optional[ConvertJob]
+            The job to convert, a snapshot of the current state if None
+        progress : Optional[ProgressCallback]
+            Called with the number of converted and total files
+        cancel : Optional[CancelToken]
+            Stops the conversion between two files if cancelled
+        events : ConvertEvents
+            Receives the events of the conversion, like written files
+
+        Returns
+        -------
+        RunReport
+            The report of the conversion"""
+        ...
+
+    async def convert_async(
+        self,
+        job: Optional[ConvertJob] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> RunReport:
+        """Perform the conversion without blocking the event loop
+
+        The progress callback is called on the event loop. Cancelling
+        the awaiting task cancels the token, the conversion stops at
+        the next file boundary.
+
+        Parameters
+        ----------
+        job : Optional[ConvertJob]
+            The job to convert, a snapshot of the current state if None
+        progress : Optional[ProgressCallback]
+            Called with the number of converted and total files
+        cancel : Optional[CancelToken]
+            Stops the conversion between two files if cancelled
+
+        Returns
+        -------
+        RunReport
+            The report of the conversion"""
+        ...
+
+    def convert_future(
+        self,
+        job: Optional[ConvertJob] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[CancelToken] = None,
+        events: ConvertEvents = NO_EVENTS,
+    ) -> "Future[RunReport]":
+        """Perform the conversion on a worker thread
+
+        The progress callback is called from the worker thread.
+
+        Parameters
+        ----------
+        job : Optional[ConvertJob]
+            The job to convert, a snapshot of the current state if None
+        progress : Optional[ProgressCallback]
+            Called with the number of converted and total files
+        cancel : Optional[CancelToken]
+            Stops the conversion between two files if cancelled
+        events : ConvertEvents
+            Receives the events of the conversion, like written files
+
+        Returns
+        -------
+        Future[RunReport]
+            The future of the conversion report"""
+        ...
+
+    def shutdown(self) -> None:
+        """Shut down the conversion executor
+
+        Conversions that did not start yet are cancelled, running
+        conversions complete on their thread. A later conversion
+        future starts a new executor."""
         ...
 
     def sources(self) -> List[SourceConfig]:
@@ -147,7 +289,8 @@ class IConvertService(Protocol):
     ) -> bool:
         """Update the actions
 
-        Update the actions with the given mapping.
+        Update the actions with the given mapping. If a regex is invalid
+        or a scope names an unknown engine, a ValueError is raised.
 
         Parameters
         ----------
@@ -216,7 +359,11 @@ class IConvertService(Protocol):
         ...
 
     def code_diff(
-        self, source: Tuple[str, List[str]], other: Tuple[str, List[str]]
+        self,
+        source: Tuple[str, List[str]],
+        other: Tuple[str, List[str]],
+        context: Optional[int] = None,
+        hashes: Optional[Tuple[int, int]] = None,
     ) -> Iterable[str]:
         """Return the code difference between source and export code.
 
@@ -229,9 +376,22 @@ class IConvertService(Protocol):
             Source file name and python code
         other: Tuple[str, List[str]]
             Other file name and python code
+        context: Optional[int]
+            Unchanged lines around each change, all lines if None
+        hashes: Optional[Tuple[int, int]]
+            Known code hashes of source and other, computed if None
 
         Returns
         -------
         Iterable[str]
-            The code difference"""
+            The code difference, the source code if both are equal"""
+        ...
+
+    def diff_stats(self) -> DiffCacheStats:
+        """Return the statistics of the diff cache.
+
+        Returns
+        -------
+        DiffCacheStats
+            Hits, misses, equal short-circuits and cached diffs"""
         ...
@@ -0,0 +1,467 @@
+import hashlib
+import logging
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from dynpy.core import lock
+from dynpy.core import paths as pth
+from dynpy.core import summary
+from dynpy.core.handler import ConvertJob, Direction
+from dynpy.core.models import PythonFile, SourceConfig
+from dynpy.core.rules import RuleStats, merge_rule_stats
+from dynpy.service import dynamo, python
+from dynpy.service import events as evt
+from dynpy.service.events import NO_EVENTS, ConvertEvents
+from dynpy.service.index import ExportIndex
+from dynpy.service.progress import (
+    CancelToken,
+    ConvertProgress,
+    ProgressCallback,
+)
+from dynpy.service.report import RunReport, TaskStats
+
+log = logging.getLogger(__name__)
+
+ScanKey = Tuple[str, Tuple[str, ...]]
+ExportIndexes = Dict[Path, ExportIndex]
+
+
+@dataclass(frozen=True)
+class ConvertTask:
+    source_name: str
+    path: Path
+    # Converts the file, passing its events to the given sink
+    convert: Callable[[ConvertEvents], None]
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard ``index`` of ``count`` shards, both starting at one."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        index, _, count = value.partition("/")
+        try:
+            shard = cls(index=int(index), count=int(count))
+        except ValueError:
+            raise ValueError(f"Shard '{value}' is not in the form i/N")
+        if not 0 < shard.index <= shard.count:
+            raise ValueError(f"Shard index of '{value}' out of range")
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def _bucket(self, path: Path, root: Path) -> int:
+        resolved = path.resolve()
+        # Graphs outside the root, e.g. of a NodeInfo path, keep theirs
+        if resolved.is_relative_to(root.resolve()):
+            sub_path = resolved.relative_to(root.resolve()).as_posix()
+        else:
+            sub_path = resolved.as_posix()
+        digest = hashlib.sha1(sub_path.encode("utf8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.count
+
+    def contains(self, path: Path, root: Path) -> bool:
+        return self._bucket(path, root) == self.index - 1
+
+
+class FileScanner:
+    """Walks every directory tree only once per run.
+
+    Sources whose root lies inside an already scanned root reuse the
+    files of that scan instead of walking the directories again."""
+
+    def __init__(self) -> None:
+        self._scans: Dict[Tuple[Path, ScanKey], Tuple[Path, List[Path]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _covering_scan(
+        self, root: Path, key: ScanKey
+    ) -> Optional[Tuple[Path, List[Path]]]:
+        resolved = root.resolve()
+        for (scanned, scan_key), scan in self._scans.items():
+            if scan_key != key:
+                continue
+            if scanned == resolved or scanned in resolved.parents:
+                return scan
+        return None
+
+    def _rebase(self, root: Path, scan: Tuple[Path, List[Path]]) -> List[Path]:
+        scan_root, files = scan
+        sub_root = scan_root / root.resolve().relative_to(scan_root.resolve())
+        return [
+            root / path.relative_to(sub_root)
+            for path in files
+            if path.is_relative_to(sub_root)
+        ]
+
+    def files(
+        self,
+        root: Path,
+        key: ScanKey,
+        is_file_cb: Callable[[Path], bool],
+        is_exclude_cb: Callable[[Path], bool],
+    ) -> List[Path]:
+        if not root.exists():
+            return []
+        scan = self._covering_scan(root, key)
+        if scan is not None:
+            self.hits += 1
+            files = self._rebase(root, scan)
+            return [path for path in files if is_file_cb(path)]
+        self.misses += 1
+        files = pth.get_files(root, is_file_cb, is_exclude_cb)
+        self._scans[(root.resolve(), key)] = (root, files)
+        return files
+
+    def source_files(self, source: SourceConfig) -> List[Path]:
+        key = ("source", tuple(source.exclude_dirs))
+        return self.files(
+            source.source_path, key, source.is_source, source.is_exclude
+        )
+
+    def export_files(self, source: SourceConfig) -> List[Path]:
+        key = ("export", tuple(source.exclude_dirs))
+        return self.files(
+            source.export_path, key, source.is_export, source.is_exclude
+        )
+
+
+def _root_depth(path: Path) -> int:
+    return len(path.resolve().parts)
+
+
+def _prepare_scanner(
+    jobs: Sequence[ConvertJob], scanner: FileScanner
+) -> None:
+    """Scan the outermost roots first, so nested roots can reuse them."""
+    sources = [job.source for job in jobs]
+    sources = sorted(sources, key=lambda src: _root_depth(src.source_path))
+    for source in sources:
+        if jobs[0].direction == Direction.TO_PYTHON:
+            scanner.source_files(source)
+        else:
+            scanner.export_files(source)
+
+
+class _Deduplicate:
+    def __init__(self, report: RunReport, events: ConvertEvents) -> None:
+        self.report = report
+        self.events = events
+        self._seen: Dict[Path, str] = {}
+
+    def is_new(self, path: Path, source_name: str) -> bool:
+        resolved = path.resolve()
+        first = self._seen.get(resolved)
+        if first is None:
+            self._seen[resolved] = source_name
+            return True
+        log.info(
+            "Skip %s of %s, already planned by %s", path, source_name, first
+        )
+        self.report.add_duplicate()
+        if self.events.enabled:
+            self.events.emit(evt.FILE_SKIPPED, path=path, reason="duplicate")
+        return False
+
+
+def _to_python_tasks(
+    job: ConvertJob,
+    scanner: FileScanner,
+    unique: _Deduplicate,
+    indexes: Optional[ExportIndexes],
+    shard: Optional[Shard],
+) -> List[ConvertTask]:
+    name = job.source.name
+    index = _export_index(job, indexes)
+    return [
+        ConvertTask(
+            name, path, partial(dynamo.convert_file, job, path, index=index)
+        )
+        for path in scanner.source_files(job.source)
+        if unique.is_new(path, name)
+        and _in_shard(path, job.source.source_path, shard)
+    ]
+
+
+def _export_index(
+    job: ConvertJob, indexes: Optional[ExportIndexes]
+) -> Optional[ExportIndex]:
+    if indexes is None:
+        return None
+    root = job.source.export_path.resolve()
+    index = indexes.get(root)
+    if index is None:
+        index = indexes[root] = ExportIndex.load(root, job.rule_ids())
+    return index
+
+
+def _python_file(
+    job: ConvertJob, events: ConvertEvents, path: Path
+) -> Tuple[Path, PythonFile | Exception, TaskStats]:
+    stats = TaskStats(events)
+    try:
+        with stats.phase(evt.PHASE_EXTRACT):
+            py_file = python.python_file(job, path)
+    except Exception as ex:
+        return path, ex, stats
+    return path, py_file, stats
+
+
+def _add_read(
+    unique: _Deduplicate,
+    path: Path,
+    py_file: PythonFile | Exception,
+    stats: TaskStats,
+) -> None:
+    if isinstance(py_file, Exception):
+        log.error("Failed to read %s: %s", path, py_file)
+        _add_failed(unique.report, unique.events, path, py_file)
+    else:
+        size = evt.file_size(path)
+        stats.emit(evt.FILE_READ, path=path, bytes=size, nodes=1)
+    stats.add_to(unique.report)
+
+
+def _to_dynamo_tasks(
+    job: ConvertJob,
+    scanner: FileScanner,
+    unique: _Deduplicate,
+    executor: Executor,
+    shard: Optional[Shard],
+) -> List[ConvertTask]:
+    """Every shard reads all exports to find their graphs, but counts a
+    read only in the shard of its graph, or of the export itself if it
+    belongs to no planned graph."""
+    name = job.source.name
+    paths = [
+        path
+        for path in scanner.export_files(job.source)
+        if unique.is_new(path, name)
+    ]
+    read_file = partial(_python_file, job, unique.events)
+    read = list(executor.map(read_file, paths))
+    groups = {
+        path: files
+        for path, files in python.dynamo_file_group(
+            py_file for _, py_file, _ in read
+            if not isinstance(py_file, Exception)
+        ).items()
+        if unique.is_new(path, name)
+    }
+    graphs = {
+        py_file.path: path
+        for path, files in groups.items()
+        for py_file in files
+    }
+    source_root = job.source.source_path
+    for path, py_file, stats in read:
+        graph = graphs.get(path)
+        if graph is None:
+            counted = _in_shard(path, job.source.export_path, shard)
+        else:
+            counted = _in_shard(graph, source_root, shard)
+        if counted:
+            _add_read(unique, path, py_file, stats)
+    return [
+        ConvertTask(name, path, partial(python.convert_file, path, files))
+        for path, files in groups.items()
+        if _in_shard(path, source_root, shard)
+    ]
+
+
+def _in_shard(path: Path, root: Path, shard: Optional[Shard]) -> bool:
+    if shard is None:
+        return True
+    return shard.contains(path, root)
+
+
+def plan(
+    jobs: Sequence[ConvertJob],
+    executor: Executor,
+    report: RunReport,
+    shard: Optional[Shard] = None,
+    events: ConvertEvents = NO_EVENTS,
+    indexes: Optional[ExportIndexes] = None,
+) -> List[ConvertTask]:
+    """Plan the conversion of all sources together.
+
+    Files reachable from more than one source are converted only by the
+    first source of the configuration that reaches them. With a shard
+    only the Dynamo graphs of that shard are planned; the python files
+    of a graph always share the shard of the graph. Exports use and
+    fill the index of their export directory if indexes are given."""
+    if len(jobs) == 0:
+        return []
+    if events.enabled:
+        events.emit(evt.SCAN_STARTED, sources=[job.source.name for job in jobs])
+    scanner = FileScanner()
+    stats = TaskStats(events)
+    with stats.phase(evt.PHASE_SCAN):
+        _prepare_scanner(jobs, scanner)
+    stats.add_to(report)
+    unique = _Deduplicate(report, events)
+    tasks = []
+    for job in jobs:
+        if job.direction == Direction.TO_PYTHON:
+            tasks += _to_python_tasks(job, scanner, unique, indexes, shard)
+        else:
+            tasks += _to_dynamo_tasks(job, scanner, unique, executor, shard)
+    report.files = len(tasks)
+    report.add_cache("scanner", scanner.hits, scanner.misses)
+    if events.enabled:
+        events.emit(evt.SCAN_FINISHED, files=report.files)
+    return tasks
+
+
+def _direction(jobs: Sequence[ConvertJob]) -> Direction:
+    directions = {job.direction for job in jobs}
+    if len(directions) != 1:
+        raise ValueError(f"Sources must share one direction: {directions}")
+    return directions.pop()
+
+
+def _add_failed(
+    report: RunReport, events: ConvertEvents, path: Path, error: Exception
+) -> None:
+    report.add_failed(path, error)
+    if events.enabled:
+        events.emit(evt.ERROR, path=path, message=str(error))
+
+
+def _add_cancelled(
+    report: RunReport, events: ConvertEvents, path: Path
+) -> None:
+    report.add_cancelled()
+    if events.enabled:
+        events.emit(evt.FILE_SKIPPED, path=path, reason="cancelled")
+
+
+def _convert(
+    task: ConvertTask, cancel: Optional[CancelToken], events: ConvertEvents
+) -> Optional[Tuple[float, TaskStats]]:
+    if cancel is not None and cancel.cancelled:
+        return None
+    stats = TaskStats(events)
+    start = time.perf_counter()
+    task.convert(stats)
+    return time.perf_counter() - start, stats
+
+
+def _cancel_pending(futures: Iterable[Future]) -> None:
+    for future in futures:
+        future.cancel()
+
+
+def _notify(
+    progress: Optional[ProgressCallback],
+    report: RunReport,
+    path: Optional[Path] = None,
+) -> None:
+    if progress is None:
+        return
+    progress(ConvertProgress(report.done, report.files, path))
+
+
+def _rule_stats(jobs: Sequence[ConvertJob]) -> List[RuleStats]:
+    profiles = {
+        id(job.rule_profile): job.rule_profile
+        for job in jobs
+        if job.rule_profile is not None
+    }
+    stats: List[RuleStats] = []
+    for profile in profiles.values():
+        stats = merge_rule_stats(stats, profile.stats())
+    return stats
+
+
+def run(
+    jobs: Sequence[ConvertJob],
+    workers: Optional[int] = None,
+    shard: Optional[Shard] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+    events: ConvertEvents = NO_EVENTS,
+    incremental: bool = False,
+) -> RunReport:
+    """Convert all sources through one shared worker pool.
+
+    The progress callback is called from the calling thread once the
+    total is planned and after every file. A cancelled token stops the
+    run between files, files already started are completed. An
+    incremental export only writes the nodes whose python file could
+    change since the last incremental export."""
+    report = RunReport(
+        direction=_direction(jobs),
+        sources=[job.source.name for job in jobs],
+        shards=[] if shard is None else [str(shard)],
+    )
+    start = time.perf_counter()
+    export_roots = [job.source.export_path for job in jobs]
+    indexes: Optional[ExportIndexes] = {} if incremental else None
+    graphs = summary.graph_cache().stats()
+    with (
+        lock.run_locks(export_roots),
+        ThreadPoolExecutor(max_workers=workers) as executor,
+    ):
+        tasks = plan(jobs, executor, report, shard, events, indexes)
+        _notify(progress, report)
+        futures = {
+            executor.submit(_convert, task, cancel, events): task
+            for task in tasks
+        }
+        pending_cancelled = False
+        for future in as_completed(futures):
+            task = futures[future]
+            if cancel is not None and cancel.cancelled:
+                if not pending_cancelled:
+                    pending_cancelled = True
+                    _cancel_pending(futures)
+            if future.cancelled():
+                _add_cancelled(report, events, task.path)
+                continue
+            try:
+                result = future.result()
+            except Exception as ex:
+                log.exception("Failed to convert %s", task.path, exc_info=ex)
+                _add_failed(report, events, task.path, ex)
+            else:
+                if result is not None:
+                    seconds, stats = result
+                    stats.add_to(report)
+                    report.add_converted(task.path, seconds)
+                else:
+                    _add_cancelled(report, events, task.path)
+            _notify(progress, report, task.path)
+    for index in (indexes or {}).values():
+        index.save()
+    # The cache is shared by the process, count only this run
+    after = summary.graph_cache().stats()
+    hits, misses = after.hits - graphs.hits, after.misses - graphs.misses
+    if hits + misses > 0:
+        report.add_cache("graphs", hits, misses)
+    report.wall_time = time.perf_counter() - start
+    report.rules = _rule_stats(jobs)
+    return report
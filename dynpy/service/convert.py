@@ -1,14 +1,30 @@
-import difflib
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Callable, Iterable, List, Mapping, Optional, Tuple
+from typing import Iterable, List, Mapping, Optional, Tuple
 
 from dynpy.core import factory
 from dynpy.core import handler as hdl
 from dynpy.core.actions import AConvertAction, ActionType
-from dynpy.core.handler import ConvertHandler, Direction
+from dynpy.core.handler import ConvertHandler, ConvertJob, Direction
 from dynpy.core.models import ConvertConfig, SourceConfig
-from dynpy.service import dynamo, python
+from dynpy.core.rules import RuleProfile
+from dynpy.service import batch
+from dynpy.service.diff import (
+    DiffCache,
+    DiffCacheStats,
+    code_hash,
+    unified_diff,
+)
+from dynpy.service.events import NO_EVENTS, ConvertEvents
+from dynpy.service.progress import (
+    CancelToken,
+    ConvertProgress,
+    ProgressCallback,
+)
+from dynpy.service.report import RunReport
 
 log = logging.getLogger(__name__)
 
@@ -16,12 +32,12 @@ log = logging.getLogger(__name__)
 class ConvertService:
     def __init__(self):
         self._handler: ConvertHandler | None = None
-        self._convert_func: Mapping[
-            Direction, Callable[[ConvertHandler], None]
-        ] = {
-            Direction.TO_PYTHON: dynamo.to_python,
-            Direction.TO_DYNAMO: python.to_dynamo,
-        }
+        # Guards the handler and configuration while jobs are created
+        self._lock = threading.RLock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._convert_directions = (Direction.TO_PYTHON, Direction.TO_DYNAMO)
+        self._rule_profile: RuleProfile | None = None
+        self.diff_cache = DiffCache()
 
     @property
     def config_extension(self) -> str:
@@ -65,8 +81,9 @@ class ConvertService:
         return self._handler
 
     def convert_handle_by(self, source_name: str) -> ConvertHandler:
-        self.handler.source_name = source_name
-        return self.handler
+        with self._lock:
+            self.handler.source_name = source_name
+            return self.handler
 
     @property
     def source_name(self) -> Optional[str]:
@@ -78,7 +95,8 @@ class ConvertService:
 
     @direction.setter
     def direction(self, direction: Direction) -> None:
-        self.handler.direction = direction
+        with self._lock:
+            self.handler.direction = direction
 
     @property
     def has_direction(self) -> bool:
@@ -97,13 +115,108 @@ class ConvertService:
         source = self.handler.source
         if not source.source_path.exists():
             return False
-        return self.handler.direction in self._convert_func
+        return self.handler.direction in self._convert_directions
 
-    def convert(self) -> None:
-        callback = self._convert_func.get(self.direction, None)
-        if callback is None:
-            raise ValueError(f"Cannot convert {self.handler.direction}")
-        callback(self.handler)
+    def create_job(
+        self,
+        source_name: Optional[str] = None,
+        direction: Optional[Direction] = None,
+    ) -> ConvertJob:
+        with self._lock:
+            if source_name is None:
+                source_name = self.handler.source_name
+            if source_name is None:
+                raise ValueError("No source name provided")
+            if direction is None:
+                direction = self.handler.direction
+            source = self.config.source_by(source_name)
+            return hdl.create_job(
+                self.config, source, direction, self._rule_profile
+            )
+
+    @property
+    def rule_profile(self) -> Optional[RuleProfile]:
+        return self._rule_profile
+
+    def profile_rules(self, enabled: bool) -> None:
+        with self._lock:
+            self._rule_profile = RuleProfile() if enabled else None
+
+    def convert(
+        self,
+        job: Optional[ConvertJob] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[CancelToken] = None,
+        events: ConvertEvents = NO_EVENTS,
+    ) -> RunReport:
+        job = self.create_job() if job is None else job
+        if job.direction not in self._convert_directions:
+            raise ValueError(f"Cannot convert {job.direction}")
+        return batch.run(
+            [job], progress=progress, cancel=cancel, events=events
+        )
+
+    def _loop_progress(
+        self, progress: Optional[ProgressCallback]
+    ) -> Optional[ProgressCallback]:
+        if progress is None:
+            return None
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+
+        def on_progress(event: ConvertProgress) -> None:
+            loop.call_soon_threadsafe(progress, event)
+
+        return on_progress
+
+    async def convert_async(
+        self,
+        job: Optional[ConvertJob] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> RunReport:
+        # Imported on first use, only the UI converts asynchronously
+        import asyncio
+
+        job = self.create_job() if job is None else job
+        cancel = CancelToken() if cancel is None else cancel
+        on_progress = self._loop_progress(progress)
+        try:
+            return await asyncio.to_thread(
+                self.convert, job, on_progress, cancel
+            )
+        except asyncio.CancelledError:
+            # The worker thread stops at the next file boundary
+            cancel.cancel()
+            raise
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    thread_name_prefix="dynpy-convert"
+                )
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def convert_future(
+        self,
+        job: Optional[ConvertJob] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[CancelToken] = None,
+        events: ConvertEvents = NO_EVENTS,
+    ) -> "Future[RunReport]":
+        job = self.create_job() if job is None else job
+        return self.executor.submit(
+            self.convert, job, progress, cancel, events
+        )
 
     @property
     def config(self) -> ConvertConfig:
@@ -117,9 +230,10 @@ class ConvertService:
         return all(src in existing for src in configs)
 
     def update_sources(self, configs: List[SourceConfig]) -> bool:
-        changed = not self._same_sources(configs)
-        self.config.set_sources(configs)
-        return changed
+        with self._lock:
+            changed = not self._same_sources(configs)
+            self.config.set_sources(configs)
+            return changed
 
     def actions(self) -> Mapping[ActionType, List[AConvertAction]]:
         return self.config.actions
@@ -140,28 +254,55 @@ class ConvertService:
     def update_actions(
         self, actions: Mapping[ActionType, List[AConvertAction]]
     ) -> bool:
-        changed = not self._same_actions(actions)
-        self.config.set_actions(actions)
-        return changed
+        factory.check_actions(actions)
+        with self._lock:
+            changed = not self._same_actions(actions)
+            self.config.set_actions(actions)
+            return changed
 
-    def code_diff(
-        self, source: Tuple[str, List[str]], other: Tuple[str, List[str]]
-    ) -> Iterable[str]:
+    @staticmethod
+    def _unified_diff(
+        source: Tuple[str, List[str]],
+        other: Tuple[str, List[str]],
+        context: int,
+    ) -> List[str]:
         source_name, source_code = source
         other_name, other_code = other
-        count = max(len(source_code), len(other_code))
-        diff = list(
+        return list(
             # To display the result after conversion,
             # - source must be b
             # - other must be a
-            difflib.unified_diff(
+            unified_diff(
                 a=other_code,
                 fromfile=other_name,
                 b=source_code,
                 tofile=source_name,
-                n=count,
+                n=context,
             )
         )
+
+    def code_diff(
+        self,
+        source: Tuple[str, List[str]],
+        other: Tuple[str, List[str]],
+        context: Optional[int] = None,
+        hashes: Optional[Tuple[int, int]] = None,
+    ) -> Iterable[str]:
+        source_name, source_code = source
+        other_name, other_code = other
+        if hashes is None:
+            hashes = (code_hash(source_code), code_hash(other_code))
+        if self.diff_cache.is_equal(*hashes):
+            return source_code
+        if context is None:
+            context = max(len(source_code), len(other_code))
+        key = (source_name, hashes[0], other_name, hashes[1], context)
+        diff = self.diff_cache.diff(
+            key, partial(self._unified_diff, source, other, context)
+        )
         if len(diff) == 0:
             return source_code
-        return diff
+        return list(diff)
+
+    def diff_stats(self) -> DiffCacheStats:
+        return self.diff_cache.stats()
@@ -0,0 +1,325 @@
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+log = logging.getLogger(__name__)
+
+DIFF_CACHE_SIZE = 256
+# Ranges that need more edits are shown as replaced as a whole
+MYERS_MAX_EDITS = 1000
+
+# source name, source hash, other name, other hash, context size
+DiffKey = Tuple[str, int, str, int, int]
+
+
+def code_hash(code: Sequence[str]) -> int:
+    """Hash of the code lines, shared by node tags and the diff cache."""
+    return hash(tuple(code))
+
+
+@dataclass(frozen=True)
+class DiffCacheStats:
+    hits: int
+    misses: int
+    equal: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses + self.equal
+        return 0.0 if lookups == 0 else (self.hits + self.equal) / lookups
+
+
+class DiffCache:
+    """Least recently used diffs, keyed by the hashes of both codes.
+
+    Code with the same hash on both sides is never diffed, ``equal``
+    counts these short-circuits. The cache may be used from any thread."""
+
+    def __init__(self, maxsize: int = DIFF_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[DiffKey, Tuple[str, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.equal = 0
+
+    def _get(self, key: DiffKey) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            diff = self._entries.get(key)
+            if diff is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return diff
+
+    def _put(self, key: DiffKey, diff: Tuple[str, ...]) -> None:
+        with self._lock:
+            self._entries[key] = diff
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def is_equal(self, source_hash: int, other_hash: int) -> bool:
+        if source_hash != other_hash:
+            return False
+        with self._lock:
+            self.equal += 1
+        return True
+
+    def diff(
+        self,
+        key: DiffKey,
+        compute: Callable[[], List[str]],
+    ) -> Tuple[str, ...]:
+        """Return the cached diff of ``key`` or compute and keep it."""
+        diff = self._get(key)
+        if diff is None:
+            diff = tuple(compute())
+            self._put(key, diff)
+        return diff
+
+    def stats(self) -> DiffCacheStats:
+        with self._lock:
+            return DiffCacheStats(
+                self.hits, self.misses, self.equal, len(self._entries)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# tag, a start, a end, b start, b end as in difflib.SequenceMatcher
+Opcode = Tuple[str, int, int, int, int]
+Match = Tuple[int, int]
+
+
+def _intern(
+    a: Sequence[str], b: Sequence[str]
+) -> Tuple[List[int], List[int]]:
+    ids: Dict[str, int] = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def _unique_anchors(
+    a: List[int], b: List[int], alo: int, ahi: int, blo: int, bhi: int
+) -> List[Match]:
+    """Lines unique on both sides, the longest run in the same order."""
+    # line id -> [count in a, count in b, index in a, index in b]
+    counts: Dict[int, List[int]] = {}
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, 0, i, 0])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[3] = j
+    pairs = sorted(
+        (entry[2], entry[3])
+        for entry in counts.values()
+        if entry[0] == 1 and entry[1] == 1
+    )
+    # Longest increasing subsequence of the b indices
+    tails: List[int] = []
+    tail_pairs: List[int] = []
+    previous: List[int] = []
+    for index, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_pairs.append(index)
+        else:
+            tails[pos] = j
+            tail_pairs[pos] = index
+        previous.append(tail_pairs[pos - 1] if pos > 0 else -1)
+    anchors: List[Match] = []
+    index = tail_pairs[-1] if tail_pairs else -1
+    while index >= 0:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _myers(
+    a: List[int], b: List[int], alo: int, ahi: int, blo: int, bhi: int
+) -> List[Match]:
+    """Matched lines of a shortest edit script (Myers, 1986).
+
+    No lines match if the script needs more than ``MYERS_MAX_EDITS``."""
+    n = ahi - alo
+    m = bhi - blo
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace: List[List[int]] = []
+    for d in range(min(n + m, MYERS_MAX_EDITS) + 1):
+        # Only the diagonals -d - 1 to d + 1 are read when backtracking
+        trace.append(v[offset - d - 1 : offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m, alo, blo)
+    return []
+
+
+def _backtrack(
+    trace: List[List[int]], x: int, y: int, alo: int, blo: int
+) -> List[Match]:
+    matches: List[Match] = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        offset = d + 1
+        k = x - y
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[offset + prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((alo + x, blo + y))
+        x, y = prev_x, prev_y
+    return matches
+
+
+def _matches(a: List[int], b: List[int]) -> List[Match]:
+    """Matched line pairs, anchored on unique lines (patience diff).
+
+    Ranges without unique lines fall back to Myers, so long tables of
+    mostly distinct lines never reach the quadratic worst case."""
+    matches: List[Match] = []
+    ranges = [(0, len(a), 0, len(b))]
+    while ranges:
+        alo, ahi, blo, bhi = ranges.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if len(anchors) == 0:
+            matches.extend(_myers(a, b, alo, ahi, blo, bhi))
+            continue
+        for i, j in anchors:
+            ranges.append((alo, i, blo, j))
+            matches.append((i, j))
+            alo, blo = i + 1, j + 1
+        ranges.append((alo, ahi, blo, bhi))
+    matches.sort()
+    return matches
+
+
+def opcodes(a: Sequence[str], b: Sequence[str]) -> List[Opcode]:
+    """Opcodes to turn ``a`` into ``b``, like ``SequenceMatcher``."""
+    codes: List[Opcode] = []
+    i = j = 0
+    for ai, bj in _matches(*_intern(a, b)) + [(len(a), len(b))]:
+        if i < ai and j < bj:
+            codes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            codes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            codes.append(("insert", i, ai, j, bj))
+        if ai == len(a):
+            break
+        last = codes[-1] if codes else None
+        if last is not None and last[0] == "equal" and last[2] == ai:
+            codes[-1] = ("equal", last[1], ai + 1, last[3], bj + 1)
+        else:
+            codes.append(("equal", ai, ai + 1, bj, bj + 1))
+        i, j = ai + 1, bj + 1
+    return codes
+
+
+def _grouped(codes: List[Opcode], n: int) -> Iterator[List[Opcode]]:
+    """Hunks with ``n`` lines of context, as difflib groups them."""
+    if len(codes) == 0:
+        codes = [("equal", 0, 1, 0, 1)]
+    tag, i1, i2, j1, j2 = codes[0]
+    if tag == "equal":
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    tag, i1, i2, j1, j2 = codes[-1]
+    if tag == "equal":
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+    group: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _range(start: int, stop: int) -> str:
+    length = stop - start
+    if length == 1:
+        return f"{start + 1}"
+    if length == 0:
+        return f"{start},0"
+    return f"{start + 1},{length}"
+
+
+def unified_diff(
+    a: Sequence[str],
+    b: Sequence[str],
+    fromfile: str = "",
+    tofile: str = "",
+    n: int = 3,
+    lineterm: str = "\n",
+) -> Iterator[str]:
+    """Drop-in for ``difflib.unified_diff`` on top of ``opcodes``.
+
+    The hunks may pair lines differently than difflib, both are valid
+    unified diffs of the same two codes."""
+    started = False
+    for group in _grouped(opcodes(a, b), n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}{lineterm}"
+            yield f"+++ {tofile}{lineterm}"
+        first, last = group[0], group[-1]
+        old = _range(first[1], last[2])
+        new = _range(first[3], last[4])
+        yield f"@@ -{old} +{new} @@{lineterm}"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                yield from (f" {line}" for line in a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                yield from (f"-{line}" for line in a[i1:i2])
+            if tag in ("replace", "insert"):
+                yield from (f"+{line}" for line in b[j1:j2])
@@ -1,52 +1,114 @@
 import os
 from pathlib import Path
-from typing import List, Sequence
+from typing import Optional, Sequence, Set
 
-from dynpy.core import factory, reader
-from dynpy.core.context import DynamoFileContext
-from dynpy.core.handler import ConvertHandler
-from dynpy.core.models import CodeNode, ContentNode, SourceConfig
+from dynpy.core import factory, lock, reader
+from dynpy.core.handler import ConvertJob
+from dynpy.core.models import ContentNode
+from dynpy.core.summary import load_graph_summary
+from dynpy.service import events as evt
+from dynpy.service.events import NO_EVENTS, ConvertEvents
+from dynpy.service.index import ExportIndex, code_hash
+from dynpy.service.report import RunReport
 
 
-def _get_code_nodes(context: DynamoFileContext) -> List[CodeNode]:
-    return [factory.code_node(node=node) for node in context.code_nodes]
+def _create_parent(path: Path) -> None:
+    if not path.parent.exists():
+        os.makedirs(path.parent, exist_ok=True)
+
 
+def _unchanged(
+    node: ContentNode, output: Path, events: ConvertEvents, index: ExportIndex
+) -> None:
+    index.keep(node, output)
+    if events.enabled:
+        events.emit(evt.NODE_UNCHANGED, path=node.path, node=node.node_id)
 
-def content_nodes(context: DynamoFileContext) -> List[ContentNode]:
-    nodes = []
-    view_maps = context.views_mapping
-    for node in _get_code_nodes(context):
-        view = view_maps.get(node.node_id)
-        if view is None:
-            raise Exception(f"No view found for node {node.node_id}")
-        nodes.append(
-            factory.content_node(node=node, view=view, path=context.path)
+
+def _create_py_file(
+    node: ContentNode,
+    job: ConvertJob,
+    events: ConvertEvents,
+    index: Optional[ExportIndex] = None,
+):
+    hits: Optional[Set[str]] = None
+    is_current = False
+    output = job.source.export_file_path(node)
+    if index is not None:
+        digest = code_hash(node)
+        is_current = index.is_current(digest, output)
+        if is_current and len(index.added) == 0:
+            _unchanged(node, output, events, index)
+            return
+        hits = set()
+    with events.phase(evt.PHASE_TRANSFORM):
+        action_func = job.scoped_action(node.code_engine, node.path, hits)
+        code_lines = factory.code_to_python(
+            node=node, action_func=action_func
+        )
+    if index is not None and is_current and index.added.isdisjoint(hits):
+        _unchanged(node, output, events, index)
+        return
+    if events.enabled:
+        events.emit(
+            evt.NODE_TRANSFORMED,
+            path=node.path,
+            node=node.node_id,
+            lines=len(code_lines),
+        )
+    with events.phase(evt.PHASE_WRITE):
+        _create_parent(output)
+        with lock.file_lock(output):
+            reader.write_python(path=output, content=code_lines)
+    if index is not None:
+        index.update(node, digest, output, hits)
+    if events.enabled:
+        events.emit(
+            evt.FILE_WRITTEN, path=output, bytes=evt.file_size(output)
         )
-    return nodes
 
 
-def _get_python_path(node: ContentNode, source: SourceConfig) -> Path:
-    path = source.export_file_path(node)
-    if not path.parent.exists():
-        os.makedirs(path.parent, exist_ok=True)
-    return path
+def _create_python_files(
+    nodes: Sequence[ContentNode],
+    job: ConvertJob,
+    events: ConvertEvents,
+    index: Optional[ExportIndex] = None,
+):
+    for node in nodes:
+        _create_py_file(node, job=job, events=events, index=index)
 
 
-def _create_py_file(node: ContentNode, handler: ConvertHandler):
-    code_lines = factory.code_to_python(
-        node=node, action_func=handler.apply_action
-    )
-    path = _get_python_path(node, handler.source)
-    reader.write_python(path=path, content=code_lines)
+def convert_file(
+    job: ConvertJob,
+    dyn_file: Path,
+    events: ConvertEvents = NO_EVENTS,
+    index: Optional[ExportIndex] = None,
+) -> None:
+    """Export the python nodes of a Dynamo file.
 
+    With an index only the nodes it does not know as current are
+    written, the index is updated but not saved."""
+    with events.phase(evt.PHASE_PARSE):
+        summary, parsed = load_graph_summary(dyn_file)
+    with events.phase(evt.PHASE_EXTRACT):
+        nodes = list(summary.nodes)
+    if events.enabled:
+        # Graphs served by a cache count as cached, not as read
+        events.emit(
+            evt.FILE_READ,
+            path=dyn_file,
+            bytes=summary.size if parsed else 0,
+            cached_bytes=0 if parsed else summary.size,
+            nodes=len(nodes),
+        )
+    _create_python_files(nodes, job, events, index)
 
-def _create_python_files(nodes: Sequence[ContentNode], handler: ConvertHandler):
-    for node in nodes:
-        _create_py_file(node, handler=handler)
 
+def to_python(
+    job: ConvertJob, events: ConvertEvents = NO_EVENTS
+) -> RunReport:
+    """Export the python files of the job through ``batch.run``."""
+    # Imported here, batch imports this module
+    from dynpy.service import batch
 
-def to_python(handler: ConvertHandler):
-    for dyn_file in handler.source.source_files():
-        with DynamoFileContext(dyn_file, save=False) as ctx:
-            nodes = content_nodes(ctx)
-        _create_python_files(nodes, handler)
+    return batch.run([job], events=events)
@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Iterable, Iterator, Set, TextIO
+
+SCAN_STARTED = "scan_started"
+SCAN_FINISHED = "scan_finished"
+FILE_READ = "file_read"
+NODE_TRANSFORMED = "node_transformed"
+NODE_UNCHANGED = "node_unchanged"
+FILE_WRITTEN = "file_written"
+FILE_SKIPPED = "file_skipped"
+ERROR = "error"
+
+PHASE_SCAN = "scan"
+PHASE_PARSE = "parse"
+PHASE_EXTRACT = "extract"
+PHASE_TRANSFORM = "transform"
+PHASE_WRITE = "write"
+PHASES = (
+    PHASE_SCAN,
+    PHASE_PARSE,
+    PHASE_EXTRACT,
+    PHASE_TRANSFORM,
+    PHASE_WRITE,
+)
+
+_NO_PHASE = nullcontext()
+
+
+def file_size(path: Path) -> int:
+    return path.stat().st_size if path.exists() else 0
+
+
+class ConvertEvents:
+    """Receives the events of a conversion, the base ignores them.
+
+    Callers check ``enabled`` before building an event, so a run without
+    an event stream does not pay for the event payloads. ``phase`` wraps
+    one phase of the work on a file and does nothing by default."""
+
+    enabled: bool = False
+
+    def emit(self, event: str, **fields: Any) -> None:
+        pass
+
+    def phase(self, name: str) -> ContextManager[None]:
+        return _NO_PHASE
+
+
+NO_EVENTS = ConvertEvents()
+
+
+class NdjsonEvents(ConvertEvents):
+    """Writes one JSON object per event and line to the stream."""
+
+    enabled = True
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields: Any) -> None:
+        record = {"event": event, "time": time.monotonic(), **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._stream.write(f"{line}\n")
+
+
+class WrittenFiles(ConvertEvents):
+    """Collects the paths of the files a conversion wrote."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.paths: Set[Path] = set()
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields: Any) -> None:
+        if event != FILE_WRITTEN:
+            return
+        with self._lock:
+            self.paths.add(Path(fields["path"]))
+
+
+class EventGroup(ConvertEvents):
+    """Passes the events and phases on to every sink of the group."""
+
+    def __init__(self, sinks: Iterable[ConvertEvents]) -> None:
+        self._sinks = list(sinks)
+        self.enabled = any(sink.enabled for sink in self._sinks)
+
+    def emit(self, event: str, **fields: Any) -> None:
+        for sink in self._sinks:
+            if sink.enabled:
+                sink.emit(event, **fields)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        with ExitStack() as stack:
+            for sink in self._sinks:
+                stack.enter_context(sink.phase(name))
+            yield
+
+
+def ndjson_events(file_descriptor: int) -> NdjsonEvents:
+    stream = open(
+        file_descriptor, mode="w", encoding="utf8", buffering=1, closefd=False
+    )
+    return NdjsonEvents(stream)
@@ -0,0 +1,217 @@
+"""Index of an export directory to re-export only the affected nodes.
+
+For every exported node the index keeps the hash of its code, the stamp
+of the written python file and the ids of the rules that matched one of
+its lines. A node has to be converted again if its code or python file
+changed, if a rule it matched was removed or edited, or if an added or
+edited rule matches it now. All other nodes keep their python file."""
+
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from dynpy.core import lock, reader
+from dynpy.core.models import ContentNode
+
+log = logging.getLogger(__name__)
+
+INDEX_NAME = ".dynpy-index.json"
+INDEX_VERSION = 1
+
+Stamp = Tuple[int, int]
+
+
+def code_hash(node: ContentNode) -> str:
+    content = f"{node.node_info!r}\n{node.code}"
+    return hashlib.sha1(content.encode("utf8")).hexdigest()
+
+
+def file_stamp(path: Path) -> Optional[Stamp]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def index_path(root: Path) -> Path:
+    return root / INDEX_NAME
+
+
+@dataclass(frozen=True)
+class NodeEntry:
+    graph: str
+    code_hash: str
+    stamp: Optional[Stamp]
+    rules: FrozenSet[str]
+
+    def to_dict(self, rule_numbers: Mapping[str, int]) -> Dict[str, Any]:
+        return {
+            "graph": self.graph,
+            "code": self.code_hash,
+            "stamp": None if self.stamp is None else list(self.stamp),
+            "rules": sorted(rule_numbers[rule] for rule in self.rules),
+        }
+
+    @classmethod
+    def from_dict(
+        cls, content: Mapping[str, Any], rules: List[str]
+    ) -> "NodeEntry":
+        stamp = content["stamp"]
+        return cls(
+            graph=content["graph"],
+            code_hash=content["code"],
+            stamp=None if stamp is None else (stamp[0], stamp[1]),
+            rules=frozenset(rules[number] for number in content["rules"]),
+        )
+
+
+def _read_index(path: Path) -> Tuple[List[str], Dict[str, NodeEntry]]:
+    if not path.exists():
+        return [], {}
+    try:
+        content = reader.read_config(path)
+        if content.get("version") != INDEX_VERSION:
+            log.info("Index %s has another version, ignored", path)
+            return [], {}
+        rules = list(content["rules"])
+        entries = {
+            output: NodeEntry.from_dict(entry, rules)
+            for output, entry in content["nodes"].items()
+        }
+    except (ValueError, KeyError, IndexError, TypeError) as ex:
+        log.warning("Index %s is invalid, ignored: %s", path, ex)
+        return [], {}
+    return rules, entries
+
+
+class ExportIndex:
+    """Decides which nodes of an export directory need a new export.
+
+    The entries are keyed by the python file of the node. One index is
+    shared by all workers exporting into the directory, it is only
+    written by ``save`` once the run is done."""
+
+    def __init__(
+        self,
+        root: Path,
+        rules: Iterable[str],
+        previous_rules: Iterable[str] = (),
+        entries: Optional[Dict[str, NodeEntry]] = None,
+    ) -> None:
+        self.root = root
+        self.rules = list(dict.fromkeys(rules))
+        self.previous_rules = list(previous_rules)
+        self.entries = {} if entries is None else entries
+        current = set(self.rules)
+        previous = set(self.previous_rules)
+        self.added = frozenset(current - previous)
+        self.removed = frozenset(previous - current)
+        self._seen_outputs: Set[str] = set()
+        self._seen_graphs: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root: Path, rules: Iterable[str]) -> "ExportIndex":
+        previous_rules, entries = _read_index(index_path(root))
+        return cls(root, rules, previous_rules, entries)
+
+    def _current_entry(
+        self, digest: str, output: Path
+    ) -> Optional[NodeEntry]:
+        with self._lock:
+            entry = self.entries.get(str(output))
+        if entry is None or entry.code_hash != digest:
+            return None
+        if entry.stamp is None or entry.stamp != file_stamp(output):
+            return None
+        if not self.removed.isdisjoint(entry.rules):
+            return None
+        return entry
+
+    def is_current(self, digest: str, output: Path) -> bool:
+        """Whether the python file is up to date, apart from added rules."""
+        return self._current_entry(digest, output) is not None
+
+    def keep(self, node: ContentNode, output: Path) -> None:
+        with self._lock:
+            self._seen_outputs.add(str(output))
+            self._seen_graphs.add(str(node.path))
+
+    def update(
+        self, node: ContentNode, digest: str, output: Path, hits: Set[str]
+    ) -> None:
+        entry = NodeEntry(
+            graph=str(node.path),
+            code_hash=digest,
+            stamp=file_stamp(output),
+            rules=frozenset(hits),
+        )
+        with self._lock:
+            self.entries[str(output)] = entry
+        self.keep(node, output)
+
+    def _is_stale(self, output: str, entry: NodeEntry) -> bool:
+        if output in self._seen_outputs:
+            return False
+        if entry.graph in self._seen_graphs:
+            return True
+        return not Path(entry.graph).exists()
+
+    def _valid_entries(self) -> Dict[str, NodeEntry]:
+        """Collect the entries that are still valid for the current rules.
+
+        Entries of nodes not exported in this run may miss added rules,
+        unless another process, like another shard, already wrote them
+        with the current rules."""
+        entries: Dict[str, NodeEntry] = {}
+        if len(self.added) == 0:
+            known = set(self.rules)
+            entries.update(
+                (output, entry)
+                for output, entry in self.entries.items()
+                if entry.rules <= known
+            )
+        rules, saved = _read_index(index_path(self.root))
+        if rules == self.rules:
+            entries.update(saved)
+        entries.update(
+            (output, self.entries[output]) for output in self._seen_outputs
+        )
+        return {
+            output: entry
+            for output, entry in entries.items()
+            if not self._is_stale(output, entry)
+        }
+
+    def save(self) -> None:
+        path = index_path(self.root)
+        with lock.run_locks([self.root], exclusive=True):
+            entries = self._valid_entries()
+            numbers = {rule: number for number, rule in enumerate(self.rules)}
+            content = {
+                "version": INDEX_VERSION,
+                "rules": self.rules,
+                "nodes": {
+                    output: entry.to_dict(numbers)
+                    for output, entry in entries.items()
+                },
+            }
+            temp_path = path.with_name(f"{path.name}.tmp")
+            reader.write_config(temp_path, content)
+            os.replace(temp_path, path)
+        log.info("Saved index of %d nodes to %s", len(entries), path)
@@ -0,0 +1,216 @@
+"""Per phase CPU and memory profile of a conversion.
+
+Every phase gets its own cProfile profile. Nested phases pause the outer
+phase, so each phase only counts its own work. A sampling thread records
+the stacks of the threads inside a phase for flame graphs, and
+tracemalloc measures the peak memory of every phase call."""
+
+import cProfile
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, Iterator, List, Optional
+
+from dynpy.service.events import ConvertEvents
+
+log = logging.getLogger(__name__)
+
+STACKS_FILE = "stacks.collapsed"
+MEMORY_FILE = "memory.json"
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    wall_time: float = 0.0
+    peak_bytes: int = 0
+    top_allocations: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "wall_time": self.wall_time,
+            "peak_bytes": self.peak_bytes,
+            "top_allocations": self.top_allocations,
+        }
+
+
+@dataclass
+class _ActivePhase:
+    name: str
+    profile: Optional[cProfile.Profile]
+    started: float
+    start_bytes: int
+    peak_bytes: int = 0
+    wall_time: float = 0.0
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _collapsed_stack(phase: str, frame: Optional[FrameType]) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(phase)
+    return ";".join(reversed(names))
+
+
+class ProfileEvents(ConvertEvents):
+    """Profiles the phases of a run and writes the results to a directory.
+
+    Use it as a context manager around the run. The directory gets one
+    ``<phase>.pstats`` file per phase, the sampled stacks in collapsed
+    format and the memory peaks and top allocations of every phase."""
+
+    def __init__(
+        self, directory: Path, interval: float = 0.005, top: int = 20
+    ) -> None:
+        self.directory = directory
+        self.interval = interval
+        self.top = top
+        self.stats: Dict[str, PhaseStats] = {}
+        self.samples: Counter = Counter()
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._active: Dict[int, List[_ActivePhase]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ProfileEvents":
+        tracemalloc.start()
+        self._stop.clear()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name="dynpy-profile", daemon=True
+        )
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        tracemalloc.stop()
+        self.save()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                phases = {
+                    ident: stack[-1].name
+                    for ident, stack in self._active.items()
+                    if len(stack) > 0
+                }
+            for ident, phase in phases.items():
+                stack = _collapsed_stack(phase, frames.get(ident))
+                self.samples[stack] += 1
+
+    def _stack(self) -> List[_ActivePhase]:
+        with self._lock:
+            return self._active.setdefault(threading.get_ident(), [])
+
+    def _enable(self, name: str) -> Optional[cProfile.Profile]:
+        profile = self._profiles.setdefault(name, cProfile.Profile())
+        try:
+            profile.enable()
+        except ValueError:
+            # Only one profiler can be active, a parallel phase goes without
+            return None
+        return profile
+
+    def _pause(self, active: _ActivePhase) -> None:
+        if active.profile is not None:
+            active.profile.disable()
+        active.wall_time += time.perf_counter() - active.started
+        _, peak = tracemalloc.get_traced_memory()
+        active.peak_bytes = max(active.peak_bytes, peak)
+
+    def _resume(self, active: _ActivePhase) -> None:
+        active.profile = self._enable(active.name)
+        active.started = time.perf_counter()
+        tracemalloc.reset_peak()
+
+    def _top_allocations(self) -> List[Dict[str, Any]]:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ]
+        )
+        return [
+            {
+                "location": str(stat.traceback),
+                "size": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[: self.top]
+        ]
+
+    def _record(self, active: _ActivePhase) -> None:
+        with self._lock:
+            stats = self.stats.setdefault(active.name, PhaseStats())
+            stats.calls += 1
+            stats.wall_time += active.wall_time
+            peak = active.peak_bytes - active.start_bytes
+            if peak <= stats.peak_bytes and stats.calls > 1:
+                return
+            stats.peak_bytes = max(stats.peak_bytes, peak)
+            stats.top_allocations = self._top_allocations()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        stack = self._stack()
+        if len(stack) > 0:
+            self._pause(stack[-1])
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        active = _ActivePhase(
+            name=name,
+            profile=None,
+            started=time.perf_counter(),
+            start_bytes=current,
+        )
+        with self._lock:
+            stack.append(active)
+        active.profile = self._enable(name)
+        try:
+            yield
+        finally:
+            self._pause(active)
+            with self._lock:
+                stack.pop()
+            self._record(active)
+            if len(stack) > 0:
+                outer = stack[-1]
+                outer.peak_bytes = max(outer.peak_bytes, active.peak_bytes)
+                self._resume(outer)
+
+    def save(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for name, profile in self._profiles.items():
+            if name in self.stats:
+                profile.dump_stats(self.directory / f"{name}.pstats")
+        lines = [f"{stack} {count}\n" for stack, count in self.samples.items()]
+        (self.directory / STACKS_FILE).write_text(
+            "".join(lines), encoding="utf8"
+        )
+        memory = {name: stats.to_dict() for name, stats in self.stats.items()}
+        (self.directory / MEMORY_FILE).write_text(
+            json.dumps(memory, indent=2), encoding="utf8"
+        )
+        log.info(
+            "Profile of %d phases in %s", len(self.stats), self.directory
+        )
@@ -0,0 +1,32 @@
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class ConvertProgress:
+    done: int
+    total: int
+    path: Optional[Path] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.done >= self.total
+
+
+ProgressCallback = Callable[[ConvertProgress], None]
+
+
+class CancelToken:
+    """Requests to stop a conversion at the next file boundary."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
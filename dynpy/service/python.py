@@ -1,46 +1,51 @@
 import logging
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Dict, Iterable, List, Mapping
 
 from dynpy.core import factory
 from dynpy.core.context import DynamoFileContext
-from dynpy.core.handler import ConvertHandler
+from dynpy.core.handler import ConvertJob
 from dynpy.core.models import PythonFile
+from dynpy.service import events as evt
+from dynpy.service.events import NO_EVENTS, ConvertEvents
+from dynpy.service.report import RunReport
 
 log = logging.getLogger(__name__)
 
 
-def _create_python_files(handler: ConvertHandler) -> List[PythonFile]:
-    source = handler.source
-    return [
-        factory.python_file(path, handler.apply_action)
-        for path in source.export_files()
-    ]
+def python_file(job: ConvertJob, path: Path) -> PythonFile:
+    return factory.python_file(path, job.info_action)
+
+
+def export_path_group(job: ConvertJob) -> Dict[Path, List[Path]]:
+    """The exported python files of the source by their directory."""
+    groups: Dict[Path, List[Path]] = {}
+    for path in job.source.export_files():
+        groups.setdefault(path.parent, []).append(path)
+    return groups
 
 
 def python_file_group(
-    handler: ConvertHandler,
+    job: ConvertJob,
+) -> Mapping[Path, List[PythonFile]]:
+    return {
+        directory: [python_file(job, path) for path in paths]
+        for directory, paths in export_path_group(job).items()
+    }
+
+
+def dynamo_file_group(
+    py_files: Iterable[PythonFile],
 ) -> Mapping[Path, List[PythonFile]]:
-    py_map = {}
-    for python in _create_python_files(handler):
-        py_path = python.path.parent
-        if py_path not in py_map:
-            py_map[py_path] = []
-        py_map[py_path].append(python)
-    return py_map
-
-
-def _dynamo_file_group(
-    handler: ConvertHandler,
-) -> Mapping[Path, Iterable[PythonFile]]:
     dyn_map: Dict[Path, List[PythonFile]] = {}
-    for python in _create_python_files(handler):
+    for python in py_files:
         if python.info is None:
-            log.warning(f"Python file {python.path} has no info")
+            log.warning("Python file %s has no info", python.path)
             continue
         dyn_path = python.dynamo_path
         if not dyn_path.exists():
-            log.warning(f"Dynamo file {dyn_path} does not exist")
+            log.warning("Dynamo file %s does not exist", dyn_path)
             continue
         if dyn_path not in dyn_map:
             dyn_map[dyn_path] = []
@@ -49,16 +54,47 @@ def _dynamo_file_group(
 
 
 def replace_code_in(
-    py_files: Iterable[PythonFile], context: DynamoFileContext
+    py_files: Iterable[PythonFile],
+    context: DynamoFileContext,
+    events: ConvertEvents = NO_EVENTS,
 ) -> None:
     for py_file in py_files:
         if py_file.info is None:
             continue
         node_id = py_file.info.uuid
         context.replace_code(node_id, py_file.code)
+        if events.enabled:
+            events.emit(
+                evt.NODE_TRANSFORMED,
+                path=context.path,
+                node=node_id,
+                lines=len(py_file.code_lines),
+            )
+
+
+def convert_file(
+    path: Path,
+    py_files: Iterable[PythonFile],
+    events: ConvertEvents = NO_EVENTS,
+) -> None:
+    with ExitStack() as stack:
+        with events.phase(evt.PHASE_PARSE):
+            ctx = stack.enter_context(DynamoFileContext(path=path))
+        if events.enabled:
+            events.emit(evt.FILE_READ, path=path, bytes=evt.file_size(path))
+        with events.phase(evt.PHASE_TRANSFORM):
+            replace_code_in(py_files, ctx, events)
+        with events.phase(evt.PHASE_WRITE):
+            stack.close()
+    if events.enabled:
+        events.emit(evt.FILE_WRITTEN, path=path, bytes=evt.file_size(path))
+
 
+def to_dynamo(
+    job: ConvertJob, events: ConvertEvents = NO_EVENTS
+) -> RunReport:
+    """Import the python files of the job through ``batch.run``."""
+    # Imported here, batch imports this module
+    from dynpy.service import batch
 
-def to_dynamo(handler: ConvertHandler):
-    for path, files in _dynamo_file_group(handler).items():
-        with DynamoFileContext(path=path) as ctx:
-            replace_code_in(files, ctx)
+    return batch.run([job], events=events)
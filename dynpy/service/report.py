@@ -0,0 +1,343 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+)
+
+from dynpy.core import reader
+from dynpy.core.handler import Direction
+from dynpy.core.rules import RuleStats, merge_rule_stats
+from dynpy.service import events as evt
+from dynpy.service.events import NO_EVENTS, ConvertEvents
+
+log = logging.getLogger(__name__)
+
+SLOWEST_FILES = 10
+
+
+@dataclass
+class RunReport:
+    direction: Direction
+    sources: List[str]
+    files: int = 0
+    converted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    wall_time: float = 0.0
+    shards: List[str] = field(default_factory=list)
+    nodes_read: int = 0
+    nodes_written: int = 0
+    # Nodes an incremental export left untouched
+    nodes_unchanged: int = 0
+    bytes_read: int = 0
+    # Bytes of graphs served by the graph or extract cache instead
+    bytes_cached: int = 0
+    bytes_written: int = 0
+    # Seconds spent per phase, summed over all workers
+    phase_times: Dict[str, float] = field(default_factory=dict)
+    slowest_files: List[Dict[str, Any]] = field(default_factory=list)
+    caches: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    rules: List[RuleStats] = field(default_factory=list)
+
+    def add_converted(
+        self, path: Optional[Path] = None, seconds: float = 0.0
+    ) -> None:
+        self.converted += 1
+        if path is not None:
+            self._add_slowest([{"path": str(path), "seconds": seconds}])
+
+    def _add_slowest(self, files: Iterable[Dict[str, Any]]) -> None:
+        slowest = self.slowest_files + list(files)
+        slowest.sort(key=lambda file: file["seconds"], reverse=True)
+        self.slowest_files = slowest[:SLOWEST_FILES]
+
+    def add_phase_time(self, phase: str, seconds: float) -> None:
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+
+    def add_cache(self, name: str, hits: int, misses: int) -> None:
+        cache = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+        cache["hits"] += hits
+        cache["misses"] += misses
+
+    def cache_hit_rate(self, name: str) -> float:
+        cache = self.caches.get(name, {})
+        lookups = cache.get("hits", 0) + cache.get("misses", 0)
+        return 0.0 if lookups == 0 else cache["hits"] / lookups
+
+    def add_duplicate(self) -> None:
+        self.duplicates += 1
+
+    def add_failed(self, path: Path, error: Exception) -> None:
+        self.failed += 1
+        self.errors[str(path)] = str(error)
+
+    def add_cancelled(self) -> None:
+        self.cancelled += 1
+
+    @property
+    def done(self) -> int:
+        return self.converted + self.failed + self.cancelled
+
+    @property
+    def skipped(self) -> int:
+        return self.duplicates + self.cancelled
+
+    @property
+    def was_cancelled(self) -> bool:
+        return self.cancelled > 0
+
+    @property
+    def has_failed(self) -> bool:
+        return self.failed > 0
+
+    def summary(self) -> List[str]:
+        lines = [f"Converted {self.direction.value} {', '.join(self.sources)}"]
+        if len(self.shards) > 0:
+            lines.append(f"- Shards {', '.join(self.shards)}")
+        lines.append(f"- {self.files:>6} Files planned")
+        lines.append(f"- {self.converted:>6} Files converted")
+        lines.append(f"- {self.duplicates:>6} Duplicate files skipped")
+        lines.append(f"- {self.failed:>6} Files failed")
+        if self.was_cancelled:
+            lines.append(f"- {self.cancelled:>6} Files cancelled")
+        lines.append(f"- {self.nodes_read:>6} Nodes read")
+        lines.append(f"- {self.nodes_written:>6} Nodes written")
+        if self.nodes_unchanged > 0:
+            lines.append(f"- {self.nodes_unchanged:>6} Nodes unchanged")
+        lines.append(f"- {_mebibytes(self.bytes_read):>6.2f} MiB read")
+        if self.bytes_cached > 0:
+            cached = _mebibytes(self.bytes_cached)
+            lines.append(f"- {cached:>6.2f} MiB served from cache")
+        lines.append(f"- {_mebibytes(self.bytes_written):>6.2f} MiB written")
+        lines.append(f"- {self.wall_time:>6.2f} Seconds")
+        for phase, seconds in self.phase_times.items():
+            lines.append(f"  - {seconds:>6.2f} Worker seconds {phase}")
+        for name in self.caches:
+            rate = self.cache_hit_rate(name) * 100
+            lines.append(f"- {rate:>6.1f} % {name} cache hits")
+        if len(self.slowest_files) > 0:
+            lines.append("Slowest files:")
+        for file in self.slowest_files[:3]:
+            lines.append(f"- {file['seconds']:>6.2f} Seconds {file['path']}")
+        lines.extend(self._rule_summary())
+        return lines
+
+    def _rule_summary(self) -> List[str]:
+        if len(self.rules) == 0:
+            return []
+        lines = ["Slowest rules:"]
+        for rule in self.rules[:5]:
+            lines.append(
+                f"- {rule.seconds * 1000:>6.1f} ms {rule.action} {rule.kind} "
+                f"'{rule.pattern}' {rule.hits}/{rule.examined} lines"
+            )
+        dead = [rule for rule in self.rules if rule.is_dead]
+        if len(dead) > 0:
+            lines.append("Rules without hits:")
+        for rule in dead:
+            lines.append(f"- {rule.action} {rule.kind} '{rule.pattern}'")
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "direction": self.direction.value,
+            "sources": self.sources,
+            "files": self.files,
+            "converted": self.converted,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "wall_time": self.wall_time,
+            "shards": self.shards,
+            "nodes_read": self.nodes_read,
+            "nodes_written": self.nodes_written,
+            "nodes_unchanged": self.nodes_unchanged,
+            "bytes_read": self.bytes_read,
+            "bytes_cached": self.bytes_cached,
+            "bytes_written": self.bytes_written,
+            "phase_times": self.phase_times,
+            "slowest_files": self.slowest_files,
+            "caches": self.caches,
+            "rules": [rule.to_dict() for rule in self.rules],
+        }
+
+    @classmethod
+    def from_dict(cls, content: Mapping[str, Any]) -> "RunReport":
+        return cls(
+            direction=Direction(content["direction"]),
+            sources=list(content["sources"]),
+            files=content["files"],
+            converted=content["converted"],
+            duplicates=content["duplicates"],
+            failed=content["failed"],
+            cancelled=content.get("cancelled", 0),
+            errors=dict(content["errors"]),
+            wall_time=content["wall_time"],
+            shards=list(content.get("shards", [])),
+            nodes_read=content.get("nodes_read", 0),
+            nodes_written=content.get("nodes_written", 0),
+            nodes_unchanged=content.get("nodes_unchanged", 0),
+            bytes_read=content.get("bytes_read", 0),
+            bytes_cached=content.get("bytes_cached", 0),
+            bytes_written=content.get("bytes_written", 0),
+            phase_times=dict(content.get("phase_times", {})),
+            slowest_files=list(content.get("slowest_files", [])),
+            caches={
+                name: dict(cache)
+                for name, cache in content.get("caches", {}).items()
+            },
+            rules=[
+                RuleStats.from_dict(rule) for rule in content.get("rules", [])
+            ],
+        )
+
+    def merge(self, other: "RunReport") -> None:
+        if other.direction != self.direction:
+            raise ValueError(
+                f"Cannot merge {other.direction} into {self.direction} report"
+            )
+        self.sources.extend(
+            src for src in other.sources if src not in self.sources
+        )
+        self.files += other.files
+        self.converted += other.converted
+        # Every shard plans all sources and skips the same duplicates
+        self.duplicates = max(self.duplicates, other.duplicates)
+        self.failed += other.failed
+        self.cancelled += other.cancelled
+        self.errors.update(other.errors)
+        # Shards run side by side, the slowest one defines the wall time
+        self.wall_time = max(self.wall_time, other.wall_time)
+        self.shards.extend(other.shards)
+        self.nodes_read += other.nodes_read
+        self.nodes_written += other.nodes_written
+        self.nodes_unchanged += other.nodes_unchanged
+        self.bytes_read += other.bytes_read
+        self.bytes_cached += other.bytes_cached
+        self.bytes_written += other.bytes_written
+        for phase, seconds in other.phase_times.items():
+            self.add_phase_time(phase, seconds)
+        self._add_slowest(other.slowest_files)
+        for name, cache in other.caches.items():
+            self.add_cache(name, cache["hits"], cache["misses"])
+        self.rules = merge_rule_stats(self.rules, other.rules)
+
+    def save(self, path: Path) -> None:
+        reader.write_config(path, self.to_dict())
+
+
+def _mebibytes(size: int) -> float:
+    return size / (1024 * 1024)
+
+
+class _PhaseTimer:
+    """Times one phase into the stats and enters the phase of a sink."""
+
+    __slots__ = ("_stats", "_name", "_phase", "_start")
+
+    def __init__(
+        self, stats: "TaskStats", name: str, phase: ContextManager[None]
+    ) -> None:
+        self._stats = stats
+        self._name = name
+        self._phase = phase
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._phase.__enter__()
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> Optional[bool]:
+        seconds = time.perf_counter() - self._start
+        phase_times = self._stats.phase_times
+        phase_times[self._name] = phase_times.get(self._name, 0.0) + seconds
+        return self._phase.__exit__(*exc_info)
+
+
+class TaskStats(ConvertEvents):
+    """Counts the nodes, bytes and phase times of a single task.
+
+    Every task counts into stats of its own without locking, the run
+    adds them to its report on the calling thread. The events are passed
+    on to ``events`` if that sink is enabled."""
+
+    enabled = True
+
+    def __init__(self, events: ConvertEvents = NO_EVENTS) -> None:
+        self._events = events
+        self.nodes_read = 0
+        self.nodes_written = 0
+        self.nodes_unchanged = 0
+        self.bytes_read = 0
+        self.bytes_cached = 0
+        self.bytes_written = 0
+        self.phase_times: Dict[str, float] = {}
+
+    def emit(self, event: str, **fields: Any) -> None:
+        if event == evt.FILE_READ:
+            self.bytes_read += fields.get("bytes", 0)
+            self.bytes_cached += fields.get("cached_bytes", 0)
+            self.nodes_read += fields.get("nodes", 0)
+        elif event == evt.FILE_WRITTEN:
+            self.bytes_written += fields.get("bytes", 0)
+        elif event == evt.NODE_TRANSFORMED:
+            self.nodes_written += 1
+        elif event == evt.NODE_UNCHANGED:
+            self.nodes_unchanged += 1
+        if self._events.enabled:
+            self._events.emit(event, **fields)
+
+    def phase(self, name: str) -> ContextManager[None]:
+        return _PhaseTimer(self, name, self._events.phase(name))
+
+    def add_to(self, report: RunReport) -> None:
+        report.nodes_read += self.nodes_read
+        report.nodes_written += self.nodes_written
+        report.nodes_unchanged += self.nodes_unchanged
+        report.bytes_read += self.bytes_read
+        report.bytes_cached += self.bytes_cached
+        report.bytes_written += self.bytes_written
+        for phase, seconds in self.phase_times.items():
+            report.add_phase_time(phase, seconds)
+
+
+def read_report(path: Path) -> RunReport:
+    return RunReport.from_dict(reader.read_config(path))
+
+
+def _check_shards(shards: List[str]) -> None:
+    counts = {shard.split("/")[1] for shard in shards}
+    if len(counts) != 1:
+        log.warning("Reports of different shard counts merged: %s", shards)
+        return
+    count = int(counts.pop())
+    expected = {f"{idx}/{count}" for idx in range(1, count + 1)}
+    if len(shards) != len(set(shards)):
+        log.warning("Reports contain duplicate shards: %s", shards)
+    missing = expected.difference(shards)
+    if len(missing) > 0:
+        log.warning("Reports of shards %s are missing", sorted(missing))
+
+
+def merge_reports(paths: Iterable[Path]) -> Optional[RunReport]:
+    merged = None
+    for path in paths:
+        report = read_report(path)
+        if merged is None:
+            merged = report
+        else:
+            merged.merge(report)
+    if merged is not None and len(merged.shards) > 0:
+        _check_shards(merged.shards)
+    return merged
@@ -50,12 +50,12 @@ class DynPyAppView(tk.Tk):
         self.current_view: Optional[AAppView] = None
         self.grid_columnconfigure(**args.column_args())
         self.grid_rowconfigure(**args.row_args())
-        app_views = [
+        self.app_views: List[AAppView] = [
             ConvertAppView(self),
             ConvertConfigAppView(self),
             CreateConvertConfigAppView(self),
         ]
-        self.frm_load = ConvertMenuFrame(self, app_views)
+        self.frm_load = ConvertMenuFrame(self, self.app_views)
         self.frm_load.grid(cnf=args.grid_args())
         self.setup_ui()
 
@@ -78,6 +78,11 @@ class DynPyAppView(tk.Tk):
             return False
         return self.service.can_save_config
 
+    def close(self):
+        for view in self.app_views:
+            view.close()
+        self.destroy()
+
     def switch_frame(self, view: AAppView):
         if self.current_view is None:
             self.frm_load.grid_forget()
@@ -93,3 +98,4 @@ class DynPyAppView(tk.Tk):
         icon_path = res.icon_path(res.DynPyResource.ICON_APP)
         self.iconphoto(True, tk.PhotoImage(file=icon_path))
         self.title("Dynamo <-> Python Convert")
+        self.protocol("WM_DELETE_WINDOW", self.close)
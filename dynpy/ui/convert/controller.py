@@ -1,19 +1,46 @@
+import bisect
 import logging
 import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
 from tkinter import font as tkf
+from tkinter import messagebox as msg
 from enum import Enum
-from typing import TYPE_CHECKING, Iterable, List, Optional, OrderedDict, Tuple
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    OrderedDict,
+    Tuple,
+)
 
-from dynpy.core import factory
 from dynpy.core.handler import ConvertHandler, Direction
-from dynpy.core.models import SourceConfig
-from dynpy.service import python
+from dynpy.service.events import WrittenFiles
+from dynpy.service.progress import CancelToken, ConvertProgress
+from dynpy.service.report import RunReport
+from dynpy.ui.convert.diff import (
+    FOLDED,
+    DiffSection,
+    diff_sections,
+    insert_args,
+)
+from dynpy.ui.convert.loader import (
+    EXPORT,
+    SOURCE,
+    LoadFinished,
+    ModelLoaded,
+    ModelLoader,
+)
 from dynpy.ui.convert.models import (
     AFileViewModel,
     ANodeViewModel,
-    ExportDirModel,
-    SourceFileModel,
+    connect_models,
 )
+from dynpy.ui.utils import QueuePoller
+from dynpy.ui.widget.progress_bar import ProgressBar
 
 if TYPE_CHECKING:
     from dynpy.ui.convert.view import ConvertAppView
@@ -29,6 +56,12 @@ class Tag(str, Enum):
     MULTIPLE = "multiple"
     ADDED = "added"
     REMOVED = "removed"
+    FOLDED = "folded"
+    PLACEHOLDER = "placeholder"
+
+
+def _unconnected(models: List[AFileViewModel]) -> List[AFileViewModel]:
+    return [model for model in models if model.other_model is None]
 
 
 class TagController:
@@ -74,11 +107,16 @@ def _create_tag_controller(default: tkf.Font) -> TagController:
         foreground="red",
         font=("monospace", 10),
     )
+    controller.add_tag(
+        Tag.FOLDED,
+        foreground="gray",
+        font=(default["family"], default["size"], tkf.ITALIC),
+    )
     return controller
 
 
 class ConvertController:
-    exclude_diff_line = ["@"]
+    diff_context = 3
     show_diff = "Show Diff?"
     hide_diff = "Hide Diff?"
 
@@ -98,6 +136,21 @@ class ConvertController:
         self.dyn_models: List[AFileViewModel] = []
         self.py_models: List[AFileViewModel] = []
         self.view_models: List[AFileViewModel] = []
+        self._progress_bar: Optional[ProgressBar] = None
+        self._convert_poller = QueuePoller(view, self._on_convert_message)
+        self._load_poller = QueuePoller(view, self._on_load_message)
+        self._loader = ModelLoader(self._load_poller.put)
+        self._written = WrittenFiles()
+        # Models reloaded by a refresh, None while loading everything
+        self._refreshed: Optional[List[ModelLoaded]] = None
+        self._by_path: Dict[Path, AFileViewModel] = {}
+        self._diff_poller = QueuePoller(view, self._on_diff_message)
+        self._diff_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="dynpy-diff"
+        )
+        self._diff_id = 0
+        self._diff_future: Optional[Future] = None
+        self._folded: Dict[str, DiffSection] = {}
 
         self.var_source_text = tk.StringVar(
             master=view.frm_menu, value="Source-Config:"
@@ -109,41 +162,119 @@ class ConvertController:
             master=view.frm_menu, value=self.show_diff
         )
         self.var_show_diff = tk.BooleanVar(master=view.frm_menu, value=False)
+        self.var_diff_context = tk.IntVar(
+            master=view.frm_menu, value=self.diff_context
+        )
 
     def clean_code_diff(self):
         self.view.txt_diff.delete("0.0", tk.END)
+        self._folded = {}
 
-    def _exclude_diff_line(self, line: str) -> bool:
-        for exclude in self.exclude_diff_line:
-            if line.startswith(exclude):
-                return True
-        return False
-
-    def _show_code_diff(self, code_diff_lines: Iterable[str]):
+    def _show_code_diff(self, sections: List[DiffSection]):
         self.clean_code_diff()
-        for line in code_diff_lines:
-            if self._exclude_diff_line(line):
+        if len(sections) == 0:
+            return
+        self._folded = {
+            f"{FOLDED}-{index}": section
+            for index, section in enumerate(sections)
+            if section.kind == FOLDED
+        }
+        self.view.txt_diff.insert(tk.END, *insert_args(sections))
+
+    def _expand_fold(self, event: tk.Event):
+        text = self.view.txt_diff
+        index = text.index(f"@{event.x},{event.y}")
+        for tag in text.tag_names(index):
+            section = self._folded.pop(tag, None)
+            if section is None:
                 continue
-            line = line.replace("\t", "    ")
-            if line.startswith("+"):
-                self.view.txt_diff.insert(tk.END, line, (Tag.ADDED))
-            elif line.startswith("-"):
-                self.view.txt_diff.insert(tk.END, line, (Tag.REMOVED))
-            else:
-                self.view.txt_diff.insert(tk.END, line)
+            start, end = text.tag_ranges(tag)
+            text.delete(start, end)
+            text.insert(start, section.text)
+        return "break"
 
     def setup_diff_tags(self):
-        for tag, config in self.tags_ctrl.tags(Tag.ADDED, Tag.REMOVED):
+        tags = (Tag.ADDED, Tag.REMOVED, Tag.FOLDED)
+        for tag, config in self.tags_ctrl.tags(*tags):
             self.view.txt_diff.tag_config(tag, **config)
+        text = self.view.txt_diff
+        text.tag_bind(FOLDED, "<Button-1>", self._expand_fold)
+        text.tag_bind(FOLDED, "<Enter>", lambda _: text.config(cursor="hand2"))
+        text.tag_bind(FOLDED, "<Leave>", lambda _: text.config(cursor=""))
+
+    def _context(self) -> int:
+        try:
+            return max(self.var_diff_context.get(), 0)
+        except tk.TclError:
+            return self.diff_context
+
+    def _compute_diff(
+        self,
+        source: Tuple[str, List[str]],
+        other: Tuple[str, List[str]],
+        context: int,
+        hashes: Tuple[int, int],
+    ) -> List[DiffSection]:
+        diff = self.service.code_diff(source, other, context, hashes)
+        return diff_sections(list(diff), source[1])
 
     def show_code_diff(self, source: Optional[ANodeViewModel]) -> None:
-        if source is None or source.other_node is None:
+        """Diff on a worker, only the latest selection is shown."""
+        self._diff_id += 1
+        if self._diff_future is not None:
+            self._diff_future.cancel()
+            self._diff_future = None
+        if (
+            source is None
+            or source.other_node is None
+            or not self.var_show_diff.get()
+        ):
+            self._diff_poller.stop()
             return
-        code_diff = self.service.code_diff(
-            source=source.file_and_code,
-            other=source.other_node.file_and_code,
+        diff_id = self._diff_id
+        # The hashes the node tags were computed from
+        hashes = (source.code_hash(), source.other_node.code_hash())
+        future = self._diff_executor.submit(
+            self._compute_diff,
+            source.file_and_code,
+            source.other_node.file_and_code,
+            self._context(),
+            hashes,
         )
-        self._show_code_diff(code_diff)
+        future.add_done_callback(
+            lambda done: self._diff_poller.put((diff_id, done))
+        )
+        self._diff_future = future
+        self._diff_poller.start()
+
+    def _on_diff_message(self, message: Tuple[int, Future]):
+        diff_id, future = message
+        if diff_id != self._diff_id or future.cancelled():
+            return
+        self._diff_poller.stop()
+        self._diff_future = None
+        error = future.exception()
+        if error is not None:
+            log.error("Failed to compute the diff", exc_info=error)
+            self.clean_code_diff()
+            return
+        self._show_code_diff(future.result())
+        log.debug("diff cache: %s", self.service.diff_stats())
+
+    def close(self) -> None:
+        """Stop polling and shut down the workers of the view."""
+        self._diff_id += 1
+        for poller in (
+            self._convert_poller,
+            self._load_poller,
+            self._diff_poller,
+        ):
+            poller.stop()
+        self._loader.shutdown()
+        self._diff_executor.shutdown(wait=False, cancel_futures=True)
+
+    def diff_context_command(self):
+        self.show_code_diff(self.view.lst_files.selected_code_node())
 
     def show_diff_command(self):
         if self.var_show_diff.get():
@@ -192,59 +323,128 @@ class ConvertController:
     def on_tree_select(self, event: tk.Event):
         if event.widget != self.view.lst_files.tree_files:
             return
+        if self.view.lst_files.placeholder_selected():
+            return
         selected = self.view.lst_files.selected_code_node()
         self.show_code_diff(selected)
 
-    def get_source_models(self, source: SourceConfig) -> List[AFileViewModel]:
-        source_callback = factory.dynamo_to_python_code
-        view_models = []
-        for path in source.source_files():
-            view_model = SourceFileModel(path, source.source_path)
-            if not view_model.has_children:
-                continue
-            view_model.update_code(func=source_callback)
-            view_models.append(view_model)
-        return sorted(view_models)
-
-    def get_export_models(
-        self, handler: ConvertHandler
-    ) -> List[AFileViewModel]:
-        view_models = []
-        source = handler.source
-        group_dyn_files = python.python_file_group(handler)
-        for path, children in group_dyn_files.items():
-            view_model = ExportDirModel(path, source.export_path, children)
-            if not view_model.has_children:
-                continue
-            view_models.append(view_model)
-        return sorted(view_models)
-
-    def _connected_model(
-        self, source: AFileViewModel, exports: List[AFileViewModel]
-    ) -> Optional[AFileViewModel]:
-        src_name = source.sub_path
-        for export in exports:
-            if export.sub_path != src_name:
-                continue
-            return export
-        return None
-
     def _connect_models(self):
-        not_connected = list(self.py_models)
-        for source in self.dyn_models:
-            export = self._connected_model(source, not_connected)
-            if export is None:
-                continue
-            source.connect_with(export)
-            not_connected.remove(export)
-        log.debug(f"not connected files: {not_connected}")
+        not_connected = connect_models(self.dyn_models, self.py_models)
+        log.debug("not connected files: %s", not_connected)
+
+    @property
+    def is_loading(self) -> bool:
+        return self._load_poller.running
 
     def create_source_and_export(self) -> None:
+        """Start loading the models, rows stream in as they are parsed."""
+        self.dyn_models = []
+        self.py_models = []
+        self._refreshed = None
         if self.current_handler is None:
             return
-        self.dyn_models = self.get_source_models(self.current_handler.source)
-        self.py_models = self.get_export_models(self.current_handler)
-        self._connect_models()
+        self._load_poller.start()
+        self._loader.load(self.current_handler.job())
+
+    def refresh_changed(self, paths: Iterable[Path]) -> None:
+        """Reload only the models of the files a conversion wrote.
+
+        A conversion writes the side that is not shown, so the reloaded
+        models only replace their old ones and the tags and the diff of
+        the shown rows are updated. The selection and the scroll
+        position are kept."""
+        if self.current_handler is None:
+            return
+        if self.is_loading and self._refreshed is None:
+            # Models still loading, a refresh would miss them
+            self.create_source_and_export()
+            return
+        job = self.current_handler.job()
+        paths = {path.resolve() for path in paths}
+        if self.service.direction == Direction.TO_PYTHON:
+            models = self.py_models
+            exports = {path.parent for path in paths}
+            self._loader.reload(job, exports=exports)
+        else:
+            models = self.dyn_models
+            self._loader.reload(job, sources=paths)
+        self._by_path = {model.path.resolve(): model for model in models}
+        self._refreshed = []
+        self._load_poller.start()
+        self.view.lst_files.text = self._title()
+
+    def _replace_model(
+        self,
+        models: List[AFileViewModel],
+        old: AFileViewModel,
+        new: AFileViewModel,
+    ):
+        partner = old.other_model
+        old.disconnect()
+        models[models.index(old)] = new
+        if partner is not None:
+            new.connect_with(partner)
+
+    def _add_loaded(self, loaded: ModelLoaded):
+        models = self.dyn_models if loaded.kind == SOURCE else self.py_models
+        if self._refreshed is not None:
+            self._refreshed.append(loaded)
+            old = self._by_path.get(loaded.model.path.resolve())
+            if old is not None:
+                self._replace_model(models, old, loaded.model)
+                return
+        index = bisect.bisect(models, loaded.model)
+        models.insert(index, loaded.model)
+        if models is self.view_models:
+            self.view.lst_files.add_model(loaded.model, index)
+
+    def _connect_refreshed(self, refreshed: List[ModelLoaded]):
+        """Connect the reloaded models that replaced no old model."""
+        sources = [
+            loaded.model
+            for loaded in refreshed
+            if loaded.kind == SOURCE and loaded.model.other_model is None
+        ]
+        exports = [
+            loaded.model
+            for loaded in refreshed
+            if loaded.kind == EXPORT and loaded.model.other_model is None
+        ]
+        if len(sources) > 0:
+            connect_models(sources, _unconnected(self.py_models))
+        if len(exports) > 0:
+            connect_models(_unconnected(self.dyn_models), exports)
+
+    def _refresh_finished(self, refreshed: List[ModelLoaded]):
+        self._connect_refreshed(refreshed)
+        models = [loaded.model for loaded in refreshed]
+        changed = models + [
+            model.other_model
+            for model in models
+            if model.other_model is not None
+        ]
+        self.view.lst_files.update_model_tags(changed)
+        self.show_code_diff(self.view.lst_files.selected_code_node())
+
+    def _on_load_message(self, message: ModelLoaded | LoadFinished):
+        if message.load_id != self._loader.load_id:
+            return
+        if isinstance(message, ModelLoaded):
+            self._add_loaded(message)
+            return
+        self._load_poller.stop()
+        refreshed, self._refreshed = self._refreshed, None
+        self._by_path = {}
+        if refreshed is None:
+            self._connect_models()
+            self.view.lst_files.update_tags()
+        else:
+            self._refresh_finished(refreshed)
+        self.view.lst_files.text = self._title()
+        if len(message.failed) > 0:
+            msg.showwarning(
+                "Warning", f"{len(message.failed)} files failed to load"
+            )
 
     def source_configs(self) -> List[str]:
         return [src.name for src in self.service.sources()]
@@ -254,28 +454,82 @@ class ConvertController:
         self.create_source_and_export()
         self._update_view()
 
+    def _title(self) -> str:
+        if not self.service.can_convert:
+            return "Select source config and direction"
+        if self.service.direction == Direction.TO_PYTHON:
+            title = "Dynamo Files"
+        else:
+            title = "Python Files"
+        return f"{title} (loading...)" if self.is_loading else title
+
     def _update_view(self):
         state = tk.DISABLED
-        title = "Select source config and direction"
         view_models = []
         if self.service.can_convert:
             state = tk.NORMAL
             if self.service.direction == Direction.TO_PYTHON:
-                title = "Dynamo Files"
                 view_models = self.dyn_models
             else:
-                title = "Python Files"
                 view_models = self.py_models
         self.view_models = view_models
-        self.view.lst_files.text = title
+        self.view.lst_files.text = self._title()
         self.view.lst_files.update_files()
         self.view.btn_convert.config(state=state)
 
+    @property
+    def is_converting(self) -> bool:
+        return self._convert_poller.running
+
     def convert_command(self):
-        self.service.convert()
-        if self.service.source_name is None:
+        """Convert on a worker thread, the progress is polled by Tk."""
+        if self.is_converting:
+            return
+        cancel = CancelToken()
+        self._written = WrittenFiles()
+        self._progress_bar = ProgressBar(self.view, cancel_cb=cancel.cancel)
+        self.view.btn_convert.config(state=tk.DISABLED)
+        self._convert_poller.start()
+        try:
+            future = self.service.convert_future(
+                progress=self._convert_poller.put,
+                cancel=cancel,
+                events=self._written,
+            )
+        except Exception as ex:
+            self._convert_poller.put(ex)
+        else:
+            future.add_done_callback(self._convert_poller.put)
+        self._progress_bar.start("Planning conversion...")
+
+    def _on_convert_message(self, message: Any):
+        if isinstance(message, ConvertProgress):
+            if self._progress_bar is not None:
+                self._progress_bar.update_progress(message.done, message.total)
+            return
+        self._convert_poller.stop()
+        if self._progress_bar is not None:
+            self._progress_bar.stop()
+            self._progress_bar = None
+        self.view.btn_convert.config(state=tk.NORMAL)
+        if isinstance(message, Future):
+            message = message.exception() or message.result()
+        self._convert_finished(message)
+
+    def _convert_finished(self, result: RunReport | BaseException):
+        if isinstance(result, BaseException):
+            log.error("Conversion failed", exc_info=result)
+            msg.showerror("Error", f"Conversion failed: {result}")
+            if self.service.source_name is not None:
+                self.select_source_config(self.service.source_name)
             return
-        self.select_source_config(self.service.source_name)
+        for line in result.summary():
+            log.info(line)
+        if result.has_failed:
+            msg.showwarning(
+                "Warning", f"{result.failed} files failed to convert"
+            )
+        self.refresh_changed(self._written.paths)
 
     def direction_values(self) -> List[str]:
         return list(self.direction_map.keys())
@@ -0,0 +1,111 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+ADDED = "added"
+REMOVED = "removed"
+CONTEXT = "context"
+FOLDED = "folded"
+
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+@dataclass(frozen=True)
+class DiffSection:
+    kind: str
+    lines: List[str]
+
+    @property
+    def text(self) -> str:
+        return "".join(self.lines)
+
+    @property
+    def fold_text(self) -> str:
+        return f"  ... {len(self.lines)} unchanged lines, click to show ...\n"
+
+
+def _display(line: str) -> str:
+    line = line.replace("\t", "    ")
+    return line if line.endswith("\n") else f"{line}\n"
+
+
+def _kind(line: str) -> str:
+    if line.startswith("+"):
+        return ADDED
+    if line.startswith("-"):
+        return REMOVED
+    return CONTEXT
+
+
+def _hunk_start(header: str) -> Optional[int]:
+    """Index in the source code of the first line a hunk shows."""
+    match = _HUNK.match(header)
+    if match is None:
+        return None
+    start = int(match.group(1))
+    # An empty range names the line before it
+    return start if match.group(2) == "0" else start - 1
+
+
+def _unchanged(code: Sequence[str], start: int, end: int) -> List[str]:
+    return [f" {line}" for line in code[start:end]]
+
+
+class _Sections:
+    def __init__(self) -> None:
+        self.sections: List[DiffSection] = []
+
+    def add(self, kind: str, lines: Iterable[str]) -> None:
+        lines = [_display(line) for line in lines]
+        if len(lines) == 0:
+            return
+        if len(self.sections) > 0 and self.sections[-1].kind == kind:
+            self.sections[-1].lines.extend(lines)
+            return
+        self.sections.append(DiffSection(kind, lines))
+
+
+def diff_sections(
+    diff: Sequence[str], source_code: Sequence[str]
+) -> List[DiffSection]:
+    """Split a unified diff into sections of one kind each.
+
+    The source lines between two hunks become ``FOLDED`` sections, so
+    a small context size keeps the text short without losing lines."""
+    result = _Sections()
+    if len(diff) == 0 or not diff[0].startswith("---"):
+        result.add(CONTEXT, diff)
+        return result.sections
+    position: Optional[int] = None
+    for line in diff:
+        start = _hunk_start(line) if line.startswith("@@") else None
+        if start is not None:
+            result.add(FOLDED, _unchanged(source_code, position or 0, start))
+            position = start
+        elif position is None:
+            result.add(_kind(line), [line])
+        else:
+            kind = _kind(line)
+            result.add(kind, [line])
+            if kind != REMOVED:
+                position += 1
+    if position is not None:
+        end = len(source_code)
+        result.add(FOLDED, _unchanged(source_code, position, end))
+    return result.sections
+
+
+def insert_args(sections: Sequence[DiffSection]) -> Tuple[str, ...]:
+    """Text and tag pairs to insert all sections with one call.
+
+    Folded sections get a tag of their own, ``folded-<index>``, so a
+    click can find and expand them."""
+    args: List[str] = []
+    for index, section in enumerate(sections):
+        if section.kind == FOLDED:
+            args.extend((section.fold_text, f"{FOLDED} {FOLDED}-{index}"))
+        elif section.kind == CONTEXT:
+            args.extend((section.text, ""))
+        else:
+            args.extend((section.text, section.kind))
+    return tuple(args)
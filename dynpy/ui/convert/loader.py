@@ -0,0 +1,186 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dynpy.core import factory
+from dynpy.core.handler import ConvertJob
+from dynpy.service import python
+from dynpy.service.progress import CancelToken
+from dynpy.ui.convert.models import (
+    AFileViewModel,
+    ExportDirModel,
+    SourceFileModel,
+)
+
+log = logging.getLogger(__name__)
+
+SOURCE = "source"
+EXPORT = "export"
+
+ModelBuilder = Callable[[], Optional[AFileViewModel]]
+Builder = Tuple[Path, str, ModelBuilder]
+BuilderList = Callable[[ConvertJob], List[Builder]]
+
+
+@dataclass(frozen=True)
+class ModelLoaded:
+    load_id: int
+    kind: str
+    model: AFileViewModel
+
+
+@dataclass(frozen=True)
+class LoadFinished:
+    load_id: int
+    failed: List[Path] = field(default_factory=list)
+
+
+def source_model(path: Path, root: Path) -> Optional[AFileViewModel]:
+    model = SourceFileModel(path, root)
+    if not model.has_children:
+        return None
+    model.update_code(func=factory.dynamo_to_python_code)
+    return model
+
+
+def export_model(
+    job: ConvertJob, directory: Path, paths: List[Path]
+) -> Optional[AFileViewModel]:
+    py_files = [python.python_file(job, path) for path in paths]
+    model = ExportDirModel(directory, job.source.export_path, py_files)
+    if not model.has_children:
+        return None
+    return model
+
+
+class ModelLoader:
+    """Builds the view models of a source on a thread pool.
+
+    Every graph and export directory is parsed as a task of its own and
+    put as ``ModelLoaded`` once it is ready, a ``LoadFinished`` follows
+    the last one. Starting a new load cancels the running one, messages
+    of older loads carry an outdated ``load_id``."""
+
+    def __init__(
+        self, put: Callable[[Any], None], workers: Optional[int] = None
+    ) -> None:
+        self.put = put
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="dynpy-models"
+        )
+        self._load_id = 0
+        self._cancel: Optional[CancelToken] = None
+
+    @property
+    def load_id(self) -> int:
+        return self._load_id
+
+    def _start(self, job: ConvertJob, builders: BuilderList) -> int:
+        self.cancel()
+        self._load_id += 1
+        self._cancel = CancelToken()
+        thread = threading.Thread(
+            target=self._load,
+            args=(self._load_id, job, builders, self._cancel),
+            name="dynpy-load",
+            daemon=True,
+        )
+        thread.start()
+        return self._load_id
+
+    def load(self, job: ConvertJob) -> int:
+        return self._start(job, self._builders)
+
+    def reload(
+        self,
+        job: ConvertJob,
+        sources: Iterable[Path] = (),
+        exports: Iterable[Path] = (),
+    ) -> int:
+        """Load only the given graphs and export directories again."""
+        builders = partial(self._changed_builders, list(sources), list(exports))
+        return self._start(job, builders)
+
+    def cancel(self) -> None:
+        if self._cancel is not None:
+            self._cancel.cancel()
+
+    def _builders(self, job: ConvertJob) -> List[Builder]:
+        source = job.source
+        builders = [
+            (path, SOURCE, partial(source_model, path, source.source_path))
+            for path in source.source_files()
+        ]
+        builders.extend(
+            (directory, EXPORT, partial(export_model, job, directory, paths))
+            for directory, paths in python.export_path_group(job).items()
+        )
+        return builders
+
+    def _changed_builders(
+        self, sources: List[Path], exports: List[Path], job: ConvertJob
+    ) -> List[Builder]:
+        root = job.source.source_path
+        builders = [
+            (path, SOURCE, partial(source_model, path, root))
+            for path in sources
+        ]
+        for directory in exports:
+            paths = sorted(
+                path
+                for path in directory.iterdir()
+                if job.source.is_export(path)
+            )
+            build = partial(export_model, job, directory, paths)
+            builders.append((directory, EXPORT, build))
+        return builders
+
+    def _build(
+        self,
+        load_id: int,
+        kind: str,
+        build: ModelBuilder,
+        cancel: CancelToken,
+    ) -> None:
+        if cancel.cancelled:
+            return
+        model = build()
+        if model is not None and not cancel.cancelled:
+            self.put(ModelLoaded(load_id, kind, model))
+
+    def _load(
+        self,
+        load_id: int,
+        job: ConvertJob,
+        builders: BuilderList,
+        cancel: CancelToken,
+    ):
+        failed: List[Path] = []
+        try:
+            futures: Dict[Future, Path] = {
+                self._executor.submit(
+                    self._build, load_id, kind, build, cancel
+                ): path
+                for path, kind, build in builders(job)
+            }
+            wait(futures)
+        except Exception:
+            log.exception("Failed to list the files of %s", job.source.name)
+            self.put(LoadFinished(load_id, failed))
+            return
+        for future, path in futures.items():
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                log.error("Failed to load %s", path, exc_info=error)
+                failed.append(path)
+        self.put(LoadFinished(load_id, failed))
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -2,11 +2,11 @@ import logging
 import os
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Callable, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
-from dynpy.core.context import DynamoFileContext
 from dynpy.core.models import ContentNode, PythonEngine, PythonFile
-from dynpy.service import dynamo
+from dynpy.core.summary import graph_summary
+from dynpy.service.diff import code_hash
 
 log = logging.getLogger(__name__)
 
@@ -80,7 +80,7 @@ class ANodeViewModel(ATreeViewModel):
 
     def code_hash(self) -> int:
         if self._code_hash is None:
-            self._code_hash = hash(tuple(self.code))
+            self._code_hash = code_hash(self.code)
         return self._code_hash
 
     def __eq__(self, other) -> bool:
@@ -102,6 +102,7 @@ class AFileViewModel(ATreeViewModel):
         self.path = path
         self.other_model: Optional[AFileViewModel] = None
         self._children: List[ANodeViewModel] = []
+        self._children_by_uuid: Dict[str, ANodeViewModel] = {}
 
     @property
     def name(self) -> str:
@@ -120,16 +121,16 @@ class AFileViewModel(ATreeViewModel):
     def children(self) -> List[ANodeViewModel]:
         if len(self._children) == 0:
             self._children = sorted(self._create_children())
+            self._children_by_uuid = {}
+            for child in self._children:
+                if child.uuid is not None:
+                    self._children_by_uuid.setdefault(child.uuid, child)
         return self._children
 
     def child_by(self, uuid: Optional[str]) -> Optional[ANodeViewModel]:
-        if uuid is None:
+        if uuid is None or len(self.children) == 0:
             return None
-        for child in self.children:
-            if child.uuid is None or child.uuid != uuid:
-                continue
-            return child
-        return None
+        return self._children_by_uuid.get(uuid)
 
     @abstractmethod
     def _create_children(self) -> List[ANodeViewModel]:
@@ -146,6 +147,18 @@ class AFileViewModel(ATreeViewModel):
         other_model.other_model = self
         self._set_other_children()
 
+    def disconnect(self) -> None:
+        """Drop the connection to the other model and its nodes."""
+        other_model = self.other_model
+        if other_model is None:
+            return
+        self.other_model = None
+        other_model.other_model = None
+        for child in self.children:
+            if child.other_node is not None:
+                child.other_node.other_node = None
+                child.other_node = None
+
     def _set_other_children(self) -> None:
         if self.other_model is None:
             return
@@ -170,6 +183,22 @@ class AFileViewModel(ATreeViewModel):
         return f"{self.name} ({self.sub_path})"
 
 
+def connect_models(
+    sources: Sequence[AFileViewModel], exports: Sequence[AFileViewModel]
+) -> List[AFileViewModel]:
+    """Connect the source and export models with the same sub path and
+    return the exports left without a source."""
+    by_sub_path: Dict[str, List[AFileViewModel]] = {}
+    for export in exports:
+        by_sub_path.setdefault(export.sub_path, []).append(export)
+    for source in sources:
+        candidates = by_sub_path.get(source.sub_path)
+        if not candidates:
+            continue
+        source.connect_with(candidates.pop(0))
+    return [export for export in exports if export.other_model is None]
+
+
 class SourceCodeModel(ANodeViewModel):
     def __init__(self, node: ContentNode, source_name: str = "Dynamo Node"):
         super().__init__(source_name)
@@ -205,33 +234,29 @@ class SourceFileModel(AFileViewModel):
         super().__init__(path, root)
 
     def _create_children(self) -> List[ANodeViewModel]:
-        with DynamoFileContext(self.path, save=False) as ctx:
-            return [SourceCodeModel(node) for node in dynamo.content_nodes(ctx)]
+        summary = graph_summary(self.path)
+        return [SourceCodeModel(node) for node in summary.nodes]
 
     def update_code(self, func: Callable[[str], List[str]]) -> None:
         super().update_code(func)
 
     def _create_tooltip(self) -> List[str]:
-        with DynamoFileContext(self.path, save=False) as ctx:
-            code_nodes = len(ctx.code_nodes)
-            not_code_nodes = len(ctx.nodes) - code_nodes
-            lines = ["Dynamo File Overview:"]
-            lines.append("Nodes / Annotations:")
-            lines.append(f"- {_number(code_nodes)} Python Nodes")
-            lines.append(f"- {_number(not_code_nodes)} Other Nodes")
-            lines.append(f"- {_number(len(ctx.annotations))} Annotations")
-            lines.append(f"- {_number(len(ctx.connectors))} Connectors")
-            if len(ctx.library_dependencies) > 0:
-                lines.append("Dependencies:")
-                if len(ctx.package_dependencies) > 0:
-                    lines.append(
-                        f"- {_number(len(ctx.package_dependencies))} Package Dependencies"
-                    )
-                if len(ctx.external_dependencies) > 0:
-                    lines.append(
-                        f"- {_number(len(ctx.external_dependencies))} External Dependencies"
-                    )
-            return lines
+        summary = graph_summary(self.path)
+        lines = ["Dynamo File Overview:"]
+        lines.append("Nodes / Annotations:")
+        lines.append(f"- {_number(summary.code_nodes)} Python Nodes")
+        lines.append(f"- {_number(summary.other_nodes)} Other Nodes")
+        lines.append(f"- {_number(summary.annotations)} Annotations")
+        lines.append(f"- {_number(summary.connectors)} Connectors")
+        if summary.library_dependencies > 0:
+            lines.append("Dependencies:")
+            if summary.package_dependencies > 0:
+                packages = _number(summary.package_dependencies)
+                lines.append(f"- {packages} Package Dependencies")
+            if summary.external_dependencies > 0:
+                externals = _number(summary.external_dependencies)
+                lines.append(f"- {externals} External Dependencies")
+        return lines
 
 
 class ExportFileModel(ANodeViewModel):
@@ -55,6 +55,7 @@ class ConvertAppView(AAppView):
         self.ckb_show_code = tk.Checkbutton(self.frm_menu)
         self.controller.setup_show_code_button()
         self.ckb_show_code.grid(cnf=args_src.grid_args(sticky=tk.EW))
+        self.spn_context = self.create_context(args_src)
         self._create_convert_button(args_src)
         args.add_row()
         self.grid_rowconfigure(**args.row_args(weight=1))
@@ -71,6 +72,24 @@ class ConvertAppView(AAppView):
         var_name = self.controller.var_direction_text
         return _create_box(self, var_name, DirectionBox, args)
 
+    def create_context(self, args: UiArgs) -> tk.Spinbox:
+        args.add_column()
+        self.frm_menu.grid_columnconfigure(**args.column_args(weight=0))
+        label = tk.Label(self.frm_menu, text="Context Lines:")
+        label.grid(cnf=args.grid_args(sticky=tk.E))
+        args.add_column()
+        self.frm_menu.grid_columnconfigure(**args.column_args(weight=0))
+        spinbox = tk.Spinbox(
+            self.frm_menu,
+            from_=0,
+            to=99,
+            width=3,
+            textvariable=self.controller.var_diff_context,
+            command=self.controller.diff_context_command,
+        )
+        spinbox.grid(cnf=args.grid_args(sticky=tk.W))
+        return spinbox
+
     def get_paned_window(self) -> tk.PanedWindow:
         args = UiArgs()
         paned = tk.PanedWindow(self, orient=tk.VERTICAL, showhandle=True)
@@ -120,3 +139,6 @@ class ConvertAppView(AAppView):
     def update_service(self, service: IConvertService) -> bool:
         log.info(f"Don't updating service {service}")
         return False
+
+    def close(self) -> None:
+        self.controller.close()
@@ -2,12 +2,14 @@ import logging
 import tkinter as tk
 from pathlib import Path
 from tkinter import filedialog as dialog
+from tkinter import messagebox as msg
 from tkinter import ttk
 from typing import Optional, Tuple
 
 from dynpy import resources as res
 from dynpy.service import IConvertService
 from dynpy.ui.models.action import ConvertActionView
+from dynpy.ui.models.rules import RuleStatsView
 from dynpy.ui.models.source import SourceListView
 from dynpy.ui.models.uiargs import UiArgs
 from dynpy.ui.models.views import AAppView
@@ -27,6 +29,7 @@ class ConvertConfigAppView(AAppView):
         self.tab_frame.grid(cnf=args.grid_args())
         self.add_sources()
         self.add_actions()
+        self.add_rule_stats()
 
     def add_sources(self):
         self.source = SourceListView(self.tab_frame)
@@ -36,6 +39,12 @@ class ConvertConfigAppView(AAppView):
         self.actions = ConvertActionView(self.tab_frame)
         self.tab_frame.add(self.actions, text="Actions")
 
+    def add_rule_stats(self):
+        self.rules = RuleStatsView(
+            self.tab_frame, profile_cb=self.app.service.profile_rules
+        )
+        self.tab_frame.add(self.rules, text="Rule Statistics")
+
     def _loading_config(self, file_path: Path):
         self._load_config(file_path)
         self.app.switch_frame(self)
@@ -53,10 +62,15 @@ class ConvertConfigAppView(AAppView):
     def update_view(self):
         self.source.update_model(self.app.service.sources())
         self.actions.update_model(self.app.service.actions())
+        self.rules.update_model(self.app.service.rule_profile)
 
     def update_service(self, service: IConvertService) -> bool:
         sources = service.update_sources(self.source.get_model())
-        actions = service.update_actions(self.actions.get_model())
+        try:
+            actions = service.update_actions(self.actions.get_model())
+        except ValueError as ex:
+            msg.showerror("Error", f"Actions not updated:\n{ex}")
+            return sources
         return sources or actions
 
 
@@ -0,0 +1,81 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Optional
+
+from dynpy.core.rules import RuleProfile, RuleStats
+from dynpy.ui.models.uiargs import UiArgs
+from dynpy.ui.models.views import IView
+
+_COLUMNS = [
+    ("action", "Action", 100),
+    ("kind", "Kind", 80),
+    ("pattern", "Pattern", 320),
+    ("examined", "Lines", 80),
+    ("hits", "Hits", 80),
+    ("time", "Time ms", 80),
+]
+DEAD_TAG = "dead"
+
+
+def _row_values(rule: RuleStats) -> List[str]:
+    return [
+        rule.action,
+        rule.kind,
+        rule.pattern,
+        str(rule.examined),
+        str(rule.hits),
+        f"{rule.seconds * 1000:.1f}",
+    ]
+
+
+class RuleStatsView(tk.Frame, IView[Optional[RuleProfile]]):
+    def __init__(
+        self, master: tk.Misc, profile_cb: Callable[[bool], None]
+    ) -> None:
+        super().__init__(master)
+        args = UiArgs(sticky=tk.NSEW)
+        self.profile_cb = profile_cb
+        self.profile: Optional[RuleProfile] = None
+        self.grid_columnconfigure(**args.column_args())
+        self.grid_rowconfigure(**args.row_args(weight=0))
+        self.var_enabled = tk.BooleanVar(master=self, value=False)
+        chk_enabled = tk.Checkbutton(
+            self,
+            text="Profile rules of the following conversions",
+            variable=self.var_enabled,
+            command=self._on_toggle,
+            anchor=tk.W,
+        )
+        chk_enabled.grid(cnf=args.grid_args(sticky=tk.W))
+        args.add_row()
+        self.grid_rowconfigure(**args.row_args(weight=1))
+        self.tree_rules = self._add_tree(args)
+
+    def _add_tree(self, args: UiArgs) -> ttk.Treeview:
+        tree = ttk.Treeview(
+            self, columns=[name for name, _, _ in _COLUMNS], show="headings"
+        )
+        for name, text, width in _COLUMNS:
+            tree.heading(name, text=text)
+            tree.column(name, width=width, stretch=name == "pattern")
+        tree.tag_configure(DEAD_TAG, foreground="gray")
+        tree.grid(cnf=args.grid_args())
+        return tree
+
+    def _on_toggle(self) -> None:
+        self.profile_cb(self.var_enabled.get())
+
+    def get_model(self) -> Optional[RuleProfile]:
+        return self.profile
+
+    def update_model(self, model: Optional[RuleProfile]) -> None:
+        self.profile = model
+        self.var_enabled.set(model is not None)
+        self.tree_rules.delete(*self.tree_rules.get_children())
+        if model is None:
+            return
+        for rule in model.stats():
+            tags = (DEAD_TAG,) if rule.is_dead else ()
+            self.tree_rules.insert(
+                "", tk.END, values=_row_values(rule), tags=tags
+            )
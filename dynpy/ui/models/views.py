@@ -145,3 +145,7 @@ class AAppView(ABC, tk.Frame):
     def hide(self) -> None:
         """Hide the view"""
         self.grid_forget()
+
+    def close(self) -> None:
+        """Release the resources of the view before the app exits"""
+        pass
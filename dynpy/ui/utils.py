@@ -1,6 +1,7 @@
+import queue
 import tkinter as tk
 from tkinter import ttk
-from typing import Callable, Optional, Union
+from typing import Any, Callable, Optional, Union
 
 
 UiElement = Union[tk.Button, tk.Label, tk.Entry]
@@ -45,3 +46,58 @@ def add_okay_cancel_key_event(
         return cancel_cmd()
 
     widget.bind('<Escape>', cancel_key_cmd)
+
+
+class QueuePoller:
+    """Passes the messages of worker threads to a handler on the Tk thread.
+
+    ``put`` may be called from any thread. The Tk thread takes at most
+    ``batch`` messages out of the queue every ``interval`` milliseconds,
+    so a busy worker cannot freeze the window."""
+
+    def __init__(
+        self,
+        widget: tk.Misc,
+        handler: Callable[[Any], None],
+        interval: int = 50,
+        batch: int = 200,
+    ) -> None:
+        self.widget = widget
+        self.handler = handler
+        self.interval = interval
+        self.batch = batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._after_id: Optional[str] = None
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def put(self, message: Any) -> None:
+        self._queue.put(message)
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._after_id = self.widget.after(self.interval, self._poll)
+
+    def stop(self) -> None:
+        self._running = False
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _poll(self) -> None:
+        self._after_id = None
+        for _ in range(self.batch):
+            if not self._running:
+                return
+            try:
+                message = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.handler(message)
+        if self._running:
+            self._after_id = self.widget.after(self.interval, self._poll)
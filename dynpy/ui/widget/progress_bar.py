@@ -1,16 +1,20 @@
 import tkinter as tk
 from tkinter import ttk
-from typing import Optional
+from typing import Callable, Optional
 
 from dynpy.ui.models.uiargs import UiArgs
 
 
 class ProgressBar(tk.Toplevel):
-    def __init__(self, app: tk.Misc):
+    def __init__(
+        self, app: tk.Misc, cancel_cb: Optional[Callable[[], None]] = None
+    ):
+        super().__init__(app)
         args = UiArgs()
         self.app = app.winfo_toplevel()
+        self.cancel_cb = cancel_cb
         self.title("Convert code...")
-        self.grid_columnconfigure(**args.grid_args())
+        self.grid_columnconfigure(**args.column_args())
         self.grid_rowconfigure(**args.row_args())
         content = tk.Frame(self)
         content.grid(cnf=args.grid_args(padx=10, pady=10))
@@ -20,15 +24,23 @@ class ProgressBar(tk.Toplevel):
             content,
             orient="horizontal",
             length=300,
-            mode="indeterminate",
-            maximum=100,
+            mode="determinate",
+            maximum=1,
         )
         self.progress_bar.grid(cnf=args.grid_args())
+        args.add_row()
         self.lbl_desc = tk.Label(content, text="Please wait...")
         self.lbl_desc.grid(cnf=args.grid_args())
+        args.add_row()
+        self.btn_cancel = tk.Button(
+            content,
+            text="Cancel",
+            command=self.cancel_command,
+            state=tk.DISABLED if cancel_cb is None else tk.NORMAL,
+        )
+        self.btn_cancel.grid(cnf=args.grid_args(sticky=tk.E))
         self.protocol("WM_DELETE_WINDOW", self.cancel_command)
         self.wm_resizable(False, False)
-        self._started = False
 
     def center_on_app(self):
         self.update_idletasks()
@@ -43,25 +55,38 @@ class ProgressBar(tk.Toplevel):
         return middle_x, middle_y
 
     def start(self, description: Optional[str] = None):
-        """Starts the process bar and placed it in the middle of the parent
+        """Shows the progress bar in the middle of the application
 
-        :param master: The parent TK
-        :type master: Tk
+        :param description: The text below the bar
+        :type description: str
         """
         if description is not None:
             self.lbl_desc.config(text=description)
         self.center_on_app()
-        self.progress_bar.start()
         self.app.config(cursor="exchange")
-        self.update()
-        self.grab_set()
+        self.update_idletasks()
         self.transient(self.app)
+        self.grab_set()
+
+    def update_progress(
+        self, done: int, total: int, description: Optional[str] = None
+    ):
+        """Shows ``done`` of ``total`` steps as filled part of the bar"""
+        self.progress_bar.config(maximum=max(total, 1), value=done)
+        if description is None:
+            description = f"{done} of {total} files"
+        self.lbl_desc.config(text=description)
 
     def cancel_command(self):
+        if self.cancel_cb is None:
+            return "break"
+        self.cancel_cb()
+        self.btn_cancel.config(state=tk.DISABLED, text="Cancelling...")
+        self.lbl_desc.config(text="Stopping after the current file...")
         return "break"
 
     def stop(self):
-        """Stops and destroy the process bar"""
-        self.progress_bar.stop()
+        """Releases and destroys the progress bar"""
         self.app.config(cursor="arrow")
+        self.grab_release()
         self.destroy()
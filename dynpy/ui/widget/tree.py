@@ -1,13 +1,13 @@
 import tkinter as tk
 from tkinter import ttk
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set
 
 from dynpy.ui.convert.models import (
     AFileViewModel,
     ANodeViewModel,
     ATreeViewModel,
 )
-from dynpy.ui.convert.controller import ConvertController
+from dynpy.ui.convert.controller import ConvertController, Tag
 from dynpy.ui.models.uiargs import UiArgs
 
 
@@ -18,6 +18,9 @@ class ModelListBox(tk.LabelFrame):
         self.controller = controller
         self._node_id_dict: Dict[str, ANodeViewModel] = {}
         self._model_id_dict: Dict[str, AFileViewModel] = {}
+        # Placeholder child by model row, until the row is opened
+        self._placeholders: Dict[str, str] = {}
+        self._expanded: Set[str] = set()
         self.grid_rowconfigure(**args.row_args(weight=0))
         self.grid_columnconfigure(**args.column_args())
         self.var_root_path = self.add_heading_frame(args)
@@ -27,6 +30,7 @@ class ModelListBox(tk.LabelFrame):
         self.tree_files.bind(
             "<<TreeviewSelect>>", self.controller.on_tree_select
         )
+        self.tree_files.bind("<<TreeviewOpen>>", self._on_tree_open)
         self.tree_files.grid(cnf=args.grid_args(sticky=tk.NSEW))
 
     def add_heading_frame(self, args_frame: UiArgs) -> tk.StringVar:
@@ -60,6 +64,12 @@ class ModelListBox(tk.LabelFrame):
             return None
         return self._node_id_dict.get(selected[0], None)
 
+    def placeholder_selected(self) -> bool:
+        return any(
+            Tag.PLACEHOLDER.value in self.tree_files.item(item, "tags")
+            for item in self.tree_files.selection()
+        )
+
     def selected_file_model(self) -> Optional[AFileViewModel]:
         selected = self.tree_files.selection()
         if len(selected) != 1:
@@ -82,6 +92,8 @@ class ModelListBox(tk.LabelFrame):
 
     def select_model(self, models: List[ATreeViewModel]):
         for idx, model in enumerate(models, start=1):
+            if isinstance(model, AFileViewModel):
+                self.expand(model)
             self.tree_files.selection_set(model.tree_id)
             if idx == len(models):
                 self.tree_files.see(model.tree_id)
@@ -90,38 +102,73 @@ class ModelListBox(tk.LabelFrame):
 
     def clean_values(self):
         self.tree_files.delete(*self.tree_files.get_children())
+        self._node_id_dict.clear()
+        self._model_id_dict.clear()
+        self._placeholders.clear()
+        self._expanded.clear()
 
     def add_children(self, view_model: AFileViewModel):
         for child in view_model.children:
             tree_id = self.tree_files.insert(
-                view_model.tree_id,
-                tk.END,
-                text=child.name,
-                tags=self.controller.node_tags_for(child),
+                view_model.tree_id, tk.END, text=child.name
             )
             child.tree_id = tree_id
             self._node_id_dict[tree_id] = child
 
+    def _add_placeholder(self, tree_id: str) -> None:
+        self._placeholders[tree_id] = self.tree_files.insert(
+            tree_id, tk.END, text="...", tags=(Tag.PLACEHOLDER.value,)
+        )
+
+    def expand(self, view_model: AFileViewModel) -> None:
+        """Replace the placeholder of a model row by its node rows."""
+        placeholder = self._placeholders.pop(view_model.tree_id, None)
+        if placeholder is None:
+            return
+        self.tree_files.delete(placeholder)
+        self.add_children(view_model)
+        self._expanded.add(view_model.tree_id)
+        self.update_children_tags(view_model)
+
+    def _on_tree_open(self, _: tk.Event):
+        model = self._model_id_dict.get(self.tree_files.focus())
+        if model is not None:
+            self.expand(model)
+
+    def add_model(
+        self, view_model: AFileViewModel, index: int | str = tk.END
+    ) -> None:
+        """Insert the row of a model, without tags until it is connected."""
+        if index == 0:
+            self.var_root_path.set(str(view_model.root))
+        tree_id = self.tree_files.insert("", index, text=view_model.name)
+        view_model.tree_id = tree_id
+        self._model_id_dict[tree_id] = view_model
+        if view_model.has_children:
+            self._add_placeholder(tree_id)
+
     def add_models(self):
         for idx, view_model in enumerate(self.controller.view_models):
-            if idx == 0:
-                self.var_root_path.set(str(view_model.root))
-            tree_id = self.tree_files.insert(
-                "",
-                tk.END,
-                text=view_model.name,
-                tags=self.controller.model_tags_for(view_model),
-            )
-            view_model.tree_id = tree_id
-            self._model_id_dict[tree_id] = view_model
-            self.add_children(view_model)
+            self.add_model(view_model, idx)
 
     def update_children_tags(self, view_model: AFileViewModel):
+        if view_model.tree_id not in self._expanded:
+            return
         for child in view_model.children:
             self.tree_files.item(
                 child.tree_id, tags=self.controller.node_tags_for(child)
             )
 
+    def update_model_tags(self, models: Iterable[AFileViewModel]):
+        """Update the tags of the rows shown for the given models."""
+        for model in models:
+            if self._model_id_dict.get(model.tree_id) is not model:
+                continue
+            self.tree_files.item(
+                model.tree_id, tags=self.controller.model_tags_for(model)
+            )
+            self.update_children_tags(model)
+
     def update_tags(self):
         for model in self.controller.view_models:
             self.tree_files.item(
@@ -0,0 +1,11 @@
+import pytest
+
+from dynpy.core.extract import EXTRACT_CACHE_ENV
+
+
+@pytest.fixture(autouse=True, scope="session")
+def no_graph_extracts():
+    """Keep the tests from writing extracts to the home directory."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv(EXTRACT_CACHE_ENV, "")
+        yield
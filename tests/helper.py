@@ -1,6 +1,9 @@
 import os
 from pathlib import Path
 import shutil
+from typing import List
+
+from dynpy.core import factory
 
 
 DYNAMO_FILE = Path(__file__).parent / "data" / "dynamo.dyn"
@@ -23,3 +26,14 @@ def create_test_file(path: Path) -> Path:
     test_path = ensure_not_exists(test_path)
     shutil.copy(path, test_path)
     return test_path
+
+
+def create_dynamo_files(directory: Path, count: int) -> List[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = [directory / f"graph_{idx}.dyn" for idx in range(count)]
+    for path in paths:
+        shutil.copy(DYNAMO_FILE, path)
+    return paths
+
+
+make_config = factory.layout_config
@@ -0,0 +1,179 @@
+import io
+import json
+from pathlib import Path
+from typing import List
+
+from dynpy.core.handler import ConvertJob, Direction, create_job
+from dynpy.service import batch, dynamo, python
+from dynpy.service import events as evt
+from dynpy.service import report as rpt
+from dynpy.service.profile import MEMORY_FILE, ProfileEvents
+
+from tests.helper import create_dynamo_files, make_config
+
+
+def _jobs(tmp_path: Path, direction: Direction) -> List[ConvertJob]:
+    config = make_config(tmp_path, [("outer", ""), ("inner", "inner")])
+    return [
+        create_job(config, source, direction) for source in config.sources
+    ]
+
+
+def test_run_deduplicates_overlapping_sources(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 3)
+    create_dynamo_files(tmp_path / "dyn" / "inner", 2)
+    jobs = _jobs(tmp_path, Direction.TO_PYTHON)
+    report = batch.run(jobs, workers=2)
+    assert report.files == 5
+    assert report.converted == 5
+    assert report.duplicates == 2
+    assert len(list((tmp_path / "py").rglob("*.py"))) == 5
+
+
+def test_single_job_entry_points_return_the_run_report(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 2)
+    config = make_config(tmp_path)
+    source = config.sources[0]
+    export_job = create_job(config, source, Direction.TO_PYTHON)
+    exported = dynamo.to_python(export_job)
+    assert exported.direction == Direction.TO_PYTHON
+    assert exported.converted == 2
+    import_job = create_job(config, source, Direction.TO_DYNAMO)
+    imported = python.to_dynamo(import_job)
+    assert imported.converted == 2
+    assert imported.nodes_read == exported.nodes_written > 0
+
+
+def test_scanner_reuses_covering_scan(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn" / "inner", 2)
+    jobs = _jobs(tmp_path, Direction.TO_PYTHON)
+    outer, inner = [job.source for job in jobs]
+    scanner = batch.FileScanner()
+    assert len(scanner.source_files(outer)) == 2
+    inner_files = scanner.source_files(inner)
+    assert sorted(inner_files) == sorted(inner.source_files())
+
+
+def test_shards_partition_every_graph_once(tmp_path: Path):
+    paths = create_dynamo_files(tmp_path / "dyn", 20)
+    shards = [batch.Shard.parse(f"{idx}/3") for idx in range(1, 4)]
+    owners = [
+        [shard for shard in shards if shard.contains(path, tmp_path / "dyn")]
+        for path in paths
+    ]
+    assert all(len(owner) == 1 for owner in owners)
+
+
+def test_shards_place_graphs_outside_the_root(tmp_path: Path):
+    path = create_dynamo_files(tmp_path / "other", 1)[0]
+    shards = [batch.Shard.parse(f"{idx}/3") for idx in range(1, 4)]
+    found = [shard.contains(path, tmp_path / "dyn") for shard in shards]
+    assert found.count(True) == 1
+
+
+def test_merged_shard_reports_cover_all_files(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 10)
+    jobs = _jobs(tmp_path, Direction.TO_PYTHON)
+    report_paths = []
+    for idx in (1, 2):
+        report = batch.run(jobs, shard=batch.Shard.parse(f"{idx}/2"))
+        report_paths.append(tmp_path / f"report_{idx}.json")
+        report.save(report_paths[-1])
+    merged = rpt.merge_reports(report_paths)
+    assert merged is not None
+    assert merged.files == 10
+    assert merged.shards == ["1/2", "2/2"]
+
+
+def test_merged_import_shards_count_each_read_once(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 6)
+    batch.run(_jobs(tmp_path, Direction.TO_PYTHON))
+    (tmp_path / "py" / "broken.py").write_bytes(b"\xff")
+    jobs = _jobs(tmp_path, Direction.TO_DYNAMO)
+    batch.run(jobs)
+    full = batch.run(jobs)
+    report_paths = []
+    for idx in (1, 2, 3):
+        report = batch.run(jobs, shard=batch.Shard.parse(f"{idx}/3"))
+        report_paths.append(tmp_path / f"report_{idx}.json")
+        report.save(report_paths[-1])
+    merged = rpt.merge_reports(report_paths)
+    assert merged is not None
+    assert merged.files == full.files
+    assert merged.nodes_read == full.nodes_read > 0
+    assert merged.bytes_read == full.bytes_read
+    assert merged.failed == full.failed == 1
+
+
+def test_cached_graphs_are_not_counted_as_read(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 2)
+    jobs = _jobs(tmp_path, Direction.TO_PYTHON)
+    graphs = sum(p.stat().st_size for p in (tmp_path / "dyn").rglob("*.dyn"))
+    first = batch.run(jobs)
+    assert (first.bytes_read, first.bytes_cached) == (graphs, 0)
+    second = batch.run(jobs)
+    assert (second.bytes_read, second.bytes_cached) == (0, graphs)
+    assert second.nodes_read == first.nodes_read
+
+
+def test_run_streams_ndjson_events(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 2)
+    stream = io.StringIO()
+    jobs = _jobs(tmp_path, Direction.TO_PYTHON)
+    batch.run(jobs, events=evt.NdjsonEvents(stream))
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    names = [record["event"] for record in records]
+    assert names[0] == evt.SCAN_STARTED
+    assert names[1] == evt.SCAN_FINISHED
+    assert records[1]["files"] == 2
+    assert names.count(evt.FILE_WRITTEN) == 2
+    sizes = [record["bytes"] for record in records if "bytes" in record]
+    assert len(sizes) == 4 and all(size > 0 for size in sizes)
+
+
+def test_profile_writes_every_phase(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 2)
+    stream = io.StringIO()
+    jobs = _jobs(tmp_path, Direction.TO_PYTHON)
+    with ProfileEvents(tmp_path / "profile") as profiler:
+        events = evt.EventGroup([evt.NdjsonEvents(stream), profiler])
+        batch.run(jobs, workers=1, events=events)
+    assert len(stream.getvalue().splitlines()) > 0
+    assert set(profiler.stats) == set(evt.PHASES)
+    for phase in evt.PHASES:
+        assert (tmp_path / "profile" / f"{phase}.pstats").exists()
+    memory = json.loads((tmp_path / "profile" / MEMORY_FILE).read_text())
+    assert memory[evt.PHASE_PARSE]["calls"] == 2
+    assert memory[evt.PHASE_PARSE]["peak_bytes"] > 0
+
+
+def test_task_stats_count_and_pass_on_events():
+    written = evt.WrittenFiles()
+    stats = rpt.TaskStats(written)
+    with stats.phase(evt.PHASE_WRITE):
+        stats.emit(evt.NODE_TRANSFORMED, path="a.dyn", node="1", lines=2)
+        stats.emit(evt.FILE_WRITTEN, path="a.py", bytes=10)
+    report = rpt.RunReport(direction=Direction.TO_PYTHON, sources=[])
+    stats.add_to(report)
+    assert report.nodes_written == 1
+    assert report.bytes_written == 10
+    assert list(report.phase_times) == [evt.PHASE_WRITE]
+    assert written.paths == {Path("a.py")}
+
+
+def test_report_counts_nodes_bytes_and_phases(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 3)
+    create_dynamo_files(tmp_path / "dyn" / "inner", 1)
+    jobs = _jobs(tmp_path, Direction.TO_PYTHON)
+    report = batch.run(jobs, workers=2)
+    written = list((tmp_path / "py").rglob("*.py"))
+    assert report.nodes_written == len(written) > 0
+    assert report.nodes_read == report.nodes_written
+    assert report.bytes_written == sum(p.stat().st_size for p in written)
+    graphs = (tmp_path / "dyn").rglob("*.dyn")
+    assert report.bytes_read == sum(p.stat().st_size for p in graphs)
+    assert set(report.phase_times) == set(evt.PHASES)
+    assert len(report.slowest_files) == 4
+    assert report.cache_hit_rate("scanner") > 0
+    loaded = rpt.RunReport.from_dict(json.loads(json.dumps(report.to_dict())))
+    assert loaded == report
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from dynpy.core.actions import ActionType, ReplaceConvertAction
+from dynpy.core.handler import Direction
+from dynpy.service.convert import ConvertService
+from dynpy.service.progress import CancelToken, ConvertProgress
+
+from tests.helper import create_dynamo_files, make_config
+
+SOURCES = ("first", "second")
+
+
+def _load_service(tmp_path: Path) -> ConvertService:
+    config = make_config(tmp_path, [(name, name) for name in SOURCES])
+    for name in SOURCES:
+        create_dynamo_files(tmp_path / "dyn" / name, 5)
+    config_path = tmp_path / "config.dynpy"
+    config.save_as(config_path)
+    service = ConvertService()
+    service.load_config(config_path)
+    return service
+
+
+def _exported(tmp_path: Path, name: str) -> Dict[str, str]:
+    export_path = tmp_path / "py" / name
+    return {
+        str(path.relative_to(export_path)): path.read_text(encoding="utf8")
+        for path in export_path.rglob("*.py")
+    }
+
+
+def test_concurrent_jobs_do_not_share_state(tmp_path: Path):
+    service = _load_service(tmp_path)
+    service.convert(service.create_job(SOURCES[0], Direction.TO_PYTHON))
+    expected = _exported(tmp_path, SOURCES[0])
+    jobs = [
+        service.create_job(SOURCES[idx % 2], Direction.TO_PYTHON)
+        for idx in range(8)
+    ]
+    stop = threading.Event()
+    errors = []
+
+    def mutate_service():
+        remove = service.actions()[ActionType.REMOVE][0]
+        while not stop.is_set():
+            for name in SOURCES:
+                service.convert_handle_by(name)
+                service.direction = Direction.TO_DYNAMO
+                # Would remove every line of the node from the export
+                remove.contains = [*remove.contains, ""][-20:]
+            service.direction = Direction.UNKNOWN
+
+    def convert(job):
+        try:
+            for _ in range(10):
+                service.convert(job)
+        except Exception as ex:
+            errors.append(ex)
+
+    mutator = threading.Thread(target=mutate_service)
+    mutator.start()
+    workers = [threading.Thread(target=convert, args=(job,)) for job in jobs]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop.set()
+    mutator.join()
+    assert errors == []
+    assert _exported(tmp_path, SOURCES[1]).keys() == expected.keys()
+    assert _exported(tmp_path, SOURCES[0]) == expected
+
+
+def test_async_convert_reports_progress(tmp_path: Path):
+    service = _load_service(tmp_path)
+    job = service.create_job(SOURCES[0], Direction.TO_PYTHON)
+    events: List[ConvertProgress] = []
+    report = asyncio.run(service.convert_async(job, progress=events.append))
+    assert report.converted == 5
+    assert [event.total for event in events] == [5] * 6
+    assert events[0].done == 0
+    assert events[-1].finished
+
+
+def test_cancelled_convert_writes_nothing(tmp_path: Path):
+    service = _load_service(tmp_path)
+    job = service.create_job(SOURCES[0], Direction.TO_PYTHON)
+    cancel = CancelToken()
+    cancel.cancel()
+    report = service.convert_future(job, cancel=cancel).result()
+    assert report.cancelled == 5
+    assert _exported(tmp_path, SOURCES[0]) == {}
+
+
+def test_shutdown_releases_the_executor(tmp_path: Path):
+    service = _load_service(tmp_path)
+    job = service.create_job(SOURCES[0], Direction.TO_PYTHON)
+    executor = service.executor
+    service.convert_future(job).result()
+    service.shutdown()
+    assert executor._shutdown
+    assert service.convert_future(job).result().converted == 5
+    service.shutdown()
+
+
+def test_update_actions_rejects_invalid_regex(tmp_path: Path):
+    service = _load_service(tmp_path)
+    invalid = ReplaceConvertAction(value="# x", contains=[], regex=["("])
+    with pytest.raises(ValueError, match="Invalid regex"):
+        service.update_actions({ActionType.REPLACE: [invalid]})
+    assert invalid not in service.actions()[ActionType.REPLACE]
+
+
+def test_enabling_the_rule_profile_starts_it_empty():
+    service = ConvertService()
+    service.profile_rules(True)
+    first = service.rule_profile
+    service.profile_rules(True)
+    assert service.rule_profile is not None
+    assert service.rule_profile is not first
+    service.profile_rules(False)
+    assert service.rule_profile is None
+
+
+def test_code_diff_is_cached_by_code_hashes():
+    service = ConvertService()
+    other = ("other", [f"line {number}\n" for number in range(10)])
+    source = ("source", list(other[1]))
+    assert list(service.code_diff(source, other)) == source[1]
+    source[1][4] = "changed\n"
+    first = list(service.code_diff(source, other, context=2))
+    assert list(service.code_diff(source, other, context=2)) == first
+    service.code_diff(source, other, context=3)
+    stats = service.diff_stats()
+    assert (stats.equal, stats.hits, stats.misses, stats.size) == (1, 1, 2, 2)
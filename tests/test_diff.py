@@ -0,0 +1,57 @@
+import difflib
+import random
+import re
+from typing import List
+
+from dynpy.service.diff import opcodes, unified_diff
+
+HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@")
+
+
+def _patch(code: List[str], diff: List[str]) -> List[str]:
+    """Apply a unified diff to ``code``, asserting its context lines."""
+    result: List[str] = []
+    pos = 0
+    for line in diff[2:]:
+        match = HUNK.match(line)
+        if match is not None:
+            start = int(match.group(1))
+            start = start if match.group(2) == "0" else start - 1
+            result.extend(code[pos:start])
+            pos = start
+            continue
+        kind, text = line[0], line[1:]
+        if kind != "+":
+            assert code[pos] == text
+            pos += 1
+        if kind != "-":
+            result.append(text)
+    result.extend(code[pos:])
+    return result
+
+
+def test_unified_diff_applies_like_difflib():
+    rand = random.Random(3)
+    for _ in range(500):
+        lines = [f"line {number}\n" for number in range(rand.randint(1, 6))]
+        a = [rand.choice(lines) for _ in range(rand.randint(0, 25))]
+        b = [rand.choice(lines) for _ in range(rand.randint(0, 25))]
+        for context in (0, 1, 3, 50):
+            diff = list(unified_diff(a, b, "a", "b", n=context))
+            expected = list(difflib.unified_diff(a, b, "a", "b", n=context))
+            assert (diff == []) == (expected == [])
+            assert diff == [] or _patch(a, diff) == b
+        for tag, i1, i2, j1, j2 in opcodes(a, b):
+            assert tag != "equal" or a[i1:i2] == b[j1:j2]
+
+
+def test_unified_diff_matches_difflib_on_plain_edits():
+    a = [f"value_{number} = {number}\n" for number in range(200)]
+    b = list(a)
+    b[20] = "value_20 = None\n"
+    del b[90:95]
+    b.insert(150, "extra = True\n")
+    for context in (0, 3, 200):
+        assert list(unified_diff(a, b, "a", "b", n=context)) == list(
+            difflib.unified_diff(a, b, "a", "b", n=context)
+        )
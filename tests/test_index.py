@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+from typing import List, Optional
+
+from dynpy.core import factory
+from dynpy.core.actions import ActionType, RemoveConvertAction
+from dynpy.core.handler import ConvertJob, Direction, create_job
+from dynpy.service import batch
+from dynpy.service.index import INDEX_NAME
+
+from tests.helper import create_dynamo_files, make_config
+
+
+def _jobs(
+    tmp_path: Path, remove: Optional[RemoveConvertAction] = None
+) -> List[ConvertJob]:
+    actions = factory.default_convert_config().actions
+    if remove is not None:
+        actions[ActionType.REMOVE].append(remove)
+    config = make_config(tmp_path, actions=actions)
+    return [create_job(config, config.sources[0], Direction.TO_PYTHON)]
+
+
+def _add_line(graph: Path, line: str) -> None:
+    content = json.loads(graph.read_text(encoding="utf8"))
+    for node in content["Nodes"]:
+        if "Code" in node:
+            node["Code"] = f"{node['Code']}\n{line}"
+    graph.write_text(json.dumps(content), encoding="utf8")
+
+
+def test_incremental_export_skips_unchanged_nodes(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 2)
+    first = batch.run(_jobs(tmp_path), incremental=True)
+    assert first.nodes_written > 0
+    assert (tmp_path / "py" / INDEX_NAME).exists()
+    second = batch.run(_jobs(tmp_path), incremental=True)
+    assert second.nodes_written == 0
+    assert second.nodes_unchanged == first.nodes_written
+
+
+def test_incremental_export_follows_rule_changes(tmp_path: Path):
+    graphs = create_dynamo_files(tmp_path / "dyn", 3)
+    line = "Marker = True"
+    _add_line(graphs[0], line)
+    full = batch.run(_jobs(tmp_path), incremental=True)
+    remove = RemoveConvertAction(contains=[line])
+    added = batch.run(_jobs(tmp_path, remove), incremental=True)
+    assert added.nodes_written == 1
+    assert not any(
+        line in path.read_text(encoding="utf8")
+        for path in (tmp_path / "py").rglob("*.py")
+    )
+    removed = batch.run(_jobs(tmp_path), incremental=True)
+    assert removed.nodes_written == 1
+    assert removed.nodes_unchanged == full.nodes_written - 1
+
+
+def test_incremental_export_rewrites_edited_files(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 1)
+    batch.run(_jobs(tmp_path), incremental=True)
+    path = next((tmp_path / "py").rglob("*.py"))
+    content = path.read_text(encoding="utf8")
+    path.write_text(f"{content}\n# edited", encoding="utf8")
+    report = batch.run(_jobs(tmp_path), incremental=True)
+    assert report.nodes_written == 1
+    assert path.read_text(encoding="utf8") == content
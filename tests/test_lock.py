@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import pytest
+
+from dynpy.core import lock
+from dynpy.core.context import DynamoFileContext
+
+from tests.helper import create_dynamo_files
+
+
+def test_exclusive_lock_times_out(tmp_path: Path):
+    path = tmp_path / "graph.dyn"
+    with lock.file_lock(path):
+        with pytest.raises(lock.LockTimeoutError):
+            with lock.file_lock(path, timeout=0.05):
+                pass
+
+
+def test_shared_locks_overlap(tmp_path: Path):
+    path = tmp_path / "graph.dyn"
+    path.touch()
+    with lock.file_lock(path, exclusive=False):
+        with lock.file_lock(path, exclusive=False, timeout=0):
+            pass
+
+
+def test_context_blocks_writer_while_reading(tmp_path: Path):
+    path = create_dynamo_files(tmp_path, 1)[0]
+    with DynamoFileContext(path, save=False):
+        with pytest.raises(lock.LockTimeoutError):
+            with lock.file_lock(path, timeout=0.05):
+                pass
+    with lock.file_lock(path, timeout=0):
+        pass
+
+
+def test_reading_a_missing_graph_creates_nothing(tmp_path: Path):
+    path = tmp_path / "missing.dyn"
+    with pytest.raises(FileNotFoundError):
+        with DynamoFileContext(path, save=False):
+            pass
+    assert not path.exists()
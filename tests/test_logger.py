@@ -0,0 +1,16 @@
+import logging
+from pathlib import Path
+
+from dynpy import logger
+
+
+def test_queue_logging_writes_lazy_records(tmp_path: Path):
+    path = tmp_path / "dynpy.log"
+    handler = logger.log_file(logging.DEBUG, path)
+    listener = logger.start_queue_logging(logging.DEBUG, [handler])
+    try:
+        logging.getLogger("dynpy.test").debug("Pattern %s matches", "x")
+    finally:
+        logger.stop_queue_logging(listener)
+        logging.getLogger().setLevel(logging.WARNING)
+    assert "Pattern x matches" in path.read_text(encoding="utf-8")
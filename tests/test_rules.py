@@ -0,0 +1,153 @@
+from pathlib import Path, PurePath
+
+import pytest
+
+from dynpy.core import factory
+from dynpy.core.actions import (
+    ActionType,
+    BudgetMode,
+    RegexBudgetError,
+    ReplaceConvertAction,
+)
+from dynpy.core.handler import Direction, create_job
+from dynpy.core.models import PythonEngine, SourceConfig
+from dynpy.core.regex_guard import regex_risks
+from dynpy.core.rules import RULE_CONTAINS, RuleProfile
+
+LINES = [
+    "# Load the Python Standard and DesignScript Libraries",
+    "import clr",
+    "if isinstance(value, basestring):",
+    "OUT = value",
+]
+
+
+def _job(rule_profile=None):
+    config = factory.default_convert_config()
+    source = SourceConfig(name="rules", source="dyn", export="py")
+    config.add_source(source)
+    return create_job(config, source, Direction.TO_PYTHON, rule_profile)
+
+
+def test_profiled_actions_convert_the_same_lines():
+    profile = RuleProfile()
+    assert _job(profile).apply_action(list(LINES)) == _job().apply_action(
+        list(LINES)
+    )
+    assert len(profile.stats()) > 0
+
+
+def test_rule_profile_counts_examined_lines_and_hits():
+    profile = RuleProfile()
+    _job(profile).apply_action(list(LINES))
+    stats = {(rule.kind, rule.pattern): rule for rule in profile.stats()}
+    load = stats[(RULE_CONTAINS, "# Load the Python Standard")]
+    assert load.examined == len(LINES)
+    assert load.hits == 1
+    assert all(rule.examined <= len(LINES) for rule in stats.values())
+    assert len(profile.dead_rules()) > 0
+    assert all(rule.hits == 0 for rule in profile.dead_rules())
+
+
+def test_regex_risks_flag_ambiguous_repeats():
+    assert regex_risks("^(a+)+$") != []
+    assert regex_risks("(?:\\w+\\s?)*x") != []
+    assert regex_risks("(a|a)*$") != []
+    assert regex_risks("(.*a)+$") != []
+    assert regex_risks("[^a-zA-Z0-9]+UnwrapElement\\([a-zA-Z]+.*\\)") == []
+    assert regex_risks("(?:\\d{1,3}\\.){3}\\d{1,3}") == []
+    assert regex_risks("^import\\s+\\w+(\\.\\w+)*") == []
+    assert regex_risks("(?:a|b)*c") == []
+    assert regex_risks("(") != []
+
+
+def _slow_action(**kwargs) -> ReplaceConvertAction:
+    return ReplaceConvertAction(
+        value="# slow", contains=[], regex=["^(a+)+$"], **kwargs
+    )
+
+
+def test_line_budget_stops_the_slow_regex():
+    slow_line = "a" * 40 + "!"
+    action = _slow_action(line_budget=0.5)
+    assert action.to_dict()["on_budget"] == BudgetMode.SKIP
+    assert action.apply_to(slow_line) == slow_line
+    assert action.apply_to("aaa") == "aaa  # slow"
+    action = _slow_action(line_budget=0.5, on_budget=BudgetMode.FAIL)
+    with pytest.raises(RegexBudgetError):
+        action.apply_to(slow_line)
+    assert action.apply_to("aaa") == "aaa  # slow"
+
+
+def test_config_with_risky_regex_loads_with_a_warning(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    config = factory.default_convert_config()
+    config.actions[ActionType.REPLACE].append(_slow_action())
+    path = tmp_path / "config.dynpy"
+    config.save_as(path)
+    loaded = factory.convert_config(path)
+    assert len(loaded.actions[ActionType.REPLACE]) == 2
+    assert "^(a+)+$" in caplog.text
+
+
+def test_config_with_invalid_regex_is_rejected(tmp_path: Path):
+    config = factory.default_convert_config()
+    config.actions[ActionType.REPLACE][0].regex.append("(")
+    path = tmp_path / "config.dynpy"
+    config.save_as(path)
+    with pytest.raises(ValueError, match="Invalid regex"):
+        factory.convert_config(path)
+
+
+def test_scoped_actions_run_only_for_matching_nodes():
+    config = factory.default_convert_config()
+    replace = config.actions[ActionType.REPLACE][0]
+    replace.engines = [PythonEngine.IRON_PYTHON_2.value]
+    replace.paths = ["legacy/*.dyn"]
+    source = SourceConfig(name="rules", source="dyn", export="py")
+    config.add_source(source)
+    job = create_job(config, source, Direction.TO_PYTHON)
+    line = "if isinstance(value, basestring):"
+    legacy = PurePath("dyn/legacy/graph.dyn")
+    ignored = job.scoped_action(PythonEngine.IRON_PYTHON_2, legacy)([line])
+    assert ignored == [f"{line}  # type: ignore"]
+    assert job.scoped_action(PythonEngine.C_PYTHON_3, legacy)([line]) == [
+        line
+    ]
+    other = PurePath("dyn/other/graph.dyn")
+    assert job.scoped_action(PythonEngine.IRON_PYTHON_2, other)([line]) == [
+        line
+    ]
+    content = replace.to_dict()
+    assert content["engines"] == ["IronPython2"]
+    assert ReplaceConvertAction(**content).paths == ["legacy/*.dyn"]
+
+
+def test_config_with_unknown_engine_is_rejected(tmp_path: Path):
+    config = factory.default_convert_config()
+    config.actions[ActionType.REPLACE][0].engines = ["IronPython9"]
+    path = tmp_path / "config.dynpy"
+    config.save_as(path)
+    with pytest.raises(ValueError, match="IronPython9"):
+        factory.convert_config(path)
+
+
+def test_rule_profile_labels_actions_by_type_and_position():
+    profile = RuleProfile()
+    _job(profile).apply_action(list(LINES))
+    actions = {rule.action for rule in profile.stats()}
+    assert actions == {"DELETE 0", "REPLACE 0"}
+
+
+def test_traced_hits_match_the_profiled_hits():
+    traced: set = set()
+    profiled: set = set()
+    lines = _job().scoped_action(None, None, traced)(list(LINES))
+    profiled_lines = _job(RuleProfile()).scoped_action(None, None, profiled)(
+        list(LINES)
+    )
+    assert lines == profiled_lines
+    assert traced == profiled
+    assert len(traced) == 2
+    assert traced <= set(_job().rule_ids())
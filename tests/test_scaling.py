@@ -0,0 +1,124 @@
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List
+
+from dynpy.core import context, factory
+from dynpy.core.context import DynamoFileContext
+from dynpy.core.models import NodeInfo, PythonEngine, PythonFile
+from dynpy.ui.convert import models
+from dynpy.ui.convert.models import ExportDirModel, ExportFileModel
+
+SMALL = 200
+LARGE = SMALL * 10
+# Linear code grows by 10x, quadratic code by 100x
+MAX_RATIO = 30
+
+
+class _Counter:
+    def __init__(self, func: Callable):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.func(*args, **kwargs)
+
+
+def _count_uuid(monkeypatch) -> _Counter:
+    counter = _Counter(ExportFileModel.uuid.fget)
+    monkeypatch.setattr(ExportFileModel, "uuid", property(counter))
+    return counter
+
+
+def _assert_linear(small: float, large: float) -> None:
+    assert small > 0
+    assert large / small < MAX_RATIO, f"{small} -> {large}"
+
+
+def _best_time(func: Callable[[], object], repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _py_files(directory: str, count: int) -> List[PythonFile]:
+    return [
+        PythonFile(
+            path=Path(directory, f"node_{idx}.py"),
+            code_lines=["pass"],
+            info=NodeInfo(f"uuid-{idx}", PythonEngine.C_PYTHON_3, directory),
+        )
+        for idx in range(count)
+    ]
+
+
+def _replace_all_code(monkeypatch, count: int) -> int:
+    counter = _Counter(context.node_uuid)
+    monkeypatch.setattr(context, "node_uuid", counter)
+    ctx = DynamoFileContext(Path("scaling.dyn"), save=False)
+    nodes = [OrderedDict(Id=f"uuid-{idx}", Code="") for idx in range(count)]
+    ctx.content = OrderedDict(Nodes=nodes)
+    for idx in range(count):
+        ctx.replace_code(f"uuid-{idx}", "pass")
+    return counter.calls
+
+
+def test_replace_code_scales_with_nodes(monkeypatch):
+    small = _replace_all_code(monkeypatch, SMALL)
+    large = _replace_all_code(monkeypatch, LARGE)
+    _assert_linear(small, large)
+
+
+def _connect_nodes(monkeypatch, count: int) -> int:
+    counter = _count_uuid(monkeypatch)
+    root = Path("scaling")
+    source = ExportDirModel(root / "a", root, _py_files("a", count))
+    other = ExportDirModel(root / "a", root, _py_files("a", count))
+    source.connect_with(other)
+    assert all(child.other_node is not None for child in source.children)
+    return counter.calls
+
+
+def test_connect_scales_with_nodes(monkeypatch):
+    small = _connect_nodes(monkeypatch, SMALL)
+    large = _connect_nodes(monkeypatch, LARGE)
+    _assert_linear(small, large)
+
+
+def _connect_files(monkeypatch, count: int) -> int:
+    counter = _Counter(models._sub_path_of)
+    monkeypatch.setattr(models, "_sub_path_of", counter)
+    root = Path("scaling")
+    sources = [
+        ExportDirModel(root / f"dir_{idx}", root, _py_files("a", 1))
+        for idx in range(count)
+    ]
+    exports = [
+        ExportDirModel(root / f"dir_{idx}", root, _py_files("a", 1))
+        for idx in reversed(range(count))
+    ]
+    assert models.connect_models(sources, exports) == []
+    return counter.calls
+
+
+def test_connect_scales_with_files(monkeypatch):
+    small = _connect_files(monkeypatch, SMALL)
+    large = _connect_files(monkeypatch, LARGE)
+    _assert_linear(small, large)
+
+
+def _clean_time(count: int) -> float:
+    lines = [""] * count + ["pass"] + [""] * count
+    result = factory.clean_empty_lines(list(lines))
+    assert result == ["pass"]
+    return _best_time(lambda: factory.clean_empty_lines(list(lines)))
+
+
+def test_clean_empty_lines_scales_with_lines():
+    small = _clean_time(SMALL * 20)
+    large = _clean_time(LARGE * 20)
+    _assert_linear(small, large)
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).parent.parent
+# Cumulative import time of cli.py in microseconds, the best of a few
+# runs, measured before the conversion modules were added
+BASELINE_US = 87_000
+STARTUP_BUDGET_US = BASELINE_US + 25_000
+# Modules importing cli never needs
+DEFERRED = (
+    "tkinter",
+    "asyncio",
+    "difflib",
+    "cProfile",
+    "tracemalloc",
+    "logging.handlers",
+    "dynpy.service.batch",
+    "dynpy.service.report",
+    "dynpy.service.index",
+    "dynpy.core.summary",
+    "dynpy.core.extract",
+)
+
+
+def _import_times(module: str) -> Dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        _, _, values = line.partition("import time:")
+        parts = [part.strip() for part in values.split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        times[parts[2]] = int(parts[1])
+    return times
+
+
+def test_cli_defers_unneeded_modules():
+    imported = _import_times("cli")
+    assert [name for name in DEFERRED if name in imported] == []
+    assert not any(name.startswith("dynpy.ui") for name in imported)
+
+
+def test_app_defers_the_ui():
+    imported = _import_times("app")
+    assert "tkinter" not in imported
+    assert not any(name.startswith("dynpy.ui") for name in imported)
+
+
+def test_cli_imports_within_budget():
+    best = min(_import_times("cli")["cli"] for _ in range(5))
+    assert best < STARTUP_BUDGET_US
@@ -0,0 +1,123 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from dynpy.core.extract import EXTRACT_CACHE_ENV, ExtractCache, encode
+from dynpy.core.summary import GraphCache, graph_key
+
+from tests.helper import create_dynamo_files
+
+
+def test_graph_cache_reads_a_graph_once_per_version(tmp_path: Path):
+    path = create_dynamo_files(tmp_path, 1)[0]
+    cache = GraphCache()
+    first = cache.summary(path)
+    assert cache.summary(path) is first
+    assert first.code_nodes == len(first.nodes) > 0
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.summary(path) is not first
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 2)
+
+
+def test_graph_cache_evicts_the_least_recently_used(tmp_path: Path):
+    paths = create_dynamo_files(tmp_path, 3)
+    size = GraphCache().summary(paths[0]).nbytes
+    cache = GraphCache(max_bytes=2 * size + size // 2)
+    first = cache.summary(paths[0])
+    cache.summary(paths[1])
+    cache.summary(paths[0])
+    cache.summary(paths[2])
+    assert cache.summary(paths[0]) is first
+    assert cache.stats().size == 2
+    assert cache.stats().nbytes <= cache.max_bytes
+    cache.summary(paths[1])
+    assert cache.stats().misses == 4
+
+
+def test_extracts_replace_the_json_of_unchanged_graphs(tmp_path: Path):
+    path = create_dynamo_files(tmp_path / "dyn", 1)[0]
+    extracts = ExtractCache(tmp_path / "extracts")
+    parsed = GraphCache(extracts=extracts).summary(path)
+    assert extracts.misses == 1
+    assert GraphCache(extracts=extracts).summary(path) == parsed
+    assert extracts.hits == 1
+
+
+def test_invalid_extracts_are_removed(tmp_path: Path):
+    path = create_dynamo_files(tmp_path / "dyn", 1)[0]
+    extracts = ExtractCache(tmp_path / "extracts")
+    GraphCache(extracts=extracts).summary(path)
+    key = graph_key(path)
+    stored = extracts.path_of(key)
+    content = bytearray(stored.read_bytes())
+    content[-1] ^= 0xFF
+    stored.write_bytes(content)
+    assert extracts.read(key) is None
+    assert not stored.exists()
+    other_version = bytearray(encode(key, ()))
+    other_version[4:6] = (99).to_bytes(2, "little")
+    stored.write_bytes(other_version)
+    assert extracts.read(key) is None
+    assert not stored.exists()
+
+
+def test_extract_cleanup_keeps_the_recently_used(tmp_path: Path):
+    paths = create_dynamo_files(tmp_path / "dyn", 4)
+    directory = tmp_path / "extracts"
+    size = len(encode(graph_key(paths[0]), ()))
+    extracts = ExtractCache(directory, max_bytes=3 * size)
+    for number, path in enumerate(paths):
+        key = graph_key(path)
+        extracts.write(key, ())
+        os.utime(extracts.path_of(key), (number, number))
+    extracts.cleanup()
+    kept = {file.name for file in directory.iterdir()}
+    expected = {extracts.path_of(graph_key(path)).name for path in paths}
+    assert len(kept) == 3 and kept < expected
+    assert extracts.path_of(graph_key(paths[0])).name not in kept
+
+
+def test_extract_cleanup_removes_only_its_own_files(tmp_path: Path):
+    directory = tmp_path / "extracts"
+    extracts = ExtractCache(directory, max_bytes=0)
+    key = ("graph.dyn", 0, 0)
+    extracts.write(key, ())
+    temp = extracts.path_of(key).with_name(
+        f"{extracts.path_of(key).name}.1.2.tmp"
+    )
+    foreign = [directory / "notes.txt", directory / "old.extract"]
+    for path in [temp, *foreign]:
+        path.write_text("old")
+        os.utime(path, (0, 0))
+    extracts.cleanup()
+    assert sorted(directory.iterdir()) == sorted(foreign)
+
+
+def test_first_extract_write_trims_a_full_directory(tmp_path: Path):
+    directory = tmp_path / "extracts"
+    keys = [(f"graph_{number:02}.dyn", 0, 0) for number in range(13)]
+    size = len(encode(keys[0], ()))
+    former = ExtractCache(directory)
+    for number, key in enumerate(keys[:12]):
+        former.write(key, ())
+        os.utime(former.path_of(key), (number, number))
+    # A tenth of the limit is written, the old files still exceed it
+    extracts = ExtractCache(directory, max_bytes=10 * size)
+    extracts.write(keys[12], ())
+    assert len(list(directory.iterdir())) == 10
+    assert not extracts.path_of(keys[0]).exists()
+
+
+def test_importing_creates_no_cache_directory(tmp_path: Path):
+    environment = {**os.environ, "HOME": str(tmp_path)}
+    environment.pop(EXTRACT_CACHE_ENV, None)
+    subprocess.run(
+        [sys.executable, "-c", "import cli, dynpy.core.summary"],
+        cwd=Path(__file__).parent.parent,
+        env=environment,
+        check=True,
+    )
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,308 @@
+import queue
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from dynpy.core.handler import ConvertJob, Direction, create_job
+from dynpy.service import batch
+from dynpy.service.convert import ConvertService
+from dynpy.service.events import WrittenFiles
+from dynpy.ui.convert.diff import (
+    ADDED,
+    CONTEXT,
+    FOLDED,
+    REMOVED,
+    diff_sections,
+    insert_args,
+)
+from dynpy.ui.convert.controller import ConvertController, Tag
+from dynpy.ui.convert.loader import (
+    EXPORT,
+    SOURCE,
+    LoadFinished,
+    ModelLoaded,
+    ModelLoader,
+    source_model,
+)
+from dynpy.ui.convert.models import (
+    AFileViewModel,
+    ANodeViewModel,
+    connect_models,
+)
+from dynpy.ui.utils import QueuePoller
+from dynpy.ui.widget.tree import ModelListBox
+
+from tests.helper import create_dynamo_files, make_config
+
+
+class FakeWidget:
+    """Runs ``after`` callbacks only when the test asks for it."""
+
+    def __init__(self) -> None:
+        self.pending: Dict[str, Callable[[], None]] = {}
+        self._next = 0
+
+    def after(self, _: int, callback: Callable[[], None]) -> str:
+        self._next += 1
+        after_id = f"after#{self._next}"
+        self.pending[after_id] = callback
+        return after_id
+
+    def after_cancel(self, after_id: str) -> None:
+        self.pending.pop(after_id, None)
+
+    def tick(self) -> None:
+        for after_id in list(self.pending):
+            self.pending.pop(after_id)()
+
+
+def test_poller_hands_messages_to_the_tk_thread_in_batches():
+    widget = FakeWidget()
+    received: List[int] = []
+    poller = QueuePoller(widget, received.append, batch=2)
+    poller.start()
+    for number in range(5):
+        poller.put(number)
+    widget.tick()
+    assert received == [0, 1]
+    widget.tick()
+    widget.tick()
+    assert received == [0, 1, 2, 3, 4]
+    poller.stop()
+    assert widget.pending == {}
+
+
+def test_poller_stops_from_its_handler():
+    widget = FakeWidget()
+    received: List[int] = []
+
+    def handle(number: int) -> None:
+        received.append(number)
+        poller.stop()
+
+    poller = QueuePoller(widget, handle)
+    poller.start()
+    poller.put(1)
+    poller.put(2)
+    widget.tick()
+    assert received == [1]
+    assert not poller.running
+    assert widget.pending == {}
+
+
+def _job(tmp_path: Path, direction: Direction) -> ConvertJob:
+    config = make_config(tmp_path)
+    return create_job(config, config.sources[0], direction)
+
+
+def _collect(messages: queue.Queue, load_id: int):
+    loaded: List[ModelLoaded] = []
+    while True:
+        message = messages.get(timeout=10)
+        if message.load_id != load_id:
+            continue
+        if isinstance(message, LoadFinished):
+            return loaded, message
+        loaded.append(message)
+
+
+def test_loader_streams_models_of_sources_and_exports(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 3)
+    batch.run([_job(tmp_path, Direction.TO_PYTHON)])
+    messages: queue.Queue = queue.Queue()
+    loader = ModelLoader(messages.put, workers=2)
+    job = _job(tmp_path, Direction.UNKNOWN)
+    loaded, finished = _collect(messages, loader.load(job))
+    loader.shutdown()
+    assert finished.failed == []
+    sources = [msg.model for msg in loaded if msg.kind == SOURCE]
+    exports = [msg.model for msg in loaded if msg.kind == EXPORT]
+    assert len(sources) == 3
+    assert connect_models(sources, exports) == []
+
+
+def test_reload_builds_only_the_written_files(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 3)
+    batch.run([_job(tmp_path, Direction.TO_PYTHON)])
+    messages: queue.Queue = queue.Queue()
+    loader = ModelLoader(messages.put, workers=2)
+    job = _job(tmp_path, Direction.UNKNOWN)
+    loaded, _ = _collect(messages, loader.load(job))
+    sources = [msg.model for msg in loaded if msg.kind == SOURCE]
+    exports = [msg.model for msg in loaded if msg.kind == EXPORT]
+    connect_models(sources, exports)
+    (tmp_path / "dyn" / "graph_1.dyn").unlink()
+    (tmp_path / "dyn" / "graph_2.dyn").unlink()
+    written = WrittenFiles()
+    batch.run([_job(tmp_path, Direction.TO_PYTHON)], events=written)
+    assert len(written.paths) == 1
+    exports_written = {path.parent for path in written.paths}
+    load_id = loader.reload(job, exports=exports_written)
+    reloaded = [msg.model for msg in _collect(messages, load_id)[0]]
+    loader.shutdown()
+    assert len(reloaded) == 1
+    old = next(model for model in exports if model == reloaded[0])
+    partner = old.other_model
+    old.disconnect()
+    assert partner is not None and partner.other_model is None
+    assert all(child.other_node is None for child in partner.children)
+    reloaded[0].connect_with(partner)
+    assert all(child.other_node is not None for child in partner.children)
+
+
+def test_diff_sections_fold_the_lines_between_hunks():
+    other = [f"line {number}\n" for number in range(20)]
+    source = list(other)
+    source[2] = "changed 2\n"
+    source[15] = "changed 15\n"
+    diff = list(
+        ConvertService().code_diff(("a", source), ("b", other), context=1)
+    )
+    sections = diff_sections(diff, source)
+    shown = [section.kind for section in sections]
+    assert shown == [
+        REMOVED, ADDED, FOLDED, CONTEXT, REMOVED, ADDED, CONTEXT,
+        FOLDED, CONTEXT, REMOVED, ADDED, CONTEXT, FOLDED,
+    ]
+    unfolded = [
+        line[1:]
+        for section in sections[2:]
+        for line in section.lines
+        if section.kind != REMOVED
+    ]
+    assert unfolded == source
+    args = insert_args(sections)
+    assert len(args) == 2 * len(sections)
+    assert args[5] == f"{FOLDED} {FOLDED}-2"
+
+
+class FakeTree:
+    """The part of ``ttk.Treeview`` the model list box uses."""
+
+    def __init__(self) -> None:
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[str]] = {"": []}
+        self._selection: Tuple[str, ...] = ()
+        self._next = 0
+        self.focused = ""
+
+    def insert(self, parent: str, index: Any, text: str = "", tags=()) -> str:
+        self._next += 1
+        tree_id = f"I{self._next}"
+        self.rows[tree_id] = {"text": text, "tags": tuple(tags), "open": False}
+        self.children[tree_id] = []
+        siblings = self.children[parent]
+        siblings.insert(len(siblings) if index == "end" else index, tree_id)
+        return tree_id
+
+    def delete(self, *tree_ids: str) -> None:
+        for tree_id in tree_ids:
+            self.delete(*self.children.pop(tree_id))
+            del self.rows[tree_id]
+            for siblings in self.children.values():
+                if tree_id in siblings:
+                    siblings.remove(tree_id)
+
+    def get_children(self, tree_id: str = "") -> Tuple[str, ...]:
+        return tuple(self.children[tree_id])
+
+    def item(self, tree_id: str, option: str | None = None, **values: Any):
+        if option is not None:
+            return self.rows[tree_id][option]
+        self.rows[tree_id].update(values)
+
+    def selection(self) -> Tuple[str, ...]:
+        return self._selection
+
+    def selection_set(self, *tree_ids: str) -> None:
+        self._selection = tree_ids
+
+    def see(self, _: str) -> None:
+        pass
+
+    def focus(self) -> str:
+        return self.focused
+
+
+class FakeTags:
+    def node_tags_for(self, _: ANodeViewModel) -> Tuple[str, ...]:
+        return (Tag.EQUAL.value,)
+
+    def model_tags_for(self, _: AFileViewModel) -> Tuple[str, ...]:
+        return (Tag.CHANGED.value,)
+
+    def on_tree_select(self, _: Any) -> None:
+        pass
+
+
+class FakeVariable:
+    def set(self, value: str) -> None:
+        self.value = value
+
+
+def _list_box(models: List[AFileViewModel]) -> ModelListBox:
+    # The rows are managed without a Tk window
+    box = ModelListBox.__new__(ModelListBox)
+    box.controller = FakeTags()
+    box.controller.view_models = models
+    box.tree_files = FakeTree()
+    box.var_root_path = FakeVariable()
+    box._node_id_dict = {}
+    box._model_id_dict = {}
+    box._placeholders = {}
+    box._expanded = set()
+    return box
+
+
+def test_tree_creates_node_rows_when_a_file_row_opens(tmp_path: Path):
+    paths = create_dynamo_files(tmp_path / "dyn", 2)
+    models = [source_model(path, tmp_path / "dyn") for path in paths]
+    box = _list_box(models)
+    tree = box.tree_files
+    box.update_files()
+    first, second = models
+    placeholder = tree.get_children(first.tree_id)
+    assert len(placeholder) == 1
+    assert tree.item(placeholder[0], "text") == "..."
+    assert tree.item(placeholder[0], "tags") == (Tag.PLACEHOLDER.value,)
+    assert tree.item(first.tree_id, "tags") == (Tag.CHANGED.value,)
+    # Unexpanded rows have no node rows to tag
+    assert len(box._node_id_dict) == 0
+    tree.selection_set(placeholder[0])
+    assert box.placeholder_selected()
+    tree.focused = first.tree_id
+    box._on_tree_open(None)
+    rows = tree.get_children(first.tree_id)
+    assert len(rows) == len(first.children) > 0
+    assert all(tree.item(row, "tags") == (Tag.EQUAL.value,) for row in rows)
+    assert len(tree.get_children(second.tree_id)) == 1
+    node = second.children[0]
+    box.select_model([second, node])
+    assert tree.selection() == (node.tree_id,)
+    assert not box.placeholder_selected()
+    assert box.selected_code_node() is node
+    box.update_tags()
+    assert len(box._node_id_dict) == len(first.children) + len(
+        second.children
+    )
+
+
+def test_refresh_connects_only_the_reloaded_models(tmp_path: Path):
+    create_dynamo_files(tmp_path / "dyn", 2)
+    messages: queue.Queue = queue.Queue()
+    loader = ModelLoader(messages.put, workers=2)
+    job = _job(tmp_path, Direction.UNKNOWN)
+    loaded, _ = _collect(messages, loader.load(job))
+    batch.run([_job(tmp_path, Direction.TO_PYTHON)])
+    exports = {path.parent for path in (tmp_path / "py").rglob("*.py")}
+    refreshed, _ = _collect(messages, loader.reload(job, exports=exports))
+    loader.shutdown()
+    controller = ConvertController.__new__(ConvertController)
+    controller.dyn_models = [msg.model for msg in loaded]
+    controller.py_models = [msg.model for msg in refreshed]
+    first, second = controller.dyn_models
+    controller._connect_refreshed(refreshed[:1])
+    assert refreshed[0].model.other_model in (first, second)
+    assert refreshed[1].model.other_model is None
+    controller._connect_refreshed(refreshed)
+    partners = [first.other_model, second.other_model]
+    assert all(msg.model in partners for msg in refreshed)